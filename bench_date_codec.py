@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from date_codec import format_date, parse_date
+from task_tracker_oop import Task
+
+# Compares the date_codec fast path with the strptime/strftime calls it
+# replaced, on a synthetic task file.
+#
+#   python bench_date_codec.py --count 100000
+
+
+def make_task_file(path, count):
+    start = date(2024, 1, 1)
+    tasks = [{
+        "name": f"Task {idx}",
+        "due": (start + timedelta(days=random.randrange(730))).strftime("%Y-%m-%d"),
+        "done": idx % 3 == 0
+    } for idx in range(count)]
+    with open(path, "w") as file:
+        json.dump(tasks, file, indent=2)
+    return tasks
+
+
+def best_of(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        parse_date.cache_clear()
+        format_date.cache_clear()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def report(label, old, new):
+    print(f"{label:<22} strptime/strftime {old * 1000:8.1f} ms   codec {new * 1000:8.1f} ms   {old / new:5.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark date_codec against strptime/strftime")
+    parser.add_argument("--count", type=int, default=100_000, help="number of tasks (default: 100000)")
+    count = parser.parse_args(argv).count
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "tasks.json")
+        records = make_task_file(path, count)
+        texts = [record["due"] for record in records]
+        dates = [parse_date(text) for text in texts]
+
+        print(f"{count} tasks")
+        report("parse",
+               best_of(lambda: [datetime.strptime(text, "%Y-%m-%d").date() for text in texts]),
+               best_of(lambda: [parse_date(text) for text in texts]))
+        report("format",
+               best_of(lambda: [value.strftime("%Y-%m-%d") for value in dates]),
+               best_of(lambda: [format_date(value) for value in dates]))
+
+        # Reading the file into Task objects, before and after
+        def old_load():
+            with open(path) as file:
+                return [Task(record["name"], datetime.strptime(record["due"], "%Y-%m-%d").date(), record["done"])
+                        for record in json.load(file)]
+
+        def new_load():
+            with open(path) as file:
+                return [Task.from_dict(record) for record in json.load(file)]
+        report("load file", best_of(old_load), best_of(new_load))
+
+
+if __name__ == "__main__":
+    main()
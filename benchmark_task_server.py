@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+from benchmark_task_tracker import SIZES, make_records
+from task_storage import JournalStorage, SharedStorage, WriteBehindStorage
+from task_server import TaskServer
+from task_tracker_oop import TaskManager
+
+# Load test for task_server.py. Each client thread keeps one connection open
+# (keep-alive) and sends a mix of reads and writes as fast as it can:
+#
+#   python benchmark_task_server.py --size 10k --clients 16 --duration 5
+#   python benchmark_task_server.py --url http://127.0.0.1:8765 --write-ratio 0.2
+#
+# Without --url a server is started in this process on a temporary copy of
+# a synthetic task file. Reports requests per second, latency percentiles
+# and how many requests were turned away (503) or failed.
+
+
+def start_local_server(size, work_dir):
+    filename = os.path.join(work_dir, "tasks.json")
+    JournalStorage(filename, durable=False).write(make_records(size))
+    manager = TaskManager(filename, lazy=False, storage=WriteBehindStorage(
+        SharedStorage(JournalStorage(filename, durable=False))))
+    loop = asyncio.new_event_loop()
+    server = TaskServer(manager, port=0)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, name="task-server", daemon=True)
+    thread.start()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    return f"http://127.0.0.1:{server.port}", server, stop
+
+
+class Client(threading.Thread):
+    def __init__(self, url, deadline, write_ratio, seed):
+        super().__init__(daemon=True)
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.deadline = deadline
+        self.write_ratio = write_ratio
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+        self.added = []
+
+    def next_request(self):
+        rng = self.rng
+        if rng.random() < self.write_ratio:
+            if self.added and rng.random() < 0.5:
+                return "POST", f"/tasks/{self.added.pop()}/complete", b""
+            body = {"name": f"load test {rng.randrange(10 ** 6)}",
+                    "due": f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}"}
+            return "POST", "/tasks", json.dumps(body).encode("utf-8")
+        return rng.choice([
+            ("GET", "/tasks?limit=50", b""),
+            ("GET", f"/tasks?done=false&due_after=2024-{rng.randrange(1, 13):02d}-01&limit=20", b""),
+            ("GET", "/search?q=" + rng.choice(["rep", "bug", "call", "plan"]) + "&limit=20", b""),
+            ("GET", "/summary", b""),
+        ])
+
+    def run(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        while time.perf_counter() < self.deadline:
+            method, path, body = self.next_request()
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=body or None,
+                             headers={"Content-Type": "application/json"} if body else {})
+                response = conn.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                continue
+            self.latencies.append(time.perf_counter() - started)
+            self.statuses[response.status] = self.statuses.get(response.status, 0) + 1
+            if method == "POST" and path == "/tasks" and response.status == 201:
+                self.added.append(json.loads(data)["id"])
+        conn.close()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the task server")
+    parser.add_argument("--url", help="server to test (default: start one here)")
+    parser.add_argument("--size", default="10k", help=f"tasks in the local server's file: {', '.join(SIZES)}")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds (default: 5)")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    work_dir = None
+    server = None
+    stop = None
+    url = args.url
+    if url is None:
+        work_dir = tempfile.mkdtemp(prefix="task-server-bench-")
+        url, server, stop = start_local_server(SIZES[args.size], work_dir)
+    try:
+        deadline = time.perf_counter() + args.duration
+        clients = [Client(url, deadline, args.write_ratio, seed) for seed in range(args.clients)]
+        started = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if stop is not None:
+            stop()
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    statuses = {}
+    for client in clients:
+        for status, count in client.statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    results = {
+        "url": url if args.url else f"local, {args.size} tasks",
+        "clients": args.clients,
+        "seconds": round(elapsed, 3),
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": {name: round(percentile(latencies, fraction) * 1000, 3)
+                       for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3) if latencies else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "connection_errors": sum(client.errors for client in clients),
+    }
+    if server is not None:
+        results["server"] = dict(server.stats)
+
+    print(f"{results['requests']} requests in {results['seconds']} s from {args.clients} clients: "
+          f"{results['requests_per_second']} req/s")
+    print("latency ms: " + ", ".join(f"{name} {value}" for name, value in results["latency_ms"].items()))
+    print(f"statuses: {results['statuses']}, connection errors: {results['connection_errors']}")
+    if server is not None:
+        print(f"server: {results['server']}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    return 1 if results["connection_errors"] or not latencies else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
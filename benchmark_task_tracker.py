@@ -0,0 +1,209 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from task_binary import BinaryStorage
+from task_storage import JsonStorage, JournalStorage
+from task_tracker_oop import Task, TaskManager
+
+# Benchmarks for the TaskManager / Task hot paths on synthetic task files.
+#
+#   python benchmark_task_tracker.py --sizes 1k,10k,100k --output results.json
+#   python benchmark_task_tracker.py --compare results.json --threshold 1.25
+#
+# Every case is timed `repeat` times and the fastest run is reported, in
+# milliseconds per operation. --compare exits with status 1 if any case got
+# slower than the baseline by more than the threshold factor.
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def make_records(count, seed=42):
+    # Same input for the same count and seed, so runs are comparable
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    words = ["write", "report", "call", "review", "fix", "bug", "plan", "meeting",
+             "email", "budget", "update", "docs", "deploy", "test", "clean", "garage"]
+    return [{
+        "name": " ".join(rng.choices(words, k=3)) + f" {idx}",
+        "due": (start + timedelta(days=rng.randrange(730))).isoformat(),
+        "done": rng.random() < 0.3,
+        "id": f"{idx:08x}"
+    } for idx in range(count)]
+
+
+def make_storage(kind, filename):
+    if kind == "journal":
+        return JournalStorage(filename, durable=False)
+    if kind == "binary":
+        return BinaryStorage(filename)
+    return JsonStorage(filename)
+
+
+def timed(func, repeat, ops=1):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) / ops)
+    return times
+
+
+class Bench:
+    def __init__(self, work_dir, records, storage, repeat):
+        self.work_dir = work_dir
+        self.records = records
+        self.storage = storage
+        self.repeat = repeat
+        self.filename = os.path.join(work_dir, "tasks.json")
+        make_storage(storage, self.filename).write(records)
+
+    def work_file(self):
+        # Fresh copy of the task file to work on
+        filename = os.path.join(self.work_dir, "work.json")
+        shutil.copyfile(self.filename, filename)
+        journal = filename + ".journal"
+        if os.path.exists(journal):
+            os.remove(journal)
+        return filename
+
+    def manager(self, filename=None):
+        # A fully loaded manager, on a fresh copy unless filename is given
+        filename = filename or self.work_file()
+        return TaskManager(filename, storage=make_storage(self.storage, filename), lazy=False)
+
+    def load(self):
+        # Times manager(); the file copy is made before the clock starts
+        times = []
+        for _ in range(self.repeat):
+            filename = self.work_file()
+            started = time.perf_counter()
+            self.manager(filename)
+            times.append(time.perf_counter() - started)
+        return times
+
+    def mutation(self, ops, apply):
+        # Times `ops` calls of one mutation on an already loaded manager
+        times = []
+        for _ in range(self.repeat):
+            manager = self.manager()
+            targets = [task.id for task in manager.ordered_tasks[:ops]]
+            started = time.perf_counter()
+            for task_id in targets:
+                apply(manager, task_id)
+            times.append((time.perf_counter() - started) / ops)
+        return times
+
+    def run(self):
+        count = len(self.records)
+        # Full-file writes per mutation make the big sizes slow; fewer ops
+        ops = max(1, min(100, 100_000 // count))
+        manager = self.manager()
+        tasks = list(manager.tasks)
+
+        def show():
+            with contextlib.redirect_stdout(io.StringIO()):
+                manager.show_tasks()
+
+        def sort_after_change():
+            manager.add_task("bench sort", "2025-01-01")
+            manager.sort_tasks()
+
+        return {
+            "Task.from_dict": timed(lambda: [Task.from_dict(r) for r in self.records], self.repeat, count),
+            "Task.to_dict": timed(lambda: [t.to_dict() for t in tasks], self.repeat, count),
+            "load_tasks": self.load(),
+            "save_tasks": timed(manager.save_tasks, self.repeat),
+            "sort_tasks": timed(manager.sort_tasks, self.repeat),
+            "add+sort_tasks": timed(sort_after_change, self.repeat),
+            "show_tasks": timed(show, self.repeat),
+            "add_task": self.mutation(ops, lambda m, task_id: m.add_task("bench task", "2025-06-01")),
+            "remove_task": self.mutation(ops, lambda m, task_id: m.remove_task_by_id(task_id)),
+            "mark_complete": self.mutation(ops, lambda m, task_id: m.mark_complete_by_id(task_id)),
+        }
+
+
+def run_suite(sizes, storage, repeat):
+    results = {}
+    for label in sizes:
+        records = make_records(SIZES[label])
+        work_dir = tempfile.mkdtemp()
+        try:
+            print(f"{label} tasks ({storage})", file=sys.stderr)
+            for case, times in Bench(work_dir, records, storage, repeat).run().items():
+                results[f"{case}/{label}"] = {
+                    "best_ms": min(times) * 1000,
+                    "median_ms": statistics.median(times) * 1000,
+                }
+        finally:
+            shutil.rmtree(work_dir)
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"{'case':<28}{'baseline':>12}{'now':>12}{'ratio':>8}")
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        before = baseline[case]["best_ms"]
+        now = result["best_ms"]
+        ratio = now / before if before else float("inf")
+        flag = "  SLOWER" if ratio > threshold else ""
+        print(f"{case:<28}{before:>12.4f}{now:>12.4f}{ratio:>8.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(case)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TaskManager hot paths")
+    parser.add_argument("--sizes", default="1k,10k", help="comma separated: " + ",".join(SIZES))
+    parser.add_argument("--storage", choices=["json", "journal", "binary"], default="json")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier --output")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown factor that counts as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip().lower() for size in args.sizes.split(",")]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown size: {', '.join(unknown)}")
+
+    results = run_suite(sizes, args.storage, args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "storage": args.storage,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    else:
+        for case, result in results.items():
+            print(f"{case:<28}{result['best_ms']:>12.4f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+# Fast ISO (YYYY-MM-DD) date parsing and formatting.
+#
+# datetime.strptime goes through the locale aware regex machinery in
+# _strptime and is very slow; task files hold the canonical 10 character
+# form almost exclusively, and only a few hundred distinct dates, so both
+# directions are memoized as well.
+
+ISO_FORMAT = "%Y-%m-%d"
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text):
+    # Raises ValueError for anything "%Y-%m-%d" would reject
+    if (len(text) == 10 and text[4] == "-" and text[7] == "-"
+            and text[:4].isdigit() and text[5:7].isdigit() and text[8:].isdigit()):
+        return date(int(text[:4]), int(text[5:7]), int(text[8:]))
+    # Unpadded forms like 2025-5-1 are valid for strptime too
+    return datetime.strptime(text, ISO_FORMAT).date()
+
+
+@lru_cache(maxsize=4096)
+def format_date(value):
+    return value.strftime(ISO_FORMAT)
+
+
+def is_valid_date(text):
+    try:
+        parse_date(text)
+        return True
+    except ValueError:
+        return False
@@ -0,0 +1,140 @@
+import gzip
+import json
+import os
+import re
+from task_search import tokenize
+from task_storage import FileLock
+
+# Cold storage for old completed tasks, so the task file (and everything
+# that loads, sorts or saves it) only carries the working set.
+#
+# The archive is a directory next to the task file ("<file>.archive") of
+# gzip compressed segments, one task record per line, plus a manifest:
+#
+#   manifest.json          [{"file", "count", "first_due", "last_due"}, ...]
+#   segment-000001.jsonl.gz
+#   segment-000001.ids     the task IDs in that segment, one per line
+#   segment-000002.jsonl.gz
+#   ...
+#
+# Segments are written once and never changed; each archiving run adds new
+# ones (at most segment_size records each, sorted by due date). Reading is
+# lazy, one segment at a time, and segments whose due range lies outside
+# the requested window are skipped without being opened.
+
+_SEGMENT = re.compile(r"segment-(\d+)\.jsonl\.gz$")
+
+
+class TaskArchive:
+    segment_size = 50_000
+
+    def __init__(self, directory, durable=True):
+        self.directory = directory
+        self.durable = durable
+        self._manifest_path = os.path.join(directory, "manifest.json")
+
+    def segments(self):
+        try:
+            with open(self._manifest_path, encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+
+    def __len__(self):
+        return sum(segment["count"] for segment in self.segments())
+
+    def add(self, records):
+        # Writes records (dicts as from Task.to_dict) as new segments and
+        # returns how many were added. Records whose id is already archived
+        # are skipped: a crash after add() but before the tasks left the
+        # task file makes the next run archive them again.
+        # Segments go to disk before the manifest names them, so a crash
+        # leaves at worst an unlisted file, never a listed missing one.
+        records = sorted(records, key=lambda record: record["due"])
+        if not records:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        with FileLock(os.path.join(self.directory, "lock")).locked():
+            segments = self.segments()
+            seen = self._archived_ids(segments, records[0]["due"], records[-1]["due"])
+            unique = []
+            for record in records:
+                if record["id"] not in seen:
+                    seen.add(record["id"])
+                    unique.append(record)
+            records = unique
+            if not records:
+                return 0
+            number = max([int(_SEGMENT.match(segment["file"]).group(1)) for segment in segments] or [0])
+            for start in range(0, len(records), self.segment_size):
+                chunk = records[start:start + self.segment_size]
+                number += 1
+                name = f"segment-{number:06d}.jsonl.gz"
+                self._write_segment(os.path.join(self.directory, name), chunk)
+                self._write_file(self._ids_path(name),
+                                 "".join(record["id"] + "\n" for record in chunk).encode("utf-8"))
+                segments.append({"file": name, "count": len(chunk),
+                                 "first_due": chunk[0]["due"], "last_due": chunk[-1]["due"]})
+            self._write_file(self._manifest_path, json.dumps(segments, indent=2).encode("utf-8"))
+        return len(records)
+
+    def iter_records(self, due_after=None, due_before=None):
+        # Yields archived records, segment by segment. Bounds are exclusive
+        # ISO date strings, as in TaskManager.query.
+        for segment in self.segments():
+            if due_after is not None and segment["last_due"] <= due_after:
+                continue
+            if due_before is not None and segment["first_due"] >= due_before:
+                continue
+            with gzip.open(os.path.join(self.directory, segment["file"]), "rt", encoding="utf-8") as file:
+                for line in file:
+                    record = json.loads(line)
+                    due = record["due"]
+                    if due_after is not None and due <= due_after:
+                        continue
+                    if due_before is not None and due >= due_before:
+                        # Segments are sorted by due date
+                        break
+                    yield record
+
+    def search(self, text, due_after=None, due_before=None):
+        # Same matching as TaskManager.search: every word of text must start
+        # a word of the name
+        words = tokenize(text)
+        for record in self.iter_records(due_after, due_before):
+            tokens = tokenize(record["name"])
+            if all(any(token.startswith(word) for token in tokens) for word in words):
+                yield record
+
+    def _archived_ids(self, segments, first_due, last_due):
+        # IDs in the segments whose due range overlaps [first_due, last_due]
+        # (a record's copy can only be in one of those), read from the ID
+        # lists so no segment has to be decompressed
+        ids = set()
+        for segment in segments:
+            if segment["last_due"] < first_due or segment["first_due"] > last_due:
+                continue
+            try:
+                with open(self._ids_path(segment["file"]), encoding="utf-8") as file:
+                    ids.update(file.read().splitlines())
+            except FileNotFoundError:
+                # Written before segments had ID lists
+                with gzip.open(os.path.join(self.directory, segment["file"]), "rt", encoding="utf-8") as file:
+                    ids.update(json.loads(line)["id"] for line in file)
+        return ids
+
+    def _ids_path(self, name):
+        return os.path.join(self.directory, _SEGMENT.sub(r"segment-\1.ids", name))
+
+    def _write_segment(self, path, records):
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        self._write_file(path, gzip.compress(lines.encode("utf-8")))
+
+    def _write_file(self, path, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+            if self.durable:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, path)
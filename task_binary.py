@@ -0,0 +1,244 @@
+import argparse
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date
+from date_codec import format_date, parse_date
+from task_storage import JsonStorage
+
+# Compact binary snapshot of the task list, for fast startup with big files.
+#
+# Layout (little endian), columns rather than rows so each one is read with
+# a single copy instead of being parsed record by record:
+#
+#   header    magic "TTBS", version, flags, count, names size, ids size, crc32
+#   due       count x int32    date.toordinal() of each due date
+#   done      count x uint8
+#   name len  count x uint32   length of each name, in characters
+#   id len    count x uint32
+#   names     all names, concatenated, UTF-8
+#   ids       all IDs, concatenated, UTF-8
+#
+# When flags has FLAG_EXTRAS set, a sparse section for the few records with
+# fields beyond those four (recurring tasks) follows:
+#
+#   n         uint32           number of such records
+#   positions n x uint32       their positions
+#   lengths   n x uint32       byte length of each one's extra fields
+#   extras    the extra fields of each, as JSON objects, UTF-8
+#
+# crc32 covers everything after the header. JSON stays the format for
+# import/export; see json_to_binary / binary_to_json and main() below.
+
+MAGIC = b"TTBS"
+VERSION = 1
+FLAG_EXTRAS = 1
+BASE_FIELDS = frozenset(["name", "due", "done", "id"])
+_HEADER = struct.Struct("<4sHHIQQI")
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def _column(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _column_bytes(values):
+    if _BIG_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _split(text, lengths):
+    strings = []
+    pos = 0
+    for length in lengths:
+        strings.append(text[pos:pos + length])
+        pos += length
+    return strings
+
+
+def encode_records(records):
+    # The whole file as a list of byte chunks, header first. "due" may be a
+    # date or ISO text.
+    dues = array("i")
+    done = bytearray()
+    name_lens = array("I")
+    id_lens = array("I")
+    names = []
+    ids = []
+    extra_pos = array("I")
+    extra_lens = array("I")
+    extras = []
+    for pos, record in enumerate(records):
+        due = record["due"]
+        dues.append((due if isinstance(due, date) else parse_date(due)).toordinal())
+        done.append(1 if record["done"] else 0)
+        names.append(record["name"])
+        name_lens.append(len(record["name"]))
+        task_id = record.get("id") or ""
+        ids.append(task_id)
+        id_lens.append(len(task_id))
+        if len(record) > 4 or not BASE_FIELDS.issuperset(record):
+            extra = json.dumps({key: value for key, value in record.items()
+                                if key not in BASE_FIELDS}).encode("utf-8")
+            extra_pos.append(pos)
+            extra_lens.append(len(extra))
+            extras.append(extra)
+
+    name_data = "".join(names).encode("utf-8")
+    id_data = "".join(ids).encode("utf-8")
+    body = [_column_bytes(dues), bytes(done), _column_bytes(name_lens), _column_bytes(id_lens),
+            name_data, id_data]
+    flags = 0
+    if extras:
+        flags |= FLAG_EXTRAS
+        body += [_column_bytes(array("I", [len(extras)])), _column_bytes(extra_pos),
+                 _column_bytes(extra_lens), b"".join(extras)]
+    crc = 0
+    for part in body:
+        crc = zlib.crc32(part, crc)
+    header = _HEADER.pack(MAGIC, VERSION, flags, len(dues), len(name_data), len(id_data), crc)
+    return [header] + body
+
+
+def decode_columns(data):
+    # data is anything that slices to bytes (bytes, mmap). Returns lists of
+    # names, due dates (date objects), done flags and IDs, plus a dict of
+    # position -> extra fields for the records that have any.
+    if len(data) < _HEADER.size:
+        raise ValueError("not a binary task snapshot: file too short")
+    magic, version, flags, count, names_size, ids_size, crc = _HEADER.unpack(data[:_HEADER.size])
+    if magic != MAGIC:
+        raise ValueError("not a binary task snapshot: bad magic")
+    if version != VERSION:
+        raise ValueError(f"unsupported binary task snapshot version {version}")
+
+    pos = _HEADER.size
+    sizes = [4 * count, count, 4 * count, 4 * count, names_size, ids_size]
+    extras_size = len(data) - pos - sum(sizes)
+    if extras_size < 0 or (extras_size and not flags & FLAG_EXTRAS):
+        raise ValueError("binary task snapshot is truncated")
+    if zlib.crc32(data[pos:]) != crc:
+        raise ValueError("binary task snapshot checksum mismatch")
+    parts = []
+    for size in sizes:
+        parts.append(data[pos:pos + size])
+        pos += size
+
+    ordinals = _column("i", parts[0])
+    # Few distinct dates, many tasks: one date object per distinct day
+    dates = {ordinal: date.fromordinal(ordinal) for ordinal in set(ordinals)}
+    dues = [dates[ordinal] for ordinal in ordinals]
+    done = [flag == 1 for flag in parts[1]]
+    names = _split(parts[4].decode("utf-8"), _column("I", parts[2]))
+    id_lens = _column("I", parts[3])
+    ids = _split(parts[5].decode("utf-8"), id_lens)
+    if 0 in id_lens:
+        # Written from records without IDs
+        ids = [task_id or f"legacy-{pos}" for pos, task_id in enumerate(ids)]
+    extras = {}
+    if flags & FLAG_EXTRAS:
+        extras = _decode_extras(data[pos:], count)
+    return names, dues, done, ids, extras
+
+
+def _decode_extras(data, count):
+    if len(data) < 4:
+        raise ValueError("binary task snapshot is truncated")
+    size = _column("I", data[:4])[0]
+    pos = 4 + 8 * size
+    if pos > len(data):
+        raise ValueError("binary task snapshot is truncated")
+    positions = _column("I", data[4:4 + 4 * size])
+    lengths = _column("I", data[4 + 4 * size:pos])
+    if pos + sum(lengths) != len(data) or any(idx >= count for idx in positions):
+        raise ValueError("binary task snapshot is truncated")
+    extras = {}
+    for idx, length in zip(positions, lengths):
+        extras[idx] = json.loads(data[pos:pos + length].decode("utf-8"))
+        pos += length
+    return extras
+
+
+def decode_records(data):
+    # Records look exactly like the ones JsonStorage returns
+    names, dues, done, ids, extras = decode_columns(data)
+    texts = {due: format_date(due) for due in set(dues)}
+    records = [{"name": name, "due": texts[due], "done": flag, "id": task_id}
+               for name, due, flag, task_id in zip(names, dues, done, ids)]
+    for pos, extra in extras.items():
+        records[pos].update(extra)
+    return records
+
+
+class BinaryStorage(JsonStorage):
+    # Same behaviour as JsonStorage (every write replaces the whole file,
+    # atomically), but in the binary format above, read through mmap.
+
+    def load(self):
+        return self._read(decode_records, [])
+
+    def load_columns(self):
+        # Skips building a dict per task; TaskManager.load_tasks() uses this
+        # when the storage has it
+        return self._read(decode_columns, ([], [], [], [], {}))
+
+    def _read(self, decode, empty):
+        self._version = self.version()
+        try:
+            file = open(self.filename, "rb")
+        except FileNotFoundError:
+            return empty
+        with file:
+            if not file.seek(0, 2):
+                return empty
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return decode(data)
+
+    def iter_load(self):
+        return iter(self.load())
+
+    def write(self, records):
+        self._write_atomic(self.filename, encode_records(records))
+        self._version = self.version()
+
+
+def json_to_binary(json_filename, binary_filename):
+    records = JsonStorage(json_filename).load()
+    BinaryStorage(binary_filename).write(records)
+    return len(records)
+
+
+def binary_to_json(binary_filename, json_filename):
+    records = BinaryStorage(binary_filename).load()
+    JsonStorage(json_filename).write(records)
+    return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert task files between JSON and binary")
+    parser.add_argument("direction", choices=["to-binary", "to-json"])
+    parser.add_argument("source")
+    parser.add_argument("target")
+    args = parser.parse_args(argv)
+
+    convert = json_to_binary if args.direction == "to-binary" else binary_to_json
+    try:
+        count = convert(args.source, args.target)
+    except (OSError, ValueError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    print(f"Converted {count} tasks to {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
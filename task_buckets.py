@@ -0,0 +1,86 @@
+from collections import namedtuple
+from datetime import date
+from date_codec import format_date
+
+# Everything about a task that depends on today's date, worked out once per
+# task per day instead of on every render. status is the short text the GUI
+# shows ("Completed", "Overdue!", "3 days").
+TaskInfo = namedtuple("TaskInfo", ["days_left", "bucket", "due_text", "status"])
+
+OVERDUE = "overdue"
+DUE_TODAY = "today"
+UPCOMING = "upcoming"
+COMPLETED = "completed"
+BUCKETS = (OVERDUE, DUE_TODAY, UPCOMING, COMPLETED)
+
+
+class TaskBuckets:
+    # TaskInfo for each task, with the tasks grouped by bucket. TaskManager
+    # calls update()/remove() when a task changes, so only that task is
+    # recomputed; everything is recomputed once when the date rolls over.
+
+    def __init__(self, tasks, today=None):
+        self._rebuild(list(tasks), today or date.today())
+
+    def roll_over(self, today=None):
+        # Cheap check, meant to be called once per render. True if the day
+        # changed and every task was recomputed.
+        today = today or date.today()
+        if today == self.today:
+            return False
+        self._rebuild([task for members in self._members.values() for task in members.values()], today)
+        return True
+
+    def info(self, task):
+        info = self._info.get(task.id)
+        if info is None:
+            info = self.update(task)
+        return info
+
+    def count(self, bucket):
+        return len(self._members[bucket])
+
+    def counts(self):
+        return {bucket: len(members) for bucket, members in self._members.items()}
+
+    def tasks(self, bucket):
+        # Tasks in the bucket by due date; sorted on first use after a change
+        ordered = self._ordered.get(bucket)
+        if ordered is None:
+            ordered = sorted(self._members[bucket].values(), key=lambda task: task.due)
+            self._ordered[bucket] = ordered
+        return ordered
+
+    def update(self, task):
+        days_left = task.due.toordinal() - self._today_ordinal
+        if task.done:
+            bucket, status = COMPLETED, "Completed"
+        elif days_left < 0:
+            bucket, status = OVERDUE, "Overdue!"
+        else:
+            bucket, status = (DUE_TODAY if days_left == 0 else UPCOMING), f"{days_left} days"
+        info = TaskInfo(days_left, bucket, format_date(task.due), status)
+
+        old = self._info.get(task.id)
+        if old is not None and old.bucket != bucket:
+            del self._members[old.bucket][task.id]
+            self._ordered.pop(old.bucket, None)
+        self._members[bucket][task.id] = task
+        self._ordered.pop(bucket, None)
+        self._info[task.id] = info
+        return info
+
+    def remove(self, task_id):
+        old = self._info.pop(task_id, None)
+        if old is not None:
+            del self._members[old.bucket][task_id]
+            self._ordered.pop(old.bucket, None)
+
+    def _rebuild(self, tasks, today):
+        self.today = today
+        self._today_ordinal = today.toordinal()
+        self._info = {}
+        self._members = {bucket: {} for bucket in BUCKETS}
+        self._ordered = {}
+        for task in tasks:
+            self.update(task)
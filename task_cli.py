@@ -0,0 +1,264 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from datetime import date, timedelta
+from date_codec import format_date, is_valid_date
+from task_import import FORMATS, import_rows, read_rows
+from task_storage import JsonStorage, JournalStorage, SharedStorage, iter_json_chunks
+from task_tracker_oop import TaskManager
+
+# Non-interactive command line for scripts and cron jobs:
+#
+#   python task_cli.py add "Pay rent" 2025-06-01 --repeat monthly
+#   producer | python task_cli.py import --format csv
+#   python task_cli.py import backlog.ndjson --workers 8
+#   python task_cli.py list --overdue --limit 20
+#   python task_cli.py agenda --days 14        (recurring tasks once per occurrence)
+#   python task_cli.py export --format ndjson > backup.ndjson
+#   python task_cli.py complete ID [ID ...]     ("-" reads IDs from stdin)
+#   python task_cli.py remove ID [ID ...]
+#   python task_cli.py archive --older-than 90    (moves old completed tasks out)
+#   python task_cli.py archived --search report
+#
+# Input is read and output written one line at a time. Everything one
+# command changes is saved in a single batch, i.e. one write.
+#
+# Exit status: 0 on success, 1 if some input rows or IDs were rejected (the
+# rest is still applied), 2 for usage errors.
+
+# repeat and completed hold the same JSON as in the other formats, so the
+# rule keeps its start (e.g. the 31st of a monthly series) and occurrences
+# completed ahead survive a round trip
+CSV_FIELDS = ["name", "due", "done", "id", "repeat", "completed"]
+
+
+def open_manager(args):
+    storage = args.storage
+    if storage is None:
+        # Follow what is on disk: a file the GUI or the server journals to
+        # keeps its journal, anything else is plain JSON
+        storage = "journal" if os.path.exists(args.file + ".journal") else "json"
+    if storage == "binary":
+        # Imported here so the JSON commands do not pay for it
+        from task_binary import BinaryStorage
+        backend = BinaryStorage(args.file)
+    elif storage == "journal":
+        backend = JournalStorage(args.file)
+    else:
+        backend = JsonStorage(args.file)
+    # Same file may be used by the GUI, the server or the menu at the same
+    # time; SharedStorage merges with their changes
+    return TaskManager(args.file, storage=SharedStorage(backend))
+
+
+def task_record(task):
+    record = {"name": task.name, "due": format_date(task.due), "done": task.done, "id": task.id}
+    if task.repeat is not None:
+        record.update(task.to_dict())
+    return record
+
+
+def write_tasks(tasks, fmt, out):
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(CSV_FIELDS)
+        for task in tasks:
+            record = task_record(task)
+            writer.writerow([task.name, record["due"], "true" if task.done else "false", task.id,
+                             json.dumps(record["repeat"]) if "repeat" in record else "",
+                             json.dumps(record["completed"]) if "completed" in record else ""])
+    elif fmt == "json":
+        for chunk in iter_json_chunks(task_record(task) for task in tasks):
+            out.write(chunk)
+        out.write("\n")
+    else:
+        for task in tasks:
+            out.write(json.dumps(task_record(task)) + "\n")
+
+
+def cmd_add(args, manager, out):
+    if not is_valid_date(args.due):
+        print(f"Error: invalid due date {args.due!r}, use YYYY-MM-DD", file=sys.stderr)
+        return 1
+    try:
+        task = manager.add_task(args.name, args.due, repeat=args.repeat)
+    except ValueError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    out.write(task.id + "\n")
+    return 0
+
+
+def cmd_import(args, manager, out):
+    # Rows are validated in worker processes, see task_import
+    stream = sys.stdin if args.input == "-" else open(args.input, newline="")
+
+    def report(where, message):
+        print(f"{where}: {message}", file=sys.stderr)
+
+    try:
+        result = import_rows(manager, read_rows(stream, args.format), workers=args.workers,
+                             on_error=report, dedupe=not args.allow_duplicates)
+    except ValueError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    print(f"Imported {len(result.added)} tasks, skipped {result.duplicates} duplicates, "
+          f"rejected {len(result.errors)}", file=sys.stderr)
+    return 1 if result.errors else 0
+
+
+def cmd_export(args, manager, out):
+    # Streams from the file when the storage can, without building indexes
+    write_tasks(manager.iter_load_tasks(), args.format, out)
+    return 0
+
+
+def write_rows(tasks, out):
+    for task in tasks:
+        out.write(f"{task.id}\t{format_date(task.due)}\t{'done' if task.done else 'open'}\t{task.name}\n")
+
+
+def cmd_list(args, manager, out):
+    done = None
+    if args.open or args.overdue:
+        done = False
+    elif args.done:
+        done = True
+    page = manager.query(done=done, due_before=date.today() if args.overdue else None,
+                         name_contains=args.search, limit=args.limit)
+    write_rows(page.tasks, out)
+    if page.has_more:
+        print(f"(more than {args.limit} tasks match)", file=sys.stderr)
+    return 0
+
+
+def cmd_agenda(args, manager, out):
+    start = date.today()
+    for entry in manager.agenda(start, start + timedelta(days=args.days)):
+        task = entry.task
+        out.write(f"{task.id}\t{format_date(entry.due)}\t{'done' if entry.done else 'open'}\t{task.name}\n")
+    return 0
+
+
+def cmd_archive(args, manager, out):
+    moved = manager.archive_completed(args.older_than)
+    print(f"Archived {len(moved)} tasks", file=sys.stderr)
+    return 0
+
+
+def cmd_archived(args, manager, out):
+    # Streams from the archive segments; nothing is kept in memory
+    tasks = manager.iter_archived(args.after, args.before, args.search)
+    if args.limit is not None:
+        tasks = itertools.islice(tasks, args.limit)
+    write_rows(tasks, out)
+    return 0
+
+
+def read_ids(ids):
+    for task_id in ids:
+        if task_id == "-":
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        else:
+            yield task_id
+
+
+def cmd_complete(args, manager, out):
+    ids = list(read_ids(args.ids))
+    count = manager.complete_tasks(ids)
+    print(f"Completed {count} of {len(ids)} tasks", file=sys.stderr)
+    return 0 if count == len(ids) else 1
+
+
+def cmd_remove(args, manager, out):
+    ids = list(read_ids(args.ids))
+    removed = manager.remove_tasks(ids)
+    print(f"Removed {len(removed)} of {len(ids)} tasks", file=sys.stderr)
+    return 0 if len(removed) == len(ids) else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Task Tracker command line")
+    parser.add_argument("--file", default="tasks.txt", help="task file (default: tasks.txt)")
+    parser.add_argument("--storage", choices=["json", "journal", "binary"],
+                        help="file format (default: journal if FILE.journal exists, else json)")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    add = commands.add_parser("add", help="add one task, prints its ID")
+    add.add_argument("name")
+    add.add_argument("due", help="YYYY-MM-DD")
+    add.add_argument("--repeat", help='e.g. "daily", "weekly", "monthly", "every 3 days", '
+                                      '"weekly until 2025-12-31"')
+    add.set_defaults(run=cmd_add)
+
+    bulk = commands.add_parser("import", help="add tasks from NDJSON, CSV or a JSON array")
+    bulk.add_argument("input", nargs="?", default="-", help="file to read (default: stdin)")
+    bulk.add_argument("--format", choices=FORMATS, default="ndjson")
+    bulk.add_argument("--workers", type=int, help="validation processes (default: one per CPU)")
+    bulk.add_argument("--allow-duplicates", action="store_true",
+                      help="also add rows whose name and due date match an existing task")
+    bulk.set_defaults(run=cmd_import)
+
+    export = commands.add_parser("export", help="write all tasks to stdout")
+    export.add_argument("--format", choices=["ndjson", "csv", "json"], default="ndjson")
+    export.set_defaults(run=cmd_export)
+
+    show = commands.add_parser("list", help="list tasks by due date, tab separated")
+    which = show.add_mutually_exclusive_group()
+    which.add_argument("--overdue", action="store_true", help="open tasks due before today")
+    which.add_argument("--open", action="store_true")
+    which.add_argument("--done", action="store_true")
+    show.add_argument("--search", help="only names containing this text")
+    show.add_argument("--limit", type=int)
+    show.set_defaults(run=cmd_list)
+
+    agenda = commands.add_parser("agenda", help="what is due in the coming days, one line per occurrence")
+    agenda.add_argument("--days", type=int, default=7, help="how many days, from today (default: 7)")
+    agenda.set_defaults(run=cmd_agenda)
+
+    archive = commands.add_parser("archive", help="move old completed tasks to the archive")
+    archive.add_argument("--older-than", type=int, default=30, metavar="DAYS",
+                         help="completed tasks due more than DAYS ago (default: 30)")
+    archive.set_defaults(run=cmd_archive)
+
+    archived = commands.add_parser("archived", help="list archived tasks, tab separated")
+    archived.add_argument("--search", help="only names with words starting with these")
+    archived.add_argument("--after", metavar="YYYY-MM-DD", help="due after this date")
+    archived.add_argument("--before", metavar="YYYY-MM-DD", help="due before this date")
+    archived.add_argument("--limit", type=int)
+    archived.set_defaults(run=cmd_archived)
+
+    for name, run in (("complete", cmd_complete), ("remove", cmd_remove)):
+        command = commands.add_parser(name, help=f"{name} tasks by ID")
+        command.add_argument("ids", nargs="+", metavar="ID", help='task ID, or "-" for IDs on stdin')
+        command.set_defaults(run=run)
+    return parser
+
+
+def main(argv=None, out=None):
+    args = build_parser().parse_args(argv)
+    out = out if out is not None else sys.stdout
+    manager = open_manager(args)
+    try:
+        return args.run(args, manager, out)
+    except BrokenPipeError:
+        # Reader went away (e.g. "| head"); not an error for us
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import csv
+import itertools
+import json
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from date_codec import format_date, parse_date
+from task_recurrence import Recurrence
+from task_storage import iter_json_array
+
+# Bulk import of external task files (NDJSON, CSV or a JSON array):
+#
+#   result = import_file(manager, "backlog.csv", "csv")
+#   result.added, result.duplicates, result.errors
+#
+# Rows are read in the calling process and handed out in chunks to a pool
+# of worker processes, which parse and validate them (JSON decoding, date
+# checks, done flags, repeat rules). Bad rows are reported, not fatal.
+# Rows whose (name, due) is already in the manager, or earlier in the same
+# input, are skipped. Everything accepted is added in one batch, i.e. one
+# write. Small inputs (a single chunk) are validated in-process, since
+# starting the pool would cost more than it saves.
+
+TRUE_WORDS = {"1", "true", "yes", "y", "x", "done"}
+FALSE_WORDS = {"", "0", "false", "no", "n"}
+FORMATS = ("ndjson", "csv", "json")
+
+# errors: list of (where, message), where is e.g. "line 12"
+ImportResult = namedtuple("ImportResult", ["added", "duplicates", "errors"])
+
+
+def parse_done(value):
+    if isinstance(value, bool):
+        return value
+    word = str(value).strip().lower()
+    if word in TRUE_WORDS:
+        return True
+    if word in FALSE_WORDS:
+        return False
+    raise ValueError(f"invalid done value {value!r}")
+
+
+def clean_record(record):
+    # A validated task record with due in ISO form; raises ValueError
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+    name = record.get("name")
+    due = record.get("due")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("missing name")
+    try:
+        # Same rule as Task.is_valid_date_format
+        due_date = parse_date(due) if isinstance(due, str) else None
+    except ValueError:
+        due_date = None
+    if due_date is None:
+        raise ValueError(f"invalid due date {due!r}, use YYYY-MM-DD")
+    clean = {"name": name, "due": format_date(due_date), "done": parse_done(record.get("done") or False),
+             "id": record.get("id") or None}
+    repeat = record.get("repeat") or None
+    completed = record.get("completed") or None
+    if isinstance(repeat, str) and repeat.lstrip().startswith("{"):
+        # A CSV cell as written by export: the JSON of the other formats
+        repeat = json.loads(repeat)
+        if isinstance(completed, str):
+            completed = json.loads(completed)
+    if isinstance(repeat, dict):
+        # As written by export: the full rule and completed occurrences
+        Recurrence.from_dict(repeat)
+        clean["repeat"] = repeat
+        if completed:
+            clean["completed"] = [format_date(parse_date(day)) for day in completed]
+    elif repeat is not None:
+        clean["repeat"] = str(Recurrence.parse(str(repeat), start=due_date))
+    return clean
+
+
+def validate_rows(rows):
+    # Runs in the worker processes. rows: (where, record) pairs, where
+    # record is a dict or a raw NDJSON line. Returns (valid records,
+    # errors), both in input order.
+    valid = []
+    errors = []
+    for where, record in rows:
+        try:
+            if isinstance(record, str):
+                try:
+                    record = json.loads(record)
+                except json.JSONDecodeError as error:
+                    raise ValueError(f"invalid JSON: {error.msg}")
+            valid.append(clean_record(record))
+        except (ValueError, KeyError, TypeError) as error:
+            errors.append((where, str(error)))
+    return valid, errors
+
+
+def read_rows(stream, fmt):
+    # Yields (where, record) for each input row; NDJSON lines are passed on
+    # undecoded so the workers do the parsing
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        missing = {"name", "due"} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"CSV header lacks: {', '.join(sorted(missing))}")
+        for row in reader:
+            yield f"line {reader.line_num}", row
+    elif fmt == "json":
+        for pos, record in enumerate(iter_json_array(stream), 1):
+            yield f"record {pos}", record
+    else:
+        for line_num, line in enumerate(stream, 1):
+            if line.strip():
+                yield f"line {line_num}", line
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validated_chunks(rows, workers=None, chunk_size=5000):
+    # (valid, errors) per chunk, in input order. At most two chunks per
+    # worker are in flight, so memory stays bounded for any input size.
+    chunks = _chunks(rows, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    workers = workers or os.cpu_count() or 1
+    if second is None or workers <= 1:
+        yield validate_rows(first)
+        if second is not None:
+            for chunk in itertools.chain([second], chunks):
+                yield validate_rows(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in itertools.chain([first, second], chunks):
+            pending.append(pool.submit(validate_rows, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def import_rows(manager, rows, workers=None, chunk_size=5000, on_error=None, dedupe=True):
+    # on_error(where, message) is called as bad rows come in, in order.
+    # Imported here: the workers only need the validation code above.
+    from task_tracker_oop import Task
+    seen = {(task.name, format_date(task.due)) for task in manager.tasks} if dedupe else None
+    errors = []
+    duplicates = 0
+
+    def tasks():
+        nonlocal duplicates
+        for valid, bad in validated_chunks(rows, workers, chunk_size):
+            for where, message in bad:
+                errors.append((where, message))
+                if on_error is not None:
+                    on_error(where, message)
+            for record in valid:
+                if seen is not None:
+                    key = (record["name"], record["due"])
+                    if key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                if isinstance(record.get("repeat"), dict):
+                    yield Task.from_dict(record)
+                else:
+                    yield Task(record["name"], record["due"], record["done"], record["id"],
+                               repeat=record.get("repeat"))
+
+    added = manager.add_tasks(tasks())
+    return ImportResult(added, duplicates, errors)
+
+
+def import_file(manager, path, fmt="ndjson", workers=None, chunk_size=5000, on_error=None, dedupe=True):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    with open(path, newline="" if fmt == "csv" else None, encoding="utf-8") as stream:
+        return import_rows(manager, read_rows(stream, fmt), workers, chunk_size, on_error, dedupe)
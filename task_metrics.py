@@ -0,0 +1,176 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+# Timings and counters for the hot paths (load, save, sort, mutations, GUI
+# refresh), off by default. While disabled a timed call costs one attribute
+# check, so the decorators can stay on the methods for good.
+#
+#   from task_metrics import metrics
+#   metrics.enable("metrics.jsonl")     # or TASK_TRACKER_METRICS=metrics.jsonl
+#   ...
+#   metrics.export()                    # appends one JSON line with the totals
+#
+# With TASK_TRACKER_METRICS set, the totals are also exported when the
+# process exits, so the CLI, the server and the menu all leave a line.
+#
+# start_profile() / stop_profile(path) wrap cProfile for a closer look; the
+# result opens with "python -m pstats path".
+
+_perf_counter = time.perf_counter
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = _perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, _perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self._timings = {}  # name -> [count, total, max, last] in seconds
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._export_at_exit = False
+
+    def enable(self, path=None):
+        # path: JSON lines file export() appends to
+        self.enabled = True
+        if path is not None:
+            self.path = path
+
+    def export_at_exit(self):
+        # One export() when the interpreter exits, however often this is called
+        if not self._export_at_exit:
+            self._export_at_exit = True
+            atexit.register(self.export)
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._timings = {}
+            self._counters = {}
+
+    def timed(self, name):
+        # Decorator timing every call of the function under name
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = _perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, _perf_counter() - started)
+            return wrapper
+        return decorate
+
+    def timer(self, name):
+        # "with metrics.timer(name):" for a block inside a function
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def record(self, name, seconds):
+        with self._lock:
+            stat = self._timings.get(name)
+            if stat is None:
+                self._timings[name] = [1, seconds, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                if seconds > stat[2]:
+                    stat[2] = seconds
+                stat[3] = seconds
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self._counters[name] = self._counters.get(name, 0) + amount
+
+    def last_ms(self, name):
+        stat = self._timings.get(name)
+        return None if stat is None else stat[3] * 1000
+
+    def snapshot(self):
+        with self._lock:
+            timings = {name: {"count": count, "total_ms": round(total * 1000, 3),
+                              "mean_ms": round(total * 1000 / count, 3), "max_ms": round(high * 1000, 3),
+                              "last_ms": round(last * 1000, 3)}
+                       for name, (count, total, high, last) in sorted(self._timings.items())}
+            counters = dict(sorted(self._counters.items()))
+        return {"time": round(time.time(), 3), "pid": os.getpid(), "timings": timings,
+                "counters": counters}
+
+    def export(self, path=None):
+        # Appends the current totals as one JSON line; returns them
+        path = path or self.path
+        data = self.snapshot()
+        if path is not None:
+            with open(path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(data) + "\n")
+        return data
+
+    def summary(self, names):
+        # Short "label 1.2 ms" text of the last timing of each name, for a
+        # status bar
+        parts = []
+        for label, name in names:
+            value = self.last_ms(name)
+            if value is not None:
+                parts.append(f"{label} {value:.1f} ms")
+        return " · ".join(parts)
+
+    @property
+    def profiling(self):
+        return self._profiler is not None
+
+    def start_profile(self):
+        if self._profiler is None:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop_profile(self, path):
+        # Writes the profile to path (pstats format) and returns path
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return None
+        profiler.disable()
+        profiler.dump_stats(path)
+        return path
+
+
+# The one instance everything records into
+metrics = Metrics()
+if os.environ.get("TASK_TRACKER_METRICS"):
+    metrics.enable(os.environ["TASK_TRACKER_METRICS"])
+    metrics.export_at_exit()
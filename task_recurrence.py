@@ -0,0 +1,119 @@
+import calendar
+import re
+from datetime import date, timedelta
+from date_codec import format_date, parse_date
+
+# Recurrence rules for repeating tasks. A rule only describes the series
+# (unit, interval, first date, optional last date); occurrences are worked
+# out when asked for, so an endless series costs nothing to store.
+
+UNITS = ("day", "week", "month")
+ALIASES = {"daily": (1, "day"), "weekly": (1, "week"), "monthly": (1, "month"), "yearly": (12, "month")}
+_EVERY = re.compile(r"every\s+(\d+)\s+(day|week|month)s?$")
+
+
+def add_months(day, months, anchor_day=None):
+    # Same day of the month, clamped to the month's length (Jan 31 + 1 month
+    # is Feb 28/29). anchor_day keeps a series on the 31st from drifting.
+    year, month = divmod(day.month - 1 + months, 12)
+    year += day.year
+    month += 1
+    last = calendar.monthrange(year, month)[1]
+    return date(year, month, min(anchor_day or day.day, last))
+
+
+class Recurrence:
+    __slots__ = ("unit", "every", "start", "until")
+
+    def __init__(self, unit, every=1, start=None, until=None):
+        if unit not in UNITS:
+            raise ValueError(f"Unknown repeat unit: {unit}")
+        if int(every) < 1:
+            raise ValueError("Repeat interval must be at least 1")
+        self.unit = unit
+        self.every = int(every)
+        self.start = start
+        self.until = until
+
+    @classmethod
+    def parse(cls, text, start=None):
+        # "daily", "weekly", "monthly", "yearly" or "every N days/weeks/months",
+        # optionally followed by "until YYYY-MM-DD"
+        text = text.strip().lower()
+        until = None
+        if " until " in text:
+            text, until_text = text.split(" until ", 1)
+            until = parse_date(until_text.strip())
+        text = text.strip()
+        if text in ALIASES:
+            every, unit = ALIASES[text]
+        else:
+            match = _EVERY.match(text)
+            if match is None:
+                raise ValueError(f"Invalid repeat rule: {text!r}")
+            every, unit = int(match.group(1)), match.group(2)
+        return cls(unit, every, start, until)
+
+    @classmethod
+    def from_dict(cls, data):
+        until = data.get("until")
+        return cls(data["unit"], data.get("every", 1), parse_date(data["start"]),
+                   parse_date(until) if until else None)
+
+    def to_dict(self):
+        data = {"unit": self.unit, "every": self.every, "start": format_date(self.start)}
+        if self.until is not None:
+            data["until"] = format_date(self.until)
+        return data
+
+    def __str__(self):
+        if self.every == 1:
+            text = {"day": "daily", "week": "weekly", "month": "monthly"}[self.unit]
+        elif self.unit == "month" and self.every == 12:
+            text = "yearly"
+        else:
+            text = f"every {self.every} {self.unit}s"
+        return text if self.until is None else f"{text} until {format_date(self.until)}"
+
+    def __eq__(self, other):
+        return isinstance(other, Recurrence) and self.to_dict() == other.to_dict()
+
+    def nth(self, index):
+        # Date of occurrence number `index`, counting from 0 at start
+        if self.unit == "month":
+            return add_months(self.start, index * self.every, self.start.day)
+        step = self.every * (7 if self.unit == "week" else 1)
+        return self.start + timedelta(days=index * step)
+
+    def first_index(self, day):
+        # Index of the first occurrence on or after day, found by arithmetic
+        # rather than by walking the series
+        if day <= self.start:
+            return 0
+        if self.unit == "month":
+            months = (day.year - self.start.year) * 12 + day.month - self.start.month
+            index = -(-months // self.every)
+            if self.nth(index) < day:
+                index += 1
+            return index
+        step = self.every * (7 if self.unit == "week" else 1)
+        return -(-(day - self.start).days // step)
+
+    def occurrences(self, start=None, end=None):
+        # Occurrence dates in [start, end), lazily; end=None runs until the
+        # rule's own end, or forever
+        index = self.first_index(start) if start is not None else 0
+        while True:
+            day = self.nth(index)
+            if (end is not None and day >= end) or (self.until is not None and day > self.until):
+                return
+            yield day
+            index += 1
+
+    def is_occurrence(self, day):
+        index = self.first_index(day)
+        return self.nth(index) == day and (self.until is None or day <= self.until)
+
+    def next_after(self, day):
+        # First occurrence after day, or None if the series ends before that
+        return next(self.occurrences(day + timedelta(days=1)), None)
@@ -0,0 +1,72 @@
+import re
+from bisect import bisect_left, insort
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+
+class SearchIndex:
+    # Inverted index over task names: token -> IDs of the tasks containing
+    # it. The distinct tokens are also kept sorted, so every query word can
+    # match as a prefix ("rep" finds "report") with a bisect instead of a
+    # scan over all names. Updated one task at a time.
+
+    # Below this many candidates, prefixes are checked against each
+    # candidate's own tokens instead of merging posting sets
+    verify_limit = 256
+
+    def __init__(self):
+        self._postings = {}
+        self._tokens = []
+        self._doc_tokens = {}
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    def add(self, task_id, text):
+        if task_id in self._doc_tokens:
+            self.remove(task_id)
+        tokens = frozenset(tokenize(text))
+        self._doc_tokens[task_id] = tokens
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                self._postings[token] = ids = set()
+                insort(self._tokens, token)
+            ids.add(task_id)
+
+    def remove(self, task_id):
+        for token in self._doc_tokens.pop(task_id, ()):
+            ids = self._postings[token]
+            ids.discard(task_id)
+            if not ids:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+
+    def search(self, text):
+        # IDs of the tasks that have a word starting with each query word
+        terms = sorted(set(tokenize(text)), key=len, reverse=True)
+        if not terms:
+            return set()
+        candidates = None
+        for term in terms:
+            if candidates is not None and len(candidates) <= self.verify_limit:
+                candidates = {task_id for task_id in candidates
+                              if any(token.startswith(term) for token in self._doc_tokens[task_id])}
+            else:
+                matches = self._prefix_matches(term)
+                candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                break
+        return candidates
+
+    def _prefix_matches(self, term):
+        # Tokens sharing the prefix are contiguous in sorted order; the last
+        # one sorts before term + U+10FFFF
+        tokens = self._tokens
+        start = bisect_left(tokens, term)
+        end = bisect_left(tokens, term + "\U0010ffff", start)
+        return set().union(*(self._postings[token] for token in tokens[start:end]))
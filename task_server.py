@@ -0,0 +1,389 @@
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+from datetime import date
+from urllib.parse import parse_qs, urlsplit
+from date_codec import format_date
+from task_storage import JournalStorage, SharedStorage, WriteBehindStorage
+from task_tracker_oop import TaskManager
+
+# Local HTTP/JSON service over one TaskManager, so several dashboards can
+# share a single in-memory task set. Standard library only:
+#
+#   python task_server.py --file tasks.txt --port 8765
+#
+#   GET    /tasks?done=&due_before=&due_after=&q=&order=&offset=&limit=
+#   GET    /tasks/ID
+#   GET    /search?q=TEXT&limit=N
+#   GET    /agenda?start=YYYY-MM-DD&end=YYYY-MM-DD&limit=N
+#   GET    /summary                      bucket counts
+#   GET    /archive?q=&due_after=&due_before=&limit=   archived tasks
+#   POST   /tasks                        {"name": ..., "due": ..., "repeat": ...}
+#   PATCH  /tasks/ID                     {"name": ..., "due": ..., "done": ...}
+#   POST   /tasks/ID/complete            {"day": ...} optional, for recurring tasks
+#   DELETE /tasks/ID
+#
+# Connections are kept alive (HTTP/1.1). Every parsed request goes through one
+# bounded queue; when it is full the server answers 503 straight away rather
+# than piling up work. A single dispatcher takes requests off the queue in
+# order, so the manager is only ever used from one place: reads are answered
+# from memory, and all writes waiting in the queue are applied together in
+# one manager.batch(), i.e. one write to disk, which the write-behind storage
+# then does off the event loop.
+
+MAX_HEADER = 16 * 1024
+MAX_BODY = 1024 * 1024
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "body", "future")
+
+    def __init__(self, method, path, query, body, future):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = body
+        self.future = future
+
+    @property
+    def is_write(self):
+        return self.method != "GET"
+
+    def param(self, name, default=None):
+        values = self.query.get(name)
+        return values[0] if values else default
+
+    def int_param(self, name):
+        value = self.param(name)
+        try:
+            return None if value is None else int(value)
+        except ValueError:
+            raise HttpError(400, f"{name} must be a number")
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            raise HttpError(400, "body is not valid JSON")
+        if not isinstance(data, dict):
+            raise HttpError(400, "body must be a JSON object")
+        return data
+
+
+def task_json(task):
+    return task.to_dict()
+
+
+def parse_bool(value, name):
+    if value is None or isinstance(value, bool):
+        return value
+    if value in ("true", "1"):
+        return True
+    if value in ("false", "0"):
+        return False
+    raise HttpError(400, f"{name} must be true or false")
+
+
+class TaskServer:
+    def __init__(self, manager, host="127.0.0.1", port=8765, max_queue=256, max_batch=512,
+                 idle_timeout=30.0, reload_interval=1.0):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.idle_timeout = idle_timeout
+        self.reload_interval = reload_interval
+        self.max_queue = max_queue
+        self.requests = None
+        self.server = None
+        self._dispatcher = None
+        # Counters, for the load test and /summary
+        self.stats = {"requests": 0, "rejected": 0, "write_batches": 0}
+
+    async def start(self):
+        self.requests = asyncio.Queue(self.max_queue)
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port,
+                                                 limit=MAX_HEADER)
+        # Port 0 picks a free one; report the real one
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._dispatcher = asyncio.ensure_future(self.dispatch())
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._dispatcher.cancel()
+        try:
+            await self._dispatcher
+        except asyncio.CancelledError:
+            pass
+        self.manager.close()
+
+    # Connections
+
+    async def handle_connection(self, reader, writer):
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 413, {"error": "headers too large"}, False)
+                    return
+                try:
+                    method, target, version, headers = self.parse_head(head)
+                    keep_alive = self.wants_keep_alive(version, headers)
+                    body = await self.read_body(reader, headers)
+                except HttpError as error:
+                    await self.respond(writer, error.status, {"error": str(error)}, False)
+                    return
+                status, payload = await self.submit(method, target, body)
+                await self.respond(writer, status, payload, keep_alive)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def parse_head(head):
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HttpError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, version, headers
+
+    @staticmethod
+    def wants_keep_alive(version, headers):
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    @staticmethod
+    async def read_body(reader, headers):
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "bad Content-Length")
+        if length > MAX_BODY:
+            raise HttpError(413, "body too large")
+        if length <= 0:
+            return b""
+        try:
+            return await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise HttpError(400, "body shorter than Content-Length")
+
+    async def submit(self, method, target, body):
+        self.stats["requests"] += 1
+        url = urlsplit(target)
+        future = asyncio.get_event_loop().create_future()
+        request = Request(method, url.path.rstrip("/") or "/", parse_qs(url.query), body, future)
+        try:
+            self.requests.put_nowait(request)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            return 503, {"error": "server busy, try again"}
+        return await future
+
+    @staticmethod
+    async def respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    # Dispatcher: the only code that touches the manager
+
+    async def dispatch(self):
+        loop = asyncio.get_event_loop()
+        next_reload = loop.time() + self.reload_interval
+        while True:
+            try:
+                first = await asyncio.wait_for(self.requests.get(), self.reload_interval)
+            except asyncio.TimeoutError:
+                first = None
+            if loop.time() >= next_reload:
+                # Other processes (the GUI, the CLI) may share the file
+                try:
+                    self.manager.reload_if_changed()
+                except (OSError, ValueError) as error:
+                    print(f"Reload failed: {error}", file=sys.stderr)
+                next_reload = loop.time() + self.reload_interval
+            if first is None:
+                continue
+            group = [first]
+            while len(group) < self.max_batch and not self.requests.empty():
+                group.append(self.requests.get_nowait())
+            self.run_group(group)
+
+    def run_group(self, group):
+        # Requests are answered in arrival order; the writes among them share
+        # one batch and their replies wait until it has been handed to storage
+        writes = []
+        try:
+            with self.manager.batch():
+                for request in group:
+                    result = self.run(request)
+                    if request.is_write:
+                        writes.append((request, result))
+                    elif not request.future.done():
+                        request.future.set_result(result)
+        except Exception as error:
+            # Storage refused the batch
+            writes = [(request, (500, {"error": str(error)})) for request, result in writes]
+        else:
+            if writes:
+                self.stats["write_batches"] += 1
+        for request, result in writes:
+            # The client may have gone away (cancelled future)
+            if not request.future.done():
+                request.future.set_result(result)
+
+    def run(self, request):
+        try:
+            return self.route(request)
+        except HttpError as error:
+            return error.status, {"error": str(error)}
+        except (ValueError, KeyError, TypeError) as error:
+            return 400, {"error": str(error)}
+        except Exception as error:
+            return 500, {"error": str(error)}
+
+    def route(self, request):
+        parts = request.path.strip("/").split("/")
+        method = request.method
+        if parts == ["tasks"]:
+            if method == "GET":
+                return 200, self.list_tasks(request)
+            if method == "POST":
+                return 201, self.add_task(request.json())
+        elif parts[0] == "tasks" and len(parts) == 2:
+            if method == "GET":
+                return 200, task_json(self.find(parts[1]))
+            if method == "PATCH":
+                return 200, self.update_task(parts[1], request.json())
+            if method == "DELETE":
+                return 200, task_json(self.manager.remove_task_by_id(self.find(parts[1]).id))
+        elif parts[0] == "tasks" and len(parts) == 3 and parts[2] == "complete":
+            if method == "POST":
+                task = self.find(parts[1])
+                if not self.manager.complete_occurrence(task.id, request.json().get("day")):
+                    raise HttpError(400, "not an open occurrence of this task")
+                return 200, task_json(task)
+        elif parts == ["search"] and method == "GET":
+            tasks = self.manager.search(request.param("q", ""), request.int_param("limit"))
+            return 200, {"tasks": [task_json(task) for task in tasks]}
+        elif parts == ["agenda"] and method == "GET":
+            return 200, self.agenda(request)
+        elif parts == ["archive"] and method == "GET":
+            limit = request.int_param("limit")
+            archived = self.manager.iter_archived(request.param("due_after"), request.param("due_before"),
+                                                  request.param("q"))
+            tasks = list(itertools.islice(archived, 100 if limit is None else limit))
+            return 200, {"tasks": [task_json(task) for task in tasks]}
+        elif parts == ["summary"] and method == "GET":
+            buckets = self.manager.buckets()
+            return 200, {"counts": buckets.counts(), "total": self.manager.count(),
+                         "revision": self.manager.revision, "server": dict(self.stats)}
+        else:
+            raise HttpError(404, f"no such resource: {request.path}")
+        raise HttpError(405, f"{method} not allowed on {request.path}")
+
+    def find(self, task_id):
+        task = self.manager.get_task(task_id)
+        if task is None:
+            raise HttpError(404, f"no task with id {task_id}")
+        return task
+
+    def list_tasks(self, request):
+        page = self.manager.query(done=parse_bool(request.param("done"), "done"),
+                                  due_before=request.param("due_before"),
+                                  due_after=request.param("due_after"),
+                                  name_contains=request.param("q"),
+                                  order=request.param("order", "due"),
+                                  offset=request.int_param("offset") or 0,
+                                  limit=request.int_param("limit"))
+        return {"tasks": [task_json(task) for task in page.tasks], "offset": page.offset,
+                "limit": page.limit, "has_more": page.has_more}
+
+    def agenda(self, request):
+        limit = request.int_param("limit")
+        end = request.param("end")
+        if end is None and limit is None:
+            raise HttpError(400, "agenda needs end or limit")
+        entries = []
+        for entry in self.manager.agenda(request.param("start", date.today()), end):
+            if limit is not None and len(entries) >= limit:
+                break
+            entries.append({"id": entry.task.id, "name": entry.task.name,
+                            "due": format_date(entry.due), "done": entry.done})
+        return {"agenda": entries}
+
+    def add_task(self, data):
+        name = data.get("name")
+        if not isinstance(name, str) or not name.strip():
+            raise HttpError(400, "missing name")
+        return task_json(self.manager.add_task(name, data.get("due"), repeat=data.get("repeat")))
+
+    def update_task(self, task_id, data):
+        self.find(task_id)
+        repeat = data.get("repeat")
+        task = self.manager.update_task(task_id, name=data.get("name"), due=data.get("due"),
+                                        done=parse_bool(data.get("done"), "done"),
+                                        repeat=False if "repeat" in data and repeat is None else repeat)
+        return task_json(task)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a task file as a local HTTP/JSON API")
+    parser.add_argument("--file", default="tasks.txt", help="task file (default: tasks.txt)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-queue", type=int, default=256,
+                        help="requests waiting beyond this get 503 (default: 256)")
+    args = parser.parse_args(argv)
+
+    storage = WriteBehindStorage(SharedStorage(JournalStorage(args.file)))
+    manager = TaskManager(args.file, storage=storage, lazy=False)
+    server = TaskServer(manager, args.host, args.port, max_queue=args.max_queue)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    print(f"Serving {args.file} ({len(manager.tasks)} tasks) on http://{args.host}:{server.port}",
+          file=sys.stderr)
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.stop())
+        loop.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
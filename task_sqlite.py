@@ -0,0 +1,360 @@
+import heapq
+import json
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+from operator import attrgetter
+from date_codec import format_date, parse_date
+from task_buckets import TaskBuckets
+from task_search import tokenize
+from task_tracker_oop import Occurrence, Task, TaskManager, TaskPage
+
+class SQLiteTaskManager(TaskManager):
+    # Same API as TaskManager, but tasks live in a SQLite database instead of
+    # a Python list. Due dates are stored as ISO text (which sorts the same as
+    # the dates themselves) and indexed together with the done flag, so the
+    # date queries below are index range scans instead of a full sort.
+    #
+    # Positional indexes (remove_task / mark_complete) follow insertion order,
+    # just like TaskManager.tasks.
+    #
+    # Recurring tasks keep their rule and completed occurrences as JSON text
+    # (the same form as in Task.to_dict), NULL for plain tasks.
+
+    columns = "id, name, due, done, repeat, completed"
+
+    def __init__(self, filename, import_from=None):
+        self.filename = filename
+        self.conn = sqlite3.connect(filename)
+        # SQLite's lower() only folds ASCII; name matching uses Python's, as
+        # TaskManager does
+        self.conn.create_function("py_lower", 1, str.lower)
+        self._batch_depth = 0
+        self._archive = None
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                name TEXT NOT NULL,
+                due TEXT NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                id TEXT,
+                repeat TEXT,
+                completed TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks (due);
+            CREATE INDEX IF NOT EXISTS idx_tasks_done_due ON tasks (done, due);
+        """)
+        self._migrate()
+        if import_from and self._count() == 0:
+            self.import_json(import_from)
+
+    @property
+    def tasks(self):
+        return self.load_tasks()
+
+    @tasks.setter
+    def tasks(self, tasks):
+        # Assigning replaces the whole table, changes to the returned list
+        # are not written back
+        with self.batch():
+            self.conn.execute("DELETE FROM tasks")
+            self._insert(tasks)
+
+    @property
+    def ordered_tasks(self):
+        return self.sort_tasks()
+
+    @contextmanager
+    def batch(self):
+        # One transaction for the whole block, committed when the outermost
+        # batch ends and rolled back if it raises
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1:
+                self.conn.rollback()
+            raise
+        finally:
+            self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.conn.commit()
+
+    def add_tasks(self, items):
+        tasks = [item if isinstance(item, Task) else Task(*item) for item in items]
+        with self.batch():
+            self._insert(tasks)
+        return tasks
+
+    def remove_tasks(self, task_ids):
+        with self.batch():
+            removed = [self.remove_task_by_id(task_id) for task_id in task_ids]
+        return [task for task in removed if task is not None]
+
+    def complete_tasks(self, task_ids):
+        with self.batch():
+            return sum(1 for task_id in task_ids if self.mark_complete_by_id(task_id))
+
+    def flush(self):
+        self.conn.commit()
+
+    def reload_if_changed(self):
+        # Every read goes to the database, so there is nothing to reload
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    def import_json(self, json_filename):
+        # Bulk import of a tasks.json written by TaskManager
+        try:
+            with open(json_filename, "r") as file:
+                tasks_data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        tasks = [Task.from_dict(task_data) for task_data in tasks_data]
+        with self.batch():
+            self._insert(tasks)
+        return len(tasks)
+
+    def _migrate(self):
+        # Databases created before tasks had IDs (or recurrence) lack the
+        # columns
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")]
+        with self.batch():
+            for column in ("id", "repeat", "completed"):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} TEXT")
+            rowids = self.conn.execute("SELECT rowid FROM tasks WHERE id IS NULL").fetchall()
+            self.conn.executemany("UPDATE tasks SET id = ? WHERE rowid = ?",
+                                  ((uuid.uuid4().hex, rowid) for (rowid,) in rowids))
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_id ON tasks (id)")
+
+    def load_tasks(self):
+        return self._select("ORDER BY rowid")
+
+    def iter_load_tasks(self):
+        # Rows are turned into tasks as the cursor hands them out
+        for row in self.conn.execute(f"SELECT {self.columns} FROM tasks ORDER BY rowid"):
+            yield self._to_task(row)
+
+    def load_store(self):
+        # Columnar copy of the table, filled row by row from the cursor
+        from task_store import TaskStore
+        return TaskStore.from_tasks(self.iter_load_tasks())
+
+    def save_tasks(self):
+        # Every change is committed as it happens
+        self.conn.commit()
+
+    def sort_tasks(self):
+        return self._select("ORDER BY due, rowid")
+
+    def open_tasks(self):
+        return self._select("WHERE done = 0 ORDER BY due, rowid")
+
+    def overdue(self, today=None):
+        today = today or date.today()
+        return self._select("WHERE done = 0 AND due < ? ORDER BY due, rowid", (format_date(today),))
+
+    def due_between(self, start, end):
+        return self._select("WHERE due >= ? AND due <= ? ORDER BY due, rowid",
+                            (format_date(start), format_date(end)))
+
+    def due_this_week(self, today=None):
+        today = today or date.today()
+        return self.due_between(today, today + timedelta(days=6))
+
+    def query(self, done=None, due_before=None, due_after=None, name_contains=None,
+              order="due", offset=0, limit=None):
+        # Same contract as TaskManager.query, done in SQL
+        orders = {"due": "due, rowid", "added": "rowid"}
+        if order not in orders:
+            raise ValueError(f"Unknown order: {order}")
+        where = []
+        params = []
+        if done is not None:
+            where.append("done = ?")
+            params.append(int(done))
+        if due_before is not None:
+            where.append("due < ?")
+            params.append(format_date(Task.to_date(due_before)))
+        if due_after is not None:
+            where.append("due > ?")
+            params.append(format_date(Task.to_date(due_after)))
+        if name_contains:
+            where.append("instr(py_lower(name), ?) > 0")
+            params.append(name_contains.lower())
+        clause = f"WHERE {' AND '.join(where)} " if where else ""
+        # Ask for one extra row to know whether another page exists
+        tasks = self._select(f"{clause}ORDER BY {orders[order]} LIMIT ? OFFSET ?",
+                             params + [-1 if limit is None else limit + 1, offset])
+        has_more = limit is not None and len(tasks) > limit
+        return TaskPage(tasks[:limit] if has_more else tasks, offset, limit, has_more)
+
+    def search(self, text, limit=None):
+        # Same word-prefix matching as TaskManager.search: SQL narrows down
+        # to names containing every query word, the prefix check is done on
+        # the rows that come back
+        terms = set(tokenize(text))
+        if not terms:
+            return []
+        clause = " AND ".join("instr(py_lower(name), ?) > 0" for _ in terms)
+        rows = self.conn.execute(f"SELECT {self.columns} FROM tasks WHERE {clause} ORDER BY due, rowid",
+                                 list(terms))
+        found = []
+        for row in rows:
+            words = tokenize(row[1])
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                found.append(self._to_task(row))
+                if len(found) == limit:
+                    break
+        return found
+
+    def search_window(self, text, limit):
+        found = self.search(text)
+        return found[:limit], len(found)
+
+    def agenda(self, start=None, end=None):
+        # Plain tasks due in [start, end) come from an index range scan,
+        # merged with the occurrences of every recurring task
+        start = Task.to_date(start) if start is not None else None
+        end = Task.to_date(end) if end is not None else None
+        where = ["repeat IS NULL"]
+        params = []
+        if start is not None:
+            where.append("due >= ?")
+            params.append(format_date(start))
+        if end is not None:
+            where.append("due < ?")
+            params.append(format_date(end))
+        single = [Occurrence(task, task.due, task.done)
+                  for task in self._select(f"WHERE {' AND '.join(where)} ORDER BY due, rowid", params)]
+        series = [self._agenda_series(task, start, end)
+                  for task in self._select("WHERE repeat IS NOT NULL ORDER BY rowid")]
+        return heapq.merge(single, *series, key=attrgetter("due"))
+
+    def buckets(self):
+        # Rows change behind our back (other connections), so nothing is
+        # kept between calls
+        return TaskBuckets(self.tasks)
+
+    def get_task(self, task_id):
+        rows = self._select("WHERE id = ?", (task_id,))
+        return rows[0] if rows else None
+
+    def count(self):
+        return self._count()
+
+    def add_task(self, name, due, repeat=None):
+        task = Task(name, due, repeat=repeat)
+        with self.batch():
+            self._insert([task])
+        return task
+
+    def remove_task(self, idx):
+        row = self._row_at(idx)
+        return self.remove_task_by_id(row[0]) if row else None
+
+    def remove_task_by_id(self, task_id):
+        task = self.get_task(task_id)
+        if task is None:
+            return None
+        with self.batch():
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return task
+
+    def mark_complete(self, idx):
+        row = self._row_at(idx)
+        return self.mark_complete_by_id(row[0]) if row else False
+
+    def mark_complete_by_id(self, task_id):
+        with self.batch():
+            cursor = self.conn.execute("UPDATE tasks SET done = 1 WHERE id = ? AND repeat IS NULL",
+                                       (task_id,))
+        if cursor.rowcount > 0:
+            return True
+        # Recurring (or missing): completes the current occurrence
+        return self.complete_occurrence(task_id)
+
+    def complete_occurrence(self, task_id, day=None):
+        task = self.get_task(task_id)
+        if task is None:
+            return False
+        if task.repeat is None:
+            return self.mark_complete_by_id(task_id) if day is None or Task.to_date(day) == task.due else False
+        day = task.due if day is None else Task.to_date(day)
+        if not task.repeat.is_occurrence(day):
+            return False
+        if not task.is_done_on(day):
+            task.due, task.done, task.completed = self._occurrence_done(task, day)
+            self._update(task)
+        return True
+
+    def update_task(self, task_id, name=None, due=None, done=None, repeat=None):
+        # repeat as in TaskManager.update_task
+        task = self.get_task(task_id)
+        if task is None:
+            return None
+        due = None if due is None else Task.to_date(due)
+        if repeat is not None and repeat is not False:
+            repeat = Task.to_recurrence(repeat, due or task.due)
+        if name is not None:
+            task.name = name
+        if due is not None:
+            task.due = due
+        if done is not None:
+            task.done = done
+        if repeat is False:
+            task.repeat = task.completed = None
+        elif repeat is not None:
+            task.repeat, task.completed = repeat, None
+        self._update(task)
+        return task
+
+    def _count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def _row_at(self, idx):
+        if idx < 0:
+            return None
+        return self.conn.execute(
+            "SELECT id FROM tasks ORDER BY rowid LIMIT 1 OFFSET ?", (idx,)
+        ).fetchone()
+
+    def _select(self, clause, params=()):
+        rows = self.conn.execute(f"SELECT {self.columns} FROM tasks {clause}", params)
+        return [self._to_task(row) for row in rows]
+
+    def _insert(self, tasks):
+        for task in tasks:
+            if task.id is None:
+                task.id = uuid.uuid4().hex
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO tasks ({self.columns}) VALUES (?, ?, ?, ?, ?, ?)",
+            (self._to_row(task) for task in tasks),
+        )
+
+    def _update(self, task):
+        with self.batch():
+            self.conn.execute("UPDATE tasks SET name = ?, due = ?, done = ?, repeat = ?, completed = ? "
+                              "WHERE id = ?", self._to_row(task)[1:] + (task.id,))
+
+    @staticmethod
+    def _to_row(task):
+        # (id, name, due, done, repeat, completed) as stored
+        data = task.to_dict()
+        repeat = data.get("repeat")
+        completed = data.get("completed")
+        return (task.id, task.name, format_date(task.due), int(task.done),
+                None if repeat is None else json.dumps(repeat),
+                None if completed is None else json.dumps(completed))
+
+    @staticmethod
+    def _to_task(row):
+        task_id, name, due, done, repeat, completed = row
+        task = Task(name, parse_date(due), bool(done), task_id=task_id)
+        if repeat is not None:
+            task.repeat, task.completed = Task.recurrence_from_dict(
+                {"repeat": json.loads(repeat), "completed": completed and json.loads(completed)})
+        return task
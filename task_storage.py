@@ -0,0 +1,687 @@
+import atexit
+import json
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from json.encoder import encode_basestring_ascii
+from task_metrics import metrics
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+_SKIP = re.compile(r"[\s,]*")
+
+
+def with_ids(records):
+    # Files written before tasks had IDs get one derived from their position,
+    # which stays stable for as long as the file itself is unchanged
+    for pos, record in enumerate(records):
+        if "id" not in record:
+            record["id"] = f"legacy-{pos}"
+    return records
+
+
+def apply_record(by_id, record):
+    # Apply one journal record to a dict of task records keyed by ID.
+    # Records refer to tasks by ID, so replaying one twice is harmless.
+    op = record.get("op")
+    if op in ("add", "update"):
+        task = record["task"]
+        by_id[task["id"]] = task
+    elif op == "remove":
+        by_id.pop(record["id"], None)
+    elif op == "complete":
+        task = by_id.get(record["id"])
+        if task is not None:
+            task["done"] = True
+
+
+def copy_record(record):
+    # apply_record stores record["task"] itself; copy it first when the
+    # record is shared with someone else
+    record = dict(record)
+    if "task" in record:
+        record["task"] = dict(record["task"])
+    return record
+
+
+def iter_json_array(file, chunk_size=1 << 16):
+    # Yield the elements of a JSON array one at a time, reading the file in
+    # chunks, so the first tasks are usable before the whole file is parsed.
+    # Elements are task objects, which never decode from a partial chunk.
+    decoder = json.JSONDecoder()
+    buf = file.read(chunk_size)
+    pos = _SKIP.match(buf).end()
+    if not buf[pos:pos + 1] == "[":
+        if not buf.strip():
+            return
+        raise json.JSONDecodeError("Expecting '['", buf, pos)
+    pos += 1
+    eof = False
+    while True:
+        pos = _SKIP.match(buf, pos).end()
+        if buf[pos:pos + 1] == "]":
+            return
+        try:
+            if pos == len(buf):
+                raise json.JSONDecodeError("Need more data", buf, pos)
+            element, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield element
+
+
+def iter_json_chunks(records):
+    # Produces exactly what json.dump(list(records), indent=2) would, one
+    # record at a time
+    first = True
+    for record in records:
+        prefix = "[\n  " if first else ",\n  "
+        yield prefix + _dump_record(record)
+        first = False
+    yield "[]" if first else "\n]"
+
+
+_LITERALS = {True: "true", False: "false", None: "null"}
+
+
+def _dump_record(record):
+    # json.dumps(record, indent=2), indented one level more. With indent set
+    # json falls back to its pure Python encoder, so records holding only
+    # strings, flags and None (all task records) are put together here, with
+    # json's C string encoder doing the escaping.
+    parts = []
+    for key, value in record.items():
+        if not isinstance(key, str):
+            break
+        if isinstance(value, str):
+            parts.append(encode_basestring_ascii(key) + ": " + encode_basestring_ascii(value))
+        elif value is None or value is True or value is False:
+            parts.append(encode_basestring_ascii(key) + ": " + _LITERALS[value])
+        else:
+            break
+    else:
+        if parts:
+            return "{\n    " + ",\n    ".join(parts) + "\n  }"
+    return json.dumps(record, indent=2).replace("\n", "\n  ")
+
+
+def file_version(path):
+    # Cheap change detection: writes go through os.replace (new inode) and
+    # journal appends change the size, so this differs after any write
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def merge_records(base, ours, theirs):
+    # Three-way merge of task records by ID. base maps ID -> record as last
+    # read from disk, ours and theirs are lists of records. A side that did
+    # not touch a task takes the other side's version; when both changed the
+    # same task, each field comes from whichever side changed it (ours wins
+    # if both changed the same field). Edits beat deletions.
+    ours_by_id = {record["id"]: record for record in ours}
+    theirs_by_id = {record["id"]: record for record in theirs}
+    merged = []
+    for task_id in list(theirs_by_id) + [task_id for task_id in ours_by_id if task_id not in theirs_by_id]:
+        old = base.get(task_id)
+        mine = ours_by_id.get(task_id)
+        other = theirs_by_id.get(task_id)
+        if mine == old:
+            result = other
+        elif other == old:
+            result = mine
+        elif mine is None or other is None or old is None:
+            result = mine or other
+        else:
+            result = {key: mine[key] if mine.get(key) != old.get(key) else other.get(key)
+                      for key in set(mine) | set(other)}
+        if result is not None:
+            merged.append(result)
+    return merged
+
+
+class FileLock:
+    # Advisory lock on a separate lock file, shared by every process using
+    # the task file: fcntl.flock on POSIX, msvcrt.locking on Windows (which
+    # has no shared mode, so readers lock exclusively there).
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def locked(self, exclusive=True):
+        with open(self.path, "a+b") as file:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            elif msvcrt is not None:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    file.seek(0)
+                    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class JsonStorage:
+    # Default backend: the whole task list lives in one JSON file and every
+    # change rewrites it. Simple, human readable, O(N) per mutation.
+    #
+    # The file may also be used through JournalStorage (the GUI and the
+    # server do), which keeps recent changes in "<filename>.journal". When
+    # that journal exists it is replayed on load and watched for changes, so
+    # they are never lost; writing a new snapshot makes it stale (see
+    # JournalStorage).
+
+    def __init__(self, filename, durable=False):
+        self.filename = filename
+        self.journal_filename = filename + ".journal"
+        self.durable = durable
+        self._version = None
+
+    def version(self):
+        return (file_version(self.filename), file_version(self.journal_filename))
+
+    def changed(self):
+        # True if someone else wrote the file since we last read or wrote it
+        return self.version() != self._version
+
+    def load(self):
+        if os.path.exists(self.journal_filename):
+            records = JournalStorage(self.filename, durable=self.durable).load()
+            self._version = self.version()
+            return records
+        self._version = self.version()
+        try:
+            with open(self.filename, "r") as file:
+                return with_ids(json.load(file))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def load_changes(self, full=False):
+        # What changed on disk since we last read or wrote: ("delta", journal
+        # records) when only those were appended, else ("full", all records)
+        return "full", self.load()
+
+    def iter_load(self):
+        # Streaming version of load(); a damaged file raises JSONDecodeError
+        # once the bad part is reached
+        if os.path.exists(self.journal_filename):
+            # The journal has to be replayed first
+            yield from self.load()
+            return
+        self._version = self.version()
+        try:
+            file = open(self.filename, "r")
+        except FileNotFoundError:
+            return
+        with file:
+            for pos, record in enumerate(iter_json_array(file)):
+                if "id" not in record:
+                    record["id"] = f"legacy-{pos}"
+                yield record
+
+    def save(self, tasks):
+        self.write(task.to_dict() for task in tasks)
+
+    def write(self, records):
+        # Records are serialized and written one by one, never as one list
+        self._write_atomic(self.filename, iter_json_chunks(records))
+        self._version = self.version()
+
+    def log(self, tasks, op, data):
+        # Nothing to journal, just write the full list again
+        self.save(tasks)
+
+    def log_batch(self, tasks, records):
+        self.save(tasks)
+
+    def write_changes(self, by_id, records):
+        # Used by WriteBehindStorage: by_id already has records applied
+        self.write(by_id.values())
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def _write_atomic(self, path, chunks):
+        # Readers never see a half written file: write a temp file next to
+        # the target and rename it over. Returns the size and crc32 written.
+        # Chunks are text (written as UTF-8) or bytes.
+        tmp_path = path + ".tmp"
+        size = crc = 0
+        with open(tmp_path, "wb") as file:
+            for chunk in chunks:
+                data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                file.write(data)
+                size += len(data)
+                crc = zlib.crc32(data, crc)
+            if self.durable:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+        return [size, crc]
+
+
+class JournalStorage(JsonStorage):
+    # Append-only backend: the JSON file is a snapshot and each mutation is
+    # appended as one line to "<filename>.journal", so a change costs O(1)
+    # disk I/O. After compact_every journal records the snapshot is rewritten
+    # and the journal starts over.
+    #
+    # The first journal line records the size and crc32 of the snapshot it
+    # applies to. If we crash after writing a new snapshot but before resetting
+    # the journal, the header no longer matches and the stale journal is
+    # ignored instead of being replayed twice.
+
+    def __init__(self, filename, compact_every=1000, durable=True):
+        super().__init__(filename, durable)
+        self.compact_every = compact_every
+        self._snapshot_sig = [0, 0]
+        self._journal_ready = False
+        self._pending = 0
+
+    def load(self):
+        try:
+            with open(self.filename, "rb") as file:
+                raw = file.read()
+        except FileNotFoundError:
+            raw = b""
+        self._snapshot_sig = self._signature(raw)
+        try:
+            records = with_ids(json.loads(raw.decode("utf-8"))) if raw else []
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            records = []
+        by_id = {record["id"]: record for record in records}
+        self._replay(by_id)
+        self._version = self.version()
+        return list(by_id.values())
+
+    def load_changes(self, full=False):
+        # If the snapshot is untouched and the journal only grew, reading the
+        # new lines is enough; anything else (compaction, a replaced file)
+        # needs a full load
+        if not full and self._journal_ready and self._version is not None:
+            snapshot, journal = self._version
+            current = file_version(self.journal_filename)
+            if (journal is not None and current is not None and current[0] == journal[0]
+                    and current[1] >= journal[1] and file_version(self.filename) == snapshot):
+                return "delta", self._read_tail(snapshot, journal[1], current)
+        return "full", self.load()
+
+    def iter_load(self):
+        # The journal has to be replayed first, so nothing to stream
+        return iter(self.load())
+
+    def write(self, records):
+        self._snapshot_sig = self._write_atomic(self.filename, iter_json_chunks(records))
+        self._reset_journal()
+        self._version = self.version()
+
+    def log(self, tasks, op, data):
+        if self._pending >= self.compact_every:
+            self.save(tasks)
+            return
+        self._append([dict(data, op=op)])
+
+    def log_batch(self, tasks, records):
+        # All records of a batch go out in a single write
+        if self._pending + len(records) > self.compact_every:
+            self.save(tasks)
+        else:
+            self._append(records)
+
+    def write_changes(self, by_id, records):
+        if self._pending + len(records) > self.compact_every:
+            self.write(by_id.values())
+        else:
+            self._append(records)
+
+    def _replay(self, by_id):
+        self._journal_ready = False
+        self._pending = 0
+        try:
+            with open(self.journal_filename, "rb") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+
+        header = self._parse_line(lines[0]) if lines else None
+        if not header or header.get("snapshot") != self._snapshot_sig:
+            # Journal belongs to an older snapshot (or is unreadable)
+            return
+
+        good_size = len(lines[0])
+        for line in lines[1:]:
+            record = self._parse_line(line)
+            if record is None:
+                # Torn write from a crash, everything after it is garbage
+                break
+            apply_record(by_id, record)
+            good_size += len(line)
+            self._pending += 1
+
+        if good_size < sum(len(line) for line in lines):
+            with open(self.journal_filename, "r+b") as file:
+                file.truncate(good_size)
+        self._journal_ready = True
+
+    def _read_tail(self, snapshot, offset, current):
+        with open(self.journal_filename, "rb") as file:
+            file.seek(offset)
+            data = file.read(current[1] - offset)
+        records = []
+        for line in data.splitlines(keepends=True):
+            record = self._parse_line(line)
+            if record is None:
+                # Another process is still writing this line; next time
+                break
+            records.append(record)
+            offset += len(line)
+        self._pending += len(records)
+        if offset == current[1]:
+            self._version = (snapshot, current)
+        else:
+            self._version = (snapshot, (current[0], offset, None))
+        return records
+
+    @staticmethod
+    def _parse_line(line):
+        if not line.endswith(b"\n"):
+            return None
+        try:
+            record = json.loads(line.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        return record if isinstance(record, dict) else None
+
+    @staticmethod
+    def _signature(data):
+        return [len(data), zlib.crc32(data)]
+
+    def _reset_journal(self):
+        header = json.dumps({"snapshot": self._snapshot_sig}) + "\n"
+        self._write_atomic(self.journal_filename, [header])
+        self._journal_ready = True
+        self._pending = 0
+
+    def _append(self, records):
+        if not self._journal_ready:
+            self._reset_journal()
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        with open(self.journal_filename, "ab") as file:
+            file.write(lines.encode("utf-8"))
+            if self.durable:
+                file.flush()
+                os.fsync(file.fileno())
+        self._pending += len(records)
+        self._version = self.version()
+
+
+class WriteBehindStorage:
+    # Wraps another backend and moves all disk writes to a background thread.
+    # Mutations only queue a record (O(1), never blocks); the worker waits
+    # `delay` seconds so a burst of changes becomes one write, applies them
+    # to its own copy of the task records and hands that to the backend.
+    #
+    # listener(error) is called from the worker thread after every write,
+    # with None on success. GUIs should hand it over to their main loop.
+
+    def __init__(self, backend, delay=0.2, listener=None):
+        self.backend = backend
+        self.filename = backend.filename
+        self.delay = delay
+        self.listener = listener
+        self._records = {}
+        self._queue = []
+        self._busy = False
+        self._hurry = False
+        self._stale = False
+        self._closed = False
+        # _cond guards the queue state only, so _put() never waits for the
+        # disk; _io_lock guards backend I/O and the _records mirror
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="task-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def load(self):
+        return self.load_changes(full=True)[1]
+
+    def load_changes(self, full=False):
+        # Safe to call from another thread than the one making changes. The
+        # I/O lock is held while reading so the worker cannot write
+        # meanwhile; _cond is not, so changes can still be queued.
+        with self._cond:
+            self._drain()
+        with self._io_lock:
+            kind, records = self.backend.load_changes(full or self._stale)
+            self._stale = False
+            if kind == "full":
+                self._records = {record["id"]: dict(record) for record in records}
+            else:
+                for record in records:
+                    apply_record(self._records, copy_record(record))
+        return kind, records
+
+    def changed(self):
+        # _stale: one of our writes was merged with someone else's changes,
+        # which the caller has not seen yet
+        return self._stale or self.backend.changed()
+
+    def iter_load(self):
+        self.flush()
+        with self._io_lock:
+            self._records = {}
+        for record in self.backend.iter_load():
+            self._records[record["id"]] = dict(record)
+            yield record
+
+    def save(self, tasks):
+        # Full snapshot requested, taken here so the worker never iterates
+        # over tasks that the caller is still changing
+        self._put([{"op": "snapshot", "tasks": [task.to_dict() for task in tasks]}])
+
+    def log(self, tasks, op, data):
+        self._put([dict(data, op=op)])
+
+    def log_batch(self, tasks, records):
+        self._put(records)
+
+    def flush(self):
+        # Block until everything queued so far is on disk
+        with self._cond:
+            self._drain()
+
+    def _drain(self):
+        self._hurry = True
+        self._cond.notify_all()
+        while self._queue or self._busy:
+            self._cond.wait()
+        self._hurry = False
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
+        self.backend.close()
+
+    def _put(self, records):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("storage is closed")
+            self._queue.extend(records)
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue and self._closed:
+                    return
+                if self.delay:
+                    # Let the rest of the burst arrive
+                    self._cond.wait_for(lambda: self._closed or self._hurry, timeout=self.delay)
+                batch, self._queue = self._queue, []
+                self._busy = True
+            with self._io_lock:
+                error = self._write(batch)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+            if self.listener is not None:
+                self.listener(error)
+
+    def _write(self, batch):
+        # Everything after the last snapshot goes to the journal (if any);
+        # a snapshot in the batch means a full write anyway
+        full = False
+        records = []
+        for record in batch:
+            if record["op"] == "snapshot":
+                self._records = {task["id"]: task for task in record["tasks"]}
+                full = True
+                records = []
+            else:
+                apply_record(self._records, record)
+                records.append(record)
+        try:
+            # The disk write the GUI never waits for, so it is timed here
+            with metrics.timer("storage.write_behind"):
+                if full:
+                    merged = self.backend.write(self._records.values())
+                else:
+                    merged = self.backend.write_changes(self._records, records)
+        except Exception as error:
+            return error
+        if merged is not None:
+            # SharedStorage merged in another process's changes
+            self._records = {record["id"]: dict(record) for record in merged}
+            self._stale = True
+        return None
+
+
+class SharedStorage:
+    # For several processes working on the same task file. Every write
+    # happens under an exclusive FileLock and first checks (with one stat
+    # call) whether the file changed since we last read or wrote it. If it
+    # did, our tasks are three-way merged with the file's (see merge_records)
+    # and the merged list is written and returned, for TaskManager to adopt.
+    # Otherwise the write goes to the backend as usual.
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.filename = backend.filename
+        self.lock = FileLock(backend.filename + ".lock")
+        self.conflicts = 0
+        self._base = {}
+
+    def version(self):
+        return self.backend.version()
+
+    def changed(self):
+        return self.backend.changed()
+
+    def load(self):
+        with self.lock.locked(exclusive=False):
+            records = self.backend.load()
+            self._settle(records)
+        return records
+
+    def load_changes(self, full=False):
+        with self.lock.locked(exclusive=False):
+            kind, records = self.backend.load_changes(full)
+            if kind == "full":
+                self._settle(records)
+            else:
+                self._advance(records)
+        return kind, records
+
+    def iter_load(self):
+        # Streams from the backend under the shared lock, which is held until
+        # the last record is read (or the generator is closed)
+        with self.lock.locked(exclusive=False):
+            self._base = {}
+            for record in self.backend.iter_load():
+                self._base[record["id"]] = dict(record)
+                yield record
+
+    def save(self, tasks):
+        return self.write([task.to_dict() for task in tasks])
+
+    def write(self, records):
+        records = list(records)
+        with self.lock.locked():
+            if self.changed():
+                return self._merge(records)
+            self.backend.write(records)
+            self._settle(records)
+        return None
+
+    def log(self, tasks, op, data):
+        return self.log_batch(tasks, [dict(data, op=op)])
+
+    def log_batch(self, tasks, records):
+        with self.lock.locked():
+            if self.changed():
+                return self._merge([task.to_dict() for task in tasks])
+            self.backend.log_batch(tasks, records)
+            self._advance(records)
+        return None
+
+    def write_changes(self, by_id, records):
+        with self.lock.locked():
+            if self.changed():
+                return self._merge(list(by_id.values()))
+            self.backend.write_changes(by_id, records)
+            self._advance(records)
+        return None
+
+    def flush(self):
+        self.backend.flush()
+
+    def close(self):
+        self.backend.close()
+
+    def _merge(self, ours):
+        theirs = self.backend.load()
+        merged = merge_records(self._base, ours, theirs)
+        self.backend.write(merged)
+        self._settle(merged)
+        self.conflicts += 1
+        return merged
+
+    def _settle(self, records):
+        self._base = {record["id"]: dict(record) for record in records}
+
+    def _advance(self, records):
+        for record in records:
+            apply_record(self._base, copy_record(record))
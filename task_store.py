@@ -0,0 +1,125 @@
+import sys
+from array import array
+from datetime import date
+from date_codec import format_date, parse_date
+from task_tracker_oop import Task
+
+# Fields every record has; anything else (repeat, completed) is kept aside
+BASE_FIELDS = frozenset(["name", "due", "done", "id"])
+
+class TaskStore:
+    # Columnar storage for large, mostly read-only task sets: one array of
+    # ordinal due dates, one bit per done flag and interned name strings,
+    # instead of one Task object (plus date object) per task. Filtering and
+    # sorting work on the columns; Task objects are only built for the rows
+    # that are actually handed out.
+    #
+    # The few records with more than the base fields (recurring tasks) keep
+    # the rest in a sparse dict, row index -> fields, as task_binary does.
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.dues = array("l")
+        self.done_bits = bytearray()
+        self.extras = {}
+        self._count = 0
+
+    @classmethod
+    def from_records(cls, records):
+        # Records as returned by the storage backends (Task.to_dict format)
+        store = cls()
+        for record in records:
+            extra = None
+            if len(record) > 4 or not BASE_FIELDS.issuperset(record):
+                extra = {key: value for key, value in record.items() if key not in BASE_FIELDS}
+            store.append(record["name"], parse_date(record["due"]),
+                         record["done"], record.get("id"), extra)
+        return store
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        store = cls()
+        for task in tasks:
+            extra = None
+            if task.repeat is not None or task.completed:
+                extra = {key: value for key, value in task.to_dict().items() if key not in BASE_FIELDS}
+            store.append(task.name, task.due, task.done, task.id, extra)
+        return store
+
+    def __len__(self):
+        return self._count
+
+    def append(self, name, due, done=False, task_id=None, extra=None):
+        # extra: fields beyond the base ones, in record (to_dict) form
+        idx = self._count
+        self.ids.append(task_id)
+        self.names.append(sys.intern(name))
+        self.dues.append(due.toordinal())
+        if idx % 8 == 0:
+            self.done_bits.append(0)
+        if extra:
+            self.extras[idx] = extra
+        self._count += 1
+        self.set_done(idx, done)
+        return idx
+
+    def is_done(self, idx):
+        return bool(self.done_bits[idx >> 3] & (1 << (idx & 7)))
+
+    def set_done(self, idx, done=True):
+        if done:
+            self.done_bits[idx >> 3] |= 1 << (idx & 7)
+        else:
+            self.done_bits[idx >> 3] &= ~(1 << (idx & 7)) & 0xFF
+
+    def due(self, idx):
+        return date.fromordinal(self.dues[idx])
+
+    def task(self, idx):
+        task = Task(self.names[idx], self.due(idx), self.is_done(idx), task_id=self.ids[idx])
+        extra = self.extras.get(idx)
+        if extra is not None:
+            task.repeat, task.completed = Task.recurrence_from_dict(extra)
+        return task
+
+    def tasks(self, indices=None):
+        # Build Task objects lazily, for all rows or just the given ones
+        if indices is None:
+            indices = range(self._count)
+        for idx in indices:
+            yield self.task(idx)
+
+    def filter(self, done=None, due_before=None, due_after=None):
+        # Row indices matching every given condition (dates are exclusive,
+        # as in TaskManager.query)
+        dues = self.dues
+        indices = range(self._count)
+        if due_after is not None:
+            low = due_after.toordinal()
+            indices = [idx for idx in indices if dues[idx] > low]
+        if due_before is not None:
+            high = due_before.toordinal()
+            indices = [idx for idx in indices if dues[idx] < high]
+        if done is not None:
+            indices = [idx for idx in indices if self.is_done(idx) == done]
+        return list(indices)
+
+    def sorted_indices(self, indices=None):
+        # Row indices in due date order; ties keep their original order
+        if indices is None:
+            indices = range(self._count)
+        return sorted(indices, key=self.dues.__getitem__)
+
+    def to_records(self):
+        for idx in range(self._count):
+            record = {
+                "name": self.names[idx],
+                "due": format_date(self.due(idx)),
+                "done": self.is_done(idx),
+                "id": self.ids[idx]
+            }
+            extra = self.extras.get(idx)
+            if extra is not None:
+                record.update(extra)
+            yield record
@@ -1,11 +1,59 @@
+import time
+_started = time.perf_counter()
+
+import argparse
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
 from task_tracker_oop import Task, TaskManager
-from datetime import datetime, date
-import os
+from task_buckets import OVERDUE, DUE_TODAY, UPCOMING, COMPLETED
+from task_metrics import metrics
+from task_storage import JournalStorage, SharedStorage, WriteBehindStorage
+from task_watch import FileWatcher
+from datetime import date
+import queue
+import threading
+
+def messagebox():
+    # Only needed once the user does something, not to paint the window
+    from tkinter import messagebox
+    return messagebox
+
+class StartupTimer:
+    # Time spent in each startup phase, printed by --profile-startup
+    def __init__(self, started, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        self.last = started
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self, file=None):
+        file = file or sys.stderr
+        total = sum(seconds for phase, seconds in self.phases)
+        for phase, seconds in self.phases:
+            print(f"{phase:<24}{seconds * 1000:>10.1f} ms", file=file)
+        print(f"{'total':<24}{total * 1000:>10.1f} ms", file=file)
 
 class TaskTrackerGUI:
-    def __init__(self, root):
+    # Above this many tasks only the rows in view are put in the Treeview
+    virtual_threshold = 1000
+    row_height = 25
+    filename = "tasks.json"
+    # F9 starts/stops a cProfile capture, written here
+    profile_filename = "task_tracker.prof"
+    metrics_interval = 5000  # ms between metrics exports
+    # Completed tasks due more than this many days ago are moved to the
+    # archive when the window opens; None keeps everything in the task file
+    archive_after = None
+
+    def __init__(self, root, timer=None):
+        # The window is built and shown first; tasks are read on a
+        # background thread and filled in when ready (see finish_loading)
+        self.timer = timer or StartupTimer(time.perf_counter())
         self.root = root
         self.root.title("Task Tracker")
         
@@ -57,22 +105,13 @@ class TaskTrackerGUI:
                            foreground=self.fg_color, 
                            fieldbackground=self.entry_bg,
                            font=('Segoe UI', 9),
-                           rowheight=25)  # Increased row height
+                           rowheight=self.row_height)  # Increased row height
         
         self.style.configure("Treeview.Heading", 
                            background=self.header_bg,
                            foreground=self.header_fg,
                            font=('Segoe UI', 9, 'bold'))
         
-        # Map colors for Treeview selection
-        self.style.map("Treeview",
-                      background=[('selected', self.selection_color)],
-                      foreground=[('selected', 'white')])
-        
-        self.style.map("Treeview.Heading",
-                      background=[('active', '#E0E0E0')],  # Lighter grey on hover
-                      foreground=[('active', 'black')])    # Keep text black on hover
-        
         # Button styling - modern flat look with black text
         self.style.configure("TButton", 
                            background=self.button_bg,
@@ -80,13 +119,6 @@ class TaskTrackerGUI:
                            font=('Segoe UI', 9, 'bold'),
                            padding=(15, 8))  # Wider padding
         
-        # Map colors for button states - keeping text black for all states
-        self.style.map("TButton",
-                      background=[('active', self.hover_color),
-                                ('pressed', self.button_bg)],
-                      foreground=[('active', 'black'),
-                                ('pressed', 'black')])
-        
         # Entry styling
         self.style.configure("TEntry", 
                            fieldbackground=self.entry_bg,
@@ -105,16 +137,104 @@ class TaskTrackerGUI:
         self.main_frame.columnconfigure(0, weight=1)
         self.main_frame.rowconfigure(1, weight=1)
         
-        # Initialize task manager
-        self.manager = TaskManager("tasks.json")
+        self.timer.mark("styles")
+        
+        # Initialize storage. Saving happens on a background thread so the
+        # window never waits on the disk; results come back through a queue
+        # that is polled from the Tk loop. SharedStorage merges with changes
+        # other programs make to the same file.
+        self.save_results = queue.Queue()
+        self.reloads = queue.Queue()
+        self.reload_lock = threading.Lock()
+        self.storage = WriteBehindStorage(SharedStorage(JournalStorage(self.filename)),
+                                          listener=self.save_results.put)
+        self.manager = None
+        self.watcher = None
+        self.loaded = queue.Queue()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind("<F9>", self.toggle_profile)
         
         # Create and pack widgets
+        self.controls = []
         self.create_input_frame()
         self.create_task_list()
         self.create_buttons()
+        self.timer.mark("widgets")
+        
+        # Load tasks in the background, with a progress bar meanwhile
+        self.set_loading(True)
+        threading.Thread(target=self.load_tasks, name="task-loader", daemon=True).start()
+        self.root.after(20, self.finish_loading)
+        # Hover and pressed colors are not needed for the first paint
+        self.root.after_idle(self.setup_style_maps)
+
+    def setup_style_maps(self):
+        # Map colors for Treeview selection
+        self.style.map("Treeview",
+                      background=[('selected', self.selection_color)],
+                      foreground=[('selected', 'white')])
+        
+        self.style.map("Treeview.Heading",
+                      background=[('active', '#E0E0E0')],  # Lighter grey on hover
+                      foreground=[('active', 'black')])    # Keep text black on hover
         
-        # Load tasks
+        # Map colors for button states - keeping text black for all states
+        self.style.map("TButton",
+                      background=[('active', self.hover_color),
+                                ('pressed', self.button_bg)],
+                      foreground=[('active', 'black'),
+                                ('pressed', 'black')])
+
+    def load_tasks(self):
+        # Runs on the loader thread. The manager is only handed to the Tk
+        # loop once it is complete, so the two never share it.
+        try:
+            manager = TaskManager(self.filename, storage=self.storage, lazy=False)
+            if self.archive_after is not None:
+                manager.archive_completed(self.archive_after)
+            manager.buckets()
+            self.loaded.put(manager)
+        except Exception as error:
+            self.loaded.put(error)
+
+    def finish_loading(self):
+        try:
+            result = self.loaded.get_nowait()
+        except queue.Empty:
+            self.root.after(20, self.finish_loading)
+            return
+        self.timer.mark("load tasks (background)")
+        if isinstance(result, Exception):
+            messagebox().showerror("Error", f"Could not load tasks: {result}")
+            result = TaskManager(self.filename, storage=self.storage)
+        self.manager = result
+        self.set_loading(False)
         self.refresh_task_list()
+        self.root.update_idletasks()
+        self.timer.mark("first render")
+        if self.timer.enabled:
+            self.timer.report()
+        
+        # Changes other programs make show up without a restart: the watcher
+        # thread reads them (only the new journal lines, when that is all
+        # that changed) and the Tk loop applies them
+        self.watcher = FileWatcher([self.filename, self.filename + ".journal"], self.reload_tasks)
+        self.watcher.start()
+        self.root.after(200, self.poll_save_results)
+        if metrics.enabled and metrics.path:
+            self.root.after(self.metrics_interval, self.export_metrics)
+
+    def set_loading(self, loading):
+        state = "disabled" if loading else "normal"
+        for control in self.controls:
+            control.configure(state=state)
+        if loading:
+            self.summary.configure(text="Loading tasks...")
+            self.progress.grid(row=3, column=0, columnspan=2, sticky=tk.E)
+            self.progress.start(15)
+        else:
+            self.progress.stop()
+            self.progress.grid_remove()
 
     def create_input_frame(self):
         # Input frame with more padding
@@ -129,14 +249,26 @@ class TaskTrackerGUI:
         ttk.Label(input_frame, text="Task:").grid(row=0, column=0, padx=10, pady=5)
         self.task_name = ttk.Entry(input_frame)
         self.task_name.grid(row=0, column=1, padx=10, pady=5, sticky=(tk.W, tk.E))
+        self.controls.append(self.task_name)
         
         # Due date input
         ttk.Label(input_frame, text="Due Date (YYYY-MM-DD):").grid(row=0, column=2, padx=10, pady=5)
         self.due_date = ttk.Entry(input_frame)
         self.due_date.grid(row=0, column=3, padx=10, pady=5, sticky=(tk.W, tk.E))
+        self.controls.append(self.due_date)
         
         # Add button
-        ttk.Button(input_frame, text="Add Task", command=self.add_task).grid(row=0, column=4, padx=10, pady=5)
+        add_button = ttk.Button(input_frame, text="Add Task", command=self.add_task)
+        add_button.grid(row=0, column=4, padx=10, pady=5)
+        self.controls.append(add_button)
+        
+        # Search as you type, filters the task list below
+        ttk.Label(input_frame, text="Search:").grid(row=1, column=0, padx=10, pady=5)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", self.on_search_changed)
+        search_entry = ttk.Entry(input_frame, textvariable=self.search_var)
+        search_entry.grid(row=1, column=1, columnspan=3, padx=10, pady=5, sticky=(tk.W, tk.E))
+        self.controls.append(search_entry)
 
     def create_task_list(self):
         # Create treeview for tasks with adjusted column widths
@@ -155,13 +287,25 @@ class TaskTrackerGUI:
         self.tree.column("Due Date", width=120, minwidth=120)
         self.tree.column("Days Left", width=100, minwidth=100)
         
-        # Add scrollbar with matching style
-        scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Add scrollbar with matching style. In virtual mode it scrolls
+        # through the task list instead of the Treeview (see on_scroll).
+        self.scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL, command=self.on_scroll)
+        self.tree.configure(yscrollcommand=self.on_tree_scroll)
         
         # Grid the treeview and scrollbar with padding
         self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
-        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S), pady=10)
+        self.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S), pady=10)
+        
+        # Rows currently in the Treeview: task ID -> values, plus their order
+        self.rows = {}
+        self.row_order = []
+        self.virtual = False
+        self.window_start = 0
+        
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", self.on_mouse_wheel)
+        self.tree.bind("<Button-5>", self.on_mouse_wheel)
+        self.tree.bind("<Configure>", lambda event: self.virtual and self.refresh_task_list())
 
     def create_buttons(self):
         # Button frame with padding
@@ -173,22 +317,36 @@ class TaskTrackerGUI:
         button_frame.columnconfigure(4, weight=1)  # Changed back to 4
         
         # Buttons with consistent spacing
-        ttk.Button(button_frame, text="Mark Complete", command=self.mark_complete).grid(row=0, column=1, padx=5)
-        ttk.Button(button_frame, text="Remove Task", command=self.remove_task).grid(row=0, column=2, padx=5)
-        ttk.Button(button_frame, text="Refresh", command=self.refresh_task_list).grid(row=0, column=3, padx=5)
+        for column, (text, command) in enumerate([("Mark Complete", self.mark_complete),
+                                                  ("Remove Task", self.remove_task),
+                                                  ("Refresh", self.refresh_task_list)], 1):
+            button = ttk.Button(button_frame, text=text, command=command)
+            button.grid(row=0, column=column, padx=5)
+            self.controls.append(button)
+        
+        # Task counts per bucket, kept by the manager so this costs nothing.
+        # Shares its row with the progress bar shown while loading.
+        self.summary = ttk.Label(self.main_frame)
+        self.summary.grid(row=3, column=0, columnspan=2, sticky=tk.W)
+        self.progress = ttk.Progressbar(self.main_frame, mode="indeterminate", length=150)
+        
+        # Last timings of the hot paths, only with metrics enabled
+        self.metrics_label = ttk.Label(self.main_frame)
+        if metrics.enabled:
+            self.metrics_label.grid(row=4, column=0, columnspan=2, sticky=tk.W)
 
     def add_task(self):
         name = self.task_name.get().strip()
         due_date = self.due_date.get().strip()
         
         if not name or not due_date:
-            messagebox.showerror("Error", "Please enter both task name and due date")
+            messagebox().showerror("Error", "Please enter both task name and due date")
             return
             
         try:
             # Validate date format
             if not Task.is_valid_date_format(due_date):
-                messagebox.showerror("Error", "Invalid date format. Use YYYY-MM-DD")
+                messagebox().showerror("Error", "Invalid date format. Use YYYY-MM-DD")
                 return
                 
             # Add task
@@ -202,62 +360,260 @@ class TaskTrackerGUI:
             self.refresh_task_list()
             
         except ValueError as e:
-            messagebox.showerror("Error", str(e))
+            messagebox().showerror("Error", str(e))
 
     def mark_complete(self):
         selection = self.tree.selection()
         if not selection:
-            messagebox.showinfo("Info", "Please select a task to mark complete")
+            messagebox().showinfo("Info", "Please select a task to mark complete")
             return
             
-        item_id = selection[0]
-        task_idx = self.tree.index(item_id)
-        
-        if self.manager.mark_complete(task_idx):
+        # Treeview rows are keyed by task ID; all selected rows are saved
+        # in one write
+        if self.manager.complete_tasks(selection):
             self.refresh_task_list()
 
     def remove_task(self):
         selection = self.tree.selection()
         if not selection:
-            messagebox.showinfo("Info", "Please select a task to remove")
+            messagebox().showinfo("Info", "Please select a task to remove")
             return
             
-        if messagebox.askyesno("Confirm", "Are you sure you want to remove this task?"):
-            item_id = selection[0]
-            task_idx = self.tree.index(item_id)
-            
-            removed_task = self.manager.remove_task(task_idx)
-            if removed_task:
+        if len(selection) == 1:
+            question = "Are you sure you want to remove this task?"
+        else:
+            question = f"Are you sure you want to remove these {len(selection)} tasks?"
+        if messagebox().askyesno("Confirm", question):
+            removed_tasks = self.manager.remove_tasks(selection)
+            if removed_tasks:
                 # Refresh display immediately
                 self.refresh_task_list()
 
+    @metrics.timed("gui.refresh")
     def refresh_task_list(self):
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        # Add sorted tasks
-        for task in self.manager.sort_tasks():
-            days_left = (task.due - date.today()).days
-            status = "✓" if task.done else " "
-            
-            if task.done:
-                days_left_text = "Completed"
-            elif days_left < 0:
-                days_left_text = "Overdue!"
+        if self.manager is None:
+            # Still loading
+            return
+        search_text = self.search_var.get().strip()
+        if search_text:
+            # Only the hits up to the end of the window are put in order;
+            # the total comes from the index
+            tasks, total = self.manager.search_window(search_text, self.window_start + self.visible_rows())
+            if len(tasks) < total <= self.virtual_threshold:
+                tasks = self.manager.search(search_text)
+        else:
+            tasks = self.manager.ordered_tasks
+            total = len(tasks)
+        self.shown_count = total
+        self.buckets = self.manager.buckets()
+        self.shown_day = self.buckets.today
+        counts = self.buckets.counts()
+        self.summary.configure(text=f"{counts[OVERDUE]} overdue, {counts[DUE_TODAY]} due today, "
+                                    f"{counts[UPCOMING]} upcoming, {counts[COMPLETED]} completed")
+        self.virtual = total > self.virtual_threshold
+        
+        if self.virtual:
+            # Only materialize the rows that fit in the visible area
+            visible = self.visible_rows()
+            self.window_start = max(0, min(self.window_start, total - visible))
+            self.render_rows(tasks[self.window_start:self.window_start + visible])
+            self.scrollbar.set(self.window_start / total, (self.window_start + visible) / total)
+        else:
+            self.window_start = 0
+            self.render_rows(tasks)
+        if metrics.enabled:
+            self.show_metrics()
+
+    def show_metrics(self):
+        text = metrics.summary([("refresh", "gui.refresh"), ("rows", "gui.render_rows"),
+                                ("save", "storage.write_behind"), ("load", "manager.load")])
+        if metrics.profiling:
+            text += " · profiling (F9 to stop)"
+        self.metrics_label.configure(text=text)
+
+    def export_metrics(self):
+        metrics.export()
+        self.root.after(self.metrics_interval, self.export_metrics)
+
+    def toggle_profile(self, event=None):
+        if metrics.profiling:
+            path = metrics.stop_profile(self.profile_filename)
+            self.summary.configure(text=f"Profile written to {path}")
+        else:
+            metrics.start_profile()
+        if metrics.enabled:
+            self.show_metrics()
+
+    @metrics.timed("gui.render_rows")
+    def render_rows(self, tasks):
+        # Diff against what is already shown: only new, changed or moved rows
+        # cost a Treeview call
+        wanted = {task.id for task in tasks}
+        stale = [task_id for task_id in self.row_order if task_id not in wanted]
+        calls = 1 if stale else 0
+        if stale:
+            self.tree.delete(*stale)
+            for task_id in stale:
+                del self.rows[task_id]
+        order = [task_id for task_id in self.row_order if task_id in wanted]
+        
+        for pos, task in enumerate(tasks):
+            values = self.task_row(task)
+            shown = self.rows.get(task.id)
+            if shown is None:
+                self.tree.insert("", pos, iid=task.id, values=values)
+                order.insert(pos, task.id)
+                calls += 1
             else:
-                days_left_text = f"{days_left} days"
-                
-            self.tree.insert("", tk.END, values=(
-                status,
-                task.name,
-                task.due.strftime("%Y-%m-%d"),
-                days_left_text
-            ))
-
-def main():
+                if shown != values:
+                    self.tree.item(task.id, values=values)
+                    calls += 1
+                if order[pos] != task.id:
+                    # Due date changed, so the row moves up
+                    self.tree.move(task.id, "", pos)
+                    order.remove(task.id)
+                    order.insert(pos, task.id)
+                    calls += 1
+            self.rows[task.id] = values
+        self.row_order = order
+        metrics.count("gui.treeview_calls", calls)
+
+    def task_row(self, task):
+        # Days left and the formatted date come from the manager's cache
+        info = self.buckets.info(task)
+        status = "✓" if task.done else " "
+        name = task.name
+        if task.repeat is not None:
+            # Listed once, at its current occurrence; completing it moves
+            # the task on to the next one
+            status = "✓" if task.done else "↻"
+            name = f"{name} ({task.repeat})"
+        return (
+            status,
+            name,
+            info.due_text,
+            info.status
+        )
+
+    def visible_rows(self):
+        # Tree height minus the heading row
+        height = self.tree.winfo_height()
+        return max(height // self.row_height - 1, 10)
+
+    def on_search_changed(self, *args):
+        self.window_start = 0
+        self.refresh_task_list()
+
+    def scroll_to(self, start):
+        if start != self.window_start:
+            self.window_start = max(0, start)
+            self.refresh_task_list()
+
+    def on_scroll(self, *args):
+        if not self.virtual:
+            self.tree.yview(*args)
+            return
+        total = self.shown_count
+        visible = self.visible_rows()
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            step = visible if args[2] == "pages" else 1
+            self.scroll_to(self.window_start + int(args[1]) * step)
+
+    def on_tree_scroll(self, first, last):
+        # The Treeview drives the scrollbar only when it holds every row
+        if not self.virtual:
+            self.scrollbar.set(first, last)
+
+    def on_mouse_wheel(self, event):
+        if not self.virtual:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.window_start - 3)
+        else:
+            self.scroll_to(self.window_start + 3)
+        return "break"
+
+    def reload_tasks(self, full=False):
+        # Runs on the watcher thread. The manager's revision is noted first:
+        # if the user changes something before the result is applied, the
+        # result may lack that change and is thrown away (see apply_reloads)
+        with self.reload_lock:
+            revision = self.manager.revision
+            if not full and not self.manager.storage.changed():
+                return
+            try:
+                kind, records = self.manager.storage.load_changes(full)
+            except OSError:
+                return
+            self.reloads.put((revision, kind, records))
+
+    def apply_reloads(self):
+        changed = False
+        try:
+            while True:
+                revision, kind, records = self.reloads.get_nowait()
+                if revision != self.manager.revision:
+                    # Read before our latest change was saved; read it all again
+                    threading.Thread(target=self.reload_tasks, args=(True,), daemon=True).start()
+                    continue
+                self.manager.apply_changes(kind, records)
+                changed = True
+        except queue.Empty:
+            pass
+        if changed:
+            # render_rows only touches the rows whose values changed
+            self.refresh_task_list()
+
+    def poll_save_results(self):
+        try:
+            while True:
+                error = self.save_results.get_nowait()
+                if error is not None:
+                    messagebox().showerror("Error", f"Could not save tasks: {error}")
+        except queue.Empty:
+            pass
+        self.apply_reloads()
+        if date.today() != self.shown_day:
+            # Past midnight: days left and overdue flags all change
+            self.refresh_task_list()
+        self.root.after(200, self.poll_save_results)
+
+    def on_close(self):
+        # Make sure queued changes reach the disk before the window goes away
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.storage.close()
+        if metrics.profiling:
+            metrics.stop_profile(self.profile_filename)
+        self.root.destroy()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Task Tracker")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print the time spent in each startup phase")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="time load/save/sort/refresh, show the last timings at the bottom "
+                             "and append them to FILE as JSON lines")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="run under cProfile from the start and write the profile to FILE on exit "
+                             "(F9 toggles profiling at any time)")
+    parser.add_argument("--archive-after", type=int, metavar="DAYS",
+                        help="on startup, archive completed tasks due more than DAYS ago")
+    args = parser.parse_args(argv)
+    TaskTrackerGUI.archive_after = args.archive_after
+    if args.metrics:
+        metrics.enable(args.metrics)
+        metrics.export_at_exit()
+    if args.profile:
+        TaskTrackerGUI.profile_filename = args.profile
+        metrics.start_profile()
+    timer = StartupTimer(_started, enabled=args.profile_startup)
+    timer.mark("imports")
     root = tk.Tk()
-    app = TaskTrackerGUI(root)
+    timer.mark("create window")
+    app = TaskTrackerGUI(root, timer)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -1,20 +1,51 @@
-from datetime import datetime, date
-import json
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from collections.abc import Sequence
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+import heapq
+import itertools
+from operator import attrgetter, itemgetter
+import uuid
+from date_codec import ISO_FORMAT, format_date, is_valid_date, parse_date
+from task_buckets import COMPLETED, OVERDUE, TaskBuckets
+from task_metrics import metrics
+from task_recurrence import Recurrence
+from task_search import SearchIndex
+from task_storage import JsonStorage, SharedStorage
 
 class Task:
     default_date_format = "%Y-%m-%d"  # Class variable
+    # No per-instance __dict__; this matters once there are 100k+ tasks
+    __slots__ = ("name", "due", "done", "id", "repeat", "completed")
 
-    def __init__(self, name, due, done=False):
+    def __init__(self, name, due, done=False, task_id=None, repeat=None, completed=None):
         self.name = name
-        self.due = due if isinstance(due, date) else datetime.strptime(due, self.default_date_format).date()
+        self.due = self.to_date(due)
         self.done = done
+        # Unique, persistent ID. Assigned by TaskManager when the task is added.
+        self.id = task_id
+        # Recurring tasks: a Recurrence (or rule text such as "weekly", which
+        # starts the series at due). due is then the earliest occurrence not
+        # yet completed, and completed holds the dates of later occurrences
+        # that were completed ahead of it (None when there are none).
+        self.repeat = None if repeat is None else self.to_recurrence(repeat, self.due)
+        self.completed = completed or None
 
     def to_dict(self):
-        return {
+        data = {
             "name": self.name,
-            "due": self.due.strftime(self.default_date_format),
+            "due": self.format_due(self.due),
             "done": self.done
         }
+        if self.id is not None:
+            data["id"] = self.id
+        # Only recurring tasks carry these, so plain records stay as they were
+        if self.repeat is not None:
+            data["repeat"] = self.repeat.to_dict()
+        if self.completed:
+            data["completed"] = [self.format_due(day) for day in sorted(self.completed)]
+        return data
 
     @classmethod
     def from_dict(cls, data):
@@ -22,11 +53,32 @@ class Task:
         # - Receives class as cls
         # - Can access class variables (cls.default_date_format)
         # - Can create new instances of the class (cls())
-        return cls(
+        task = cls(
             name=data["name"],
-            due=datetime.strptime(data["due"], cls.default_date_format).date(),
-            done=data["done"]
+            due=data["due"],  # __init__ converts it
+            done=data["done"],
+            task_id=data.get("id")
         )
+        if "repeat" in data or "completed" in data:
+            task.repeat, task.completed = cls.recurrence_from_dict(data)
+        return task
+
+    @classmethod
+    def recurrence_from_dict(cls, data):
+        # (repeat, completed) of a stored record; (None, None) for plain tasks
+        repeat = data.get("repeat")
+        completed = data.get("completed")
+        return (Recurrence.from_dict(repeat) if repeat else None,
+                frozenset(map(cls.to_date, completed)) if completed else None)
+
+    @staticmethod
+    def to_recurrence(value, start):
+        # A Recurrence or rule text; a rule without a start begins at start
+        if isinstance(value, str):
+            return Recurrence.parse(value, start=start)
+        if value is not None and value.start is None:
+            value.start = start
+        return value
 
     @classmethod
     def create_today(cls, name):
@@ -41,11 +93,21 @@ class Task:
         # - Doesn't receive class or instance
         # - Utility function that doesn't need class state
         # - Could exist outside the class, but logically related
-        try:
-            datetime.strptime(date_string, "%Y-%m-%d")
-            return True
-        except ValueError:
-            return False
+        return is_valid_date(date_string)
+
+    @classmethod
+    def to_date(cls, value):
+        if isinstance(value, date):
+            return value
+        if cls.default_date_format == ISO_FORMAT:
+            return parse_date(value)
+        return datetime.strptime(value, cls.default_date_format).date()
+
+    @classmethod
+    def format_due(cls, value):
+        if cls.default_date_format == ISO_FORMAT:
+            return format_date(value)
+        return value.strftime(cls.default_date_format)
 
     @staticmethod
     def calculate_days_between(date1, date2):
@@ -54,92 +116,773 @@ class Task:
         # - Doesn't need class or instance state
         return (date2 - date1).days
 
+    def is_done_on(self, day):
+        # Whether the occurrence due on day is completed. Occurrences before
+        # due always are: due only moves past completed ones.
+        if self.repeat is None:
+            return self.done
+        return self.done or day < self.due or (self.completed is not None and day in self.completed)
+
     def __lt__(self, other):
         return self.due < other.due
 
+class TaskView(Sequence):
+    # Read-only window onto a list owned by the TaskManager. No copy is made,
+    # so it always reflects the current state.
+    def __init__(self, items):
+        self._items = items
+
+    def __getitem__(self, idx):
+        return self._items[idx]
+
+    def __len__(self):
+        return len(self._items)
+
+def _marks_dirty(name):
+    method = getattr(list, name)
+
+    def mutate(self, *args, **kwargs):
+        self.dirty = True
+        return method(self, *args, **kwargs)
+    mutate.__name__ = name
+    return mutate
+
+class TaskList(list):
+    # The list handed out as TaskManager.tasks. Any in-place change marks it
+    # dirty so the manager rebuilds its indexes from it on the next access,
+    # including changes that keep the length (tasks[0] = other_task).
+    dirty = False
+
+    __setitem__ = _marks_dirty("__setitem__")
+    __delitem__ = _marks_dirty("__delitem__")
+    __iadd__ = _marks_dirty("__iadd__")
+    __imul__ = _marks_dirty("__imul__")
+    append = _marks_dirty("append")
+    extend = _marks_dirty("extend")
+    insert = _marks_dirty("insert")
+    pop = _marks_dirty("pop")
+    remove = _marks_dirty("remove")
+    clear = _marks_dirty("clear")
+    sort = _marks_dirty("sort")
+    reverse = _marks_dirty("reverse")
+
+# One page of TaskManager.query results
+TaskPage = namedtuple("TaskPage", ["tasks", "offset", "limit", "has_more"])
+
+# One entry of TaskManager.agenda: a task, or one occurrence of a recurring
+# task, on the day it is due
+Occurrence = namedtuple("Occurrence", ["task", "due", "done"])
+
 class TaskManager:
-    def __init__(self, filename):
+    def __init__(self, filename, storage=None, lazy=True):
         self.filename = filename
-        self.tasks = self.load_tasks()
+        # Storage backend decides how changes hit the disk (see task_storage)
+        self.storage = storage if storage is not None else JsonStorage(filename)
+        self._sorted = []
+        self._batch_depth = 0
+        self._batch_records = []
+        self._undo = []
+        self._order_before = None
+        self._archive = None
+        # Bumped once a change made through this manager has been handed to
+        # storage; lets code that reloads in the background tell whether
+        # what it read is still current
+        self.revision = 0
+        if lazy:
+            # Nothing is read until the tasks are first needed
+            self.tasks = []
+            self._loaded = False
+        else:
+            self.tasks = self.load_tasks()
+
+    # Tasks are stored in a dict keyed by Task.id (insertion ordered), which
+    # gives O(1) lookup and removal. self.tasks is a TaskList built from it
+    # on demand for code that still works with positions.
+
+    @property
+    def tasks(self):
+        self._sync()
+        if self._task_list is None:
+            self._task_list = TaskList(self._by_id.values())
+        return self._task_list
+
+    @tasks.setter
+    def tasks(self, tasks):
+        self._task_list = None
+        self._loaded = True
+        self._index(tasks)
+
+    @property
+    def ordered_tasks(self):
+        # Tasks in due date order (ties keep insertion order), kept up to date
+        # incrementally by the mutation methods
+        self._sync()
+        return TaskView(self._sorted)
+
+    def _index(self, tasks):
+        self._by_id = {}
+        self._recurring = {}
+        for task in tasks:
+            if task.id is None or task.id in self._by_id:
+                task.id = uuid.uuid4().hex
+            self._by_id[task.id] = task
+            if task.repeat is not None:
+                self._recurring[task.id] = task
+        self._rebuild_order()
+        # Built on the first search() / buckets(), then kept up to date
+        self._search_index = None
+        self._buckets = None
+
+    def _sync(self):
+        if not self._loaded:
+            self.tasks = self.load_tasks()
+            return
+        # Code that changes self.tasks directly (append, pop, tasks[i] = ...)
+        # bypasses the indexes; pick those changes up once on the next access
+        task_list = self._task_list
+        if task_list is not None and (task_list.dirty or len(task_list) != len(self._by_id)):
+            self._index(task_list)
+            task_list.dirty = False
+            self._task_list = task_list
+
+    @metrics.timed("manager.rebuild_order")
+    def _rebuild_order(self):
+        tasks = list(self._by_id.values())
+        self._seq = len(tasks)
+        # Sorting positions by due date alone is stable, so ties keep
+        # insertion order without comparing (due, seq) tuples
+        dues = [task.due for task in tasks]
+        order = sorted(range(len(tasks)), key=dues.__getitem__)
+        self._sort_keys = [(dues[seq], seq) for seq in order]
+        # Refill in place so existing TaskViews stay live
+        self._sorted[:] = [tasks[seq] for seq in order]
+        self._key_of = {task.id: key for task, key in zip(self._sorted, self._sort_keys)}
+
+    def _insert_ordered(self, task):
+        key = (task.due, self._seq)
+        self._seq += 1
+        idx = bisect_right(self._sort_keys, key)
+        self._sort_keys.insert(idx, key)
+        self._sorted.insert(idx, task)
+        self._key_of[task.id] = key
+
+    def _insert_ordered_many(self, tasks):
+        # Bulk version of _insert_ordered: one insert into the middle of a
+        # big list is a memmove, so thousands of them are quadratic. Instead
+        # sort the new tasks and merge them in; timsort merges two sorted
+        # runs in linear time.
+        if len(tasks) < 64:
+            for task in tasks:
+                self._insert_ordered(task)
+            return
+        keyed = [((task.due, seq), task) for seq, task in enumerate(tasks, self._seq)]
+        self._seq += len(tasks)
+        keyed.sort(key=itemgetter(0))
+        for key, task in keyed:
+            self._key_of[task.id] = key
+        merged = list(zip(self._sort_keys, self._sorted))
+        merged.extend(keyed)
+        merged.sort(key=itemgetter(0))
+        self._sort_keys[:] = [key for key, task in merged]
+        self._sorted[:] = [task for key, task in merged]
+
+    def _remove_ordered(self, task):
+        key = self._key_of.pop(task.id)
+        idx = bisect_left(self._sort_keys, key)
+        del self._sort_keys[idx]
+        del self._sorted[idx]
+
+    def _add(self, task, ordered=True):
+        # ordered=False leaves the order index to the caller, who must call
+        # _insert_ordered_many() for the task
+        if task.id is None or task.id in self._by_id:
+            task.id = uuid.uuid4().hex
+        self._by_id[task.id] = task
+        if task.repeat is not None:
+            self._recurring[task.id] = task
+        if ordered:
+            self._insert_ordered(task)
+        if self._search_index is not None:
+            self._search_index.add(task.id, task.name)
+        if self._buckets is not None:
+            self._buckets.update(task)
+        if self._task_list is not None:
+            # list.append: a change the indexes already know about
+            list.append(self._task_list, task)
+
+    def _discard(self, task):
+        del self._by_id[task.id]
+        self._recurring.pop(task.id, None)
+        self._remove_ordered(task)
+        if self._search_index is not None:
+            self._search_index.remove(task.id)
+        if self._buckets is not None:
+            self._buckets.remove(task.id)
+        self._task_list = None
 
     def validate_date(self, date_str):
         try:
-            return datetime.strptime(date_str, "%Y-%m-%d").date()
+            return parse_date(date_str)
         except ValueError:
             return None
 
+    @metrics.timed("manager.load")
     def load_tasks(self):
-        try:
-            with open(self.filename, "r") as file:
-                tasks_data = json.load(file)
-                return [Task.from_dict(task_data) for task_data in tasks_data]
-        except (FileNotFoundError, json.JSONDecodeError):
+        load_columns = getattr(self.storage, "load_columns", None)
+        if load_columns is not None:
+            # Binary snapshots come as columns, no dict per task needed
+            names, dues, done, ids, extras = load_columns()
+            tasks = list(map(Task, names, dues, done, ids))
+            for pos, extra in extras.items():
+                # The few tasks with fields beyond the four columns
+                tasks[pos] = Task.from_dict(dict(extra, name=names[pos], due=dues[pos],
+                                                 done=done[pos], id=ids[pos]))
+            return tasks
+        return [Task.from_dict(task_data) for task_data in self.storage.load()]
+
+    def iter_load_tasks(self):
+        # Yields tasks from the file as they are parsed, without keeping them
+        for task_data in self.storage.iter_load():
+            yield Task.from_dict(task_data)
+
+    def load_store(self):
+        # Read the file into a columnar TaskStore instead of Task objects,
+        # for bulk filtering/sorting of very large files
+        from task_store import TaskStore
+        self.flush()
+        return TaskStore.from_records(self.storage.load())
+
+    @property
+    def archive(self):
+        # Old completed tasks live in gzip segments next to the task file
+        # (see task_archive); opened on first use
+        if self._archive is None:
+            from task_archive import TaskArchive
+            self._archive = TaskArchive(self.filename + ".archive")
+        return self._archive
+
+    @metrics.timed("manager.archive_completed")
+    def archive_completed(self, older_than=30, today=None):
+        # Moves completed tasks due more than older_than days before today
+        # to the archive and returns them. Tasks carry no completion date,
+        # so the due date stands in for their age. The archive is written
+        # first: a crash in between leaves tasks in both places rather than
+        # in neither; iter_archived() hides such copies and the next run
+        # does not archive them twice.
+        cutoff = (today or date.today()) - timedelta(days=older_than)
+        old = self.query(done=True, due_before=cutoff).tasks
+        if not old:
             return []
+        self.archive.add([task.to_dict() for task in old])
+        return self.remove_tasks([task.id for task in old])
+
+    def iter_archived(self, due_after=None, due_before=None, name_contains=None):
+        # Archived tasks, lazily, segment by segment. Dates are exclusive
+        # bounds; name_contains matches like search().
+        due_after = Task.format_due(Task.to_date(due_after)) if due_after is not None else None
+        due_before = Task.format_due(Task.to_date(due_before)) if due_before is not None else None
+        if name_contains:
+            records = self.archive.search(name_contains, due_after, due_before)
+        else:
+            records = self.archive.iter_records(due_after, due_before)
+        for record in records:
+            if self.get_task(record["id"]) is None:
+                yield Task.from_dict(record)
 
+    @metrics.timed("manager.save")
     def save_tasks(self):
-        tasks_to_save = [task.to_dict() for task in self.tasks]
-        with open(self.filename, "w") as file:
-            json.dump(tasks_to_save, file, indent=2)
+        # Full write of all tasks. Needed after changing self.tasks directly,
+        # since only the methods below are journaled.
+        self._sync()
+        self._adopt(self.storage.save(self._by_id.values()))
+
+    def flush(self):
+        # Wait for pending writes (only matters for write-behind storage)
+        self.storage.flush()
+
+    def close(self):
+        self.storage.close()
 
+    @metrics.timed("manager.sort_tasks")
     def sort_tasks(self):
-        return sorted(self.tasks)
+        return list(self.ordered_tasks)
 
-    def show_tasks(self):
-        if not self.tasks:
-            print("No tasks yet.")
+    @metrics.timed("manager.query")
+    def query(self, done=None, due_before=None, due_after=None, name_contains=None,
+              order="due", offset=0, limit=None):
+        # Returns one page of matching tasks. Dates are exclusive bounds.
+        # order="due" walks the ordered index, starting at due_after thanks to
+        # bisect; order="added" keeps insertion order and, if nothing has been
+        # loaded yet, streams the file and stops as soon as the page is full.
+        if order not in ("due", "added"):
+            raise ValueError(f"Unknown order: {order}")
+        due_before = Task.to_date(due_before) if due_before is not None else None
+        due_after = Task.to_date(due_after) if due_after is not None else None
+        needle = name_contains.lower() if name_contains else None
+
+        if order == "added":
+            if self._loaded:
+                # Picks up direct changes to self.tasks, as for order="due"
+                self._sync()
+                candidates = self._by_id.values()
+            else:
+                candidates = self.iter_load_tasks()
+        else:
+            self._sync()
+            start = 0
+            if due_after is not None:
+                start = bisect_right(self._sort_keys, (due_after, float("inf")))
+            candidates = (self._sorted[idx] for idx in range(start, len(self._sorted)))
+
+        tasks = []
+        skipped = 0
+        has_more = False
+        for task in candidates:
+            if due_before is not None and task.due >= due_before:
+                if order == "due":
+                    break
+                continue
+            if due_after is not None and task.due <= due_after:
+                continue
+            if done is not None and task.done != done:
+                continue
+            if needle is not None and needle not in task.name.lower():
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            if limit is not None and len(tasks) >= limit:
+                has_more = True
+                break
+            tasks.append(task)
+        return TaskPage(tasks, offset, limit, has_more)
+
+    @metrics.timed("manager.search")
+    def search(self, text, limit=None):
+        # Tasks with a word starting with each word of text, in due order
+        return self._ordered_hits(self._search_ids(text), limit)
+
+    def search_window(self, text, limit):
+        # (first limit hits of search(text), total number of hits); for a
+        # view that only shows a window of the results
+        ids = self._search_ids(text)
+        return self._ordered_hits(ids, limit), len(ids)
+
+    def _search_ids(self, text):
+        self._sync()
+        if self._search_index is None:
+            self._search_index = SearchIndex()
+            for task in self._by_id.values():
+                self._search_index.add(task.id, task.name)
+        return self._search_index.search(text)
+
+    def _ordered_hits(self, ids, limit):
+        # Many hits: cheaper to walk the ordered view than to sort the hits
+        if limit is None and len(ids) * 16 > len(self._sorted):
+            return [task for task in self._sorted if task.id in ids]
+        if limit is not None and limit * len(self._sorted) < len(ids) ** 2:
+            return list(itertools.islice((task for task in self._sorted if task.id in ids), limit))
+        key = self._key_of.__getitem__
+        ordered = sorted(ids, key=key) if limit is None else heapq.nsmallest(limit, ids, key=key)
+        return [self._by_id[task_id] for task_id in ordered]
+
+    def show_tasks(self, offset=0, limit=None):
+        page = self.query(offset=offset, limit=limit)
+        if not page.tasks:
+            print("No tasks yet." if offset == 0 else "No more tasks.")
         else:
             print("\nTasks:")
             print("-" * 60)
-            sorted_tasks = self.sort_tasks()
-            for idx, task in enumerate(sorted_tasks, 1):
-                days_left = (task.due - date.today()).days
-                status = "Overdue!" if days_left < 0 and not task.done else f"{days_left} days left"
+            buckets = self.buckets()
+            for idx, task in enumerate(page.tasks, offset + 1):
+                info = buckets.info(task)
+                status = info.status
+                if info.bucket not in (OVERDUE, COMPLETED):
+                    status += " left"
                 
                 completion_mark = "✓" if task.done else " "
-                
-                if task.done:
-                    status = "Completed"
                     
-                print(f"{idx}. [{completion_mark}] {task.name} (Due: {task.due.strftime('%Y-%m-%d')}) - {status}")
+                print(f"{idx}. [{completion_mark}] {task.name} (Due: {info.due_text}) - {status}")
+            if page.has_more:
+                print(f"... showing {offset + 1}-{offset + len(page.tasks)}, more tasks follow")
             print("-" * 60)
+        return page
+
+    def agenda(self, start=None, end=None):
+        # Yields an Occurrence for every task due in [start, end), in due
+        # order. Recurring tasks give one per occurrence: each rule is a lazy
+        # generator merged with the ordered index, so the series is never
+        # built, and end=None goes on forever (take what you need with
+        # itertools.islice). Don't change tasks while iterating.
+        self._sync()
+        start = Task.to_date(start) if start is not None else None
+        end = Task.to_date(end) if end is not None else None
+        single = self._agenda_single(start, end)
+        series = [self._agenda_series(task, start, end) for task in self._recurring.values()]
+        if not series:
+            return single
+        return heapq.merge(single, *series, key=attrgetter("due"))
 
-    def add_task(self, name, due):
-        task = Task(name, due)
-        self.tasks.append(task)
-        self.save_tasks()
+    def _agenda_single(self, start, end):
+        first = 0 if start is None else bisect_left(self._sort_keys, (start, -1))
+        for idx in range(first, len(self._sorted)):
+            task = self._sorted[idx]
+            if end is not None and task.due >= end:
+                return
+            if task.repeat is None:
+                yield Occurrence(task, task.due, task.done)
+
+    def _agenda_series(self, task, start, end):
+        for day in task.repeat.occurrences(start, end):
+            yield Occurrence(task, day, task.is_done_on(day))
+
+    def buckets(self):
+        # Days left / status per task and the overdue, due today, upcoming and
+        # completed groups with their counts (see task_buckets). Computed once,
+        # then updated per changed task and when the date rolls over.
+        self._sync()
+        if self._buckets is None:
+            self._buckets = TaskBuckets(self._by_id.values())
+        else:
+            self._buckets.roll_over()
+        return self._buckets
+
+    def get_task(self, task_id):
+        self._sync()
+        return self._by_id.get(task_id)
+
+    def count(self):
+        # Number of tasks, without building self.tasks
+        self._sync()
+        return len(self._by_id)
+
+    @metrics.timed("manager.add_task")
+    def add_task(self, name, due, repeat=None):
+        # repeat: a Recurrence or rule text ("weekly", "every 3 days", ...)
+        task = Task(name, due, repeat=repeat)
+        self._sync()
+        self._add(task)
+        self._log("add", {"task": task.to_dict()}, ("add", task))
+        return task
 
     def remove_task(self, idx):
-        if 0 <= idx < len(self.tasks):
-            removed_task = self.tasks.pop(idx)
-            self.save_tasks()
-            return removed_task
+        # Position in self.tasks; prefer remove_task_by_id
+        tasks = self.tasks
+        if 0 <= idx < len(tasks):
+            return self.remove_task_by_id(tasks[idx].id)
         return None
 
+    @metrics.timed("manager.remove_task")
+    def remove_task_by_id(self, task_id):
+        task = self.get_task(task_id)
+        if task is None:
+            return None
+        if self._batch_depth and self._order_before is None:
+            # Lets a rollback put removed tasks back where they were
+            self._order_before = list(self._by_id)
+        self._discard(task)
+        self._log("remove", {"id": task_id}, ("remove", task))
+        return task
+
     def mark_complete(self, idx):
-        if 0 <= idx < len(self.tasks):
-            self.tasks[idx].done = True
-            self.save_tasks()
-            return True
+        # Position in self.tasks; prefer mark_complete_by_id
+        tasks = self.tasks
+        if 0 <= idx < len(tasks):
+            return self.mark_complete_by_id(tasks[idx].id)
         return False
 
+    @metrics.timed("manager.mark_complete")
+    def mark_complete_by_id(self, task_id):
+        task = self.get_task(task_id)
+        if task is None:
+            return False
+        if task.repeat is not None:
+            # Completes the current occurrence, not the series
+            return self.complete_occurrence(task_id)
+        undo = self._undo_entry(task)
+        self._set_fields(task, None, None, True)
+        self._log("complete", {"id": task_id}, undo)
+        return True
+
+    @metrics.timed("manager.complete_occurrence")
+    def complete_occurrence(self, task_id, day=None):
+        # Marks one occurrence of a recurring task done (default: the current
+        # one, task.due). Completing the current occurrence moves due on to
+        # the next open one; completing a later one just records its date.
+        # The series is done once its last occurrence is.
+        task = self.get_task(task_id)
+        if task is None:
+            return False
+        rule = task.repeat
+        if rule is None:
+            return self.mark_complete_by_id(task_id) if day is None or Task.to_date(day) == task.due else False
+        day = task.due if day is None else Task.to_date(day)
+        if not rule.is_occurrence(day):
+            return False
+        if task.is_done_on(day):
+            return True
+        undo = self._undo_entry(task)
+        due, done, completed = self._occurrence_done(task, day)
+        self._set_fields(task, None, due, done)
+        self._set_recurrence(task, rule, completed)
+        self._log("update", {"task": task.to_dict()}, undo)
+        return True
+
+    @staticmethod
+    def _occurrence_done(task, day):
+        # (due, done, completed) of a recurring task once its occurrence on
+        # day is done
+        rule = task.repeat
+        completed = set(task.completed or ())
+        done = False
+        due = task.due
+        if day == task.due:
+            due = rule.next_after(day)
+            while due is not None and due in completed:
+                due = rule.next_after(due)
+            if due is None:
+                due, done = day, True
+            completed = {other for other in completed if other > due}
+        else:
+            completed.add(day)
+        return due, done, frozenset(completed) or None
+
+    @metrics.timed("manager.update_task")
+    def update_task(self, task_id, name=None, due=None, done=None, repeat=None):
+        # repeat: a Recurrence or rule text to make the task recurring (the
+        # series starts at its due date), False to stop it recurring
+        task = self.get_task(task_id)
+        if task is None:
+            return None
+        # Parse everything first so bad input leaves the task untouched
+        due = None if due is None else Task.to_date(due)
+        if repeat is not None and repeat is not False:
+            repeat = Task.to_recurrence(repeat, due or task.due)
+        undo = self._undo_entry(task)
+        self._set_fields(task, name, due, done)
+        if repeat is False:
+            self._set_recurrence(task, None, None)
+        elif repeat is not None:
+            self._set_recurrence(task, repeat, None)
+        self._log("update", {"task": task.to_dict()}, undo)
+        return task
+
+    @staticmethod
+    def _undo_entry(task):
+        return ("update", task, task.name, task.due, task.done, task.repeat, task.completed)
+
+    def _set_recurrence(self, task, repeat, completed):
+        task.repeat = repeat
+        task.completed = completed
+        if repeat is None:
+            self._recurring.pop(task.id, None)
+        else:
+            self._recurring[task.id] = task
+
+    def _set_fields(self, task, name, due, done):
+        if name is not None and name != task.name:
+            task.name = name
+            if self._search_index is not None:
+                self._search_index.add(task.id, name)
+        if due is not None and due != task.due:
+            self._remove_ordered(task)
+            task.due = due
+            self._insert_ordered(task)
+        if done is not None:
+            task.done = done
+        if self._buckets is not None:
+            self._buckets.update(task)
+
+    # Batches: inside "with manager.batch():" changes are applied in memory
+    # right away, but written to storage once when the outermost batch ends.
+    # If the block raises, every change made in it is undone.
+
+    @contextmanager
+    def batch(self):
+        self._sync()
+        undo_mark = len(self._undo)
+        record_mark = len(self._batch_records)
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._rollback(undo_mark)
+            del self._batch_records[record_mark:]
+            raise
+        finally:
+            self._batch_depth -= 1
+        if self._batch_depth == 0:
+            records, self._batch_records = self._batch_records, []
+            self._undo = []
+            self._order_before = None
+            if records:
+                with metrics.timer("storage.log_batch"):
+                    result = self.storage.log_batch(self._by_id.values(), records)
+                self._adopt(result)
+                self.revision += 1
+
+    @metrics.timed("manager.add_tasks")
+    def add_tasks(self, items):
+        # items are Task objects or (name, due) pairs
+        added = []
+        with self.batch():
+            try:
+                for item in items:
+                    task = item if isinstance(item, Task) else Task(*item)
+                    self._add(task, ordered=False)
+                    self._log("add", {"task": task.to_dict()}, ("add", task))
+                    added.append(task)
+            finally:
+                # Also on errors, so a rollback finds the tasks in the index
+                self._insert_ordered_many(added)
+        return added
+
+    @metrics.timed("manager.remove_tasks")
+    def remove_tasks(self, task_ids):
+        removed = []
+        with self.batch():
+            for task_id in task_ids:
+                task = self.remove_task_by_id(task_id)
+                if task is not None:
+                    removed.append(task)
+        return removed
+
+    @metrics.timed("manager.complete_tasks")
+    def complete_tasks(self, task_ids):
+        with self.batch():
+            return sum(1 for task_id in task_ids if self.mark_complete_by_id(task_id))
+
+    def _log(self, op, data, undo):
+        if self._batch_depth:
+            self._batch_records.append(dict(data, op=op))
+            self._undo.append(undo)
+        else:
+            with metrics.timer("storage.log"):
+                result = self.storage.log(self._by_id.values(), op, data)
+            self._adopt(result)
+            self.revision += 1
+
+    @metrics.timed("manager.reload")
+    def reload_if_changed(self):
+        # Picks up changes other processes made to the file. Costs one stat
+        # call when nothing changed.
+        if not self._loaded or not self.storage.changed():
+            return False
+        self.apply_changes(*self.storage.load_changes())
+        return True
+
+    @metrics.timed("manager.apply_changes")
+    def apply_changes(self, kind, records):
+        # Takes the result of storage.load_changes(): either every record on
+        # disk ("full") or only the journal records appended since our last
+        # read ("delta"), which are applied one by one
+        if kind == "full":
+            self._adopt(records)
+            return
+        for record in records:
+            op = record["op"]
+            if op in ("add", "update"):
+                data = record["task"]
+                task = self._by_id.get(data["id"])
+                if task is None:
+                    self._add(Task.from_dict(data))
+                else:
+                    self._set_fields(task, data["name"], Task.to_date(data["due"]), data["done"])
+                    self._set_recurrence(task, *Task.recurrence_from_dict(data))
+            elif record["id"] in self._by_id:
+                task = self._by_id[record["id"]]
+                if op == "remove":
+                    self._discard(task)
+                elif op == "complete":
+                    self._set_fields(task, None, None, True)
+
+    def _adopt(self, records):
+        # Storage returns records when the file on disk won (SharedStorage
+        # merged a conflicting change); make them ours, keeping the existing
+        # Task objects for tasks we already had
+        if records is None:
+            return
+        tasks = []
+        for record in records:
+            task = self._by_id.get(record["id"])
+            if task is None:
+                task = Task.from_dict(record)
+            else:
+                task.name = record["name"]
+                task.due = Task.to_date(record["due"])
+                task.done = record["done"]
+                if task.repeat is not None or "repeat" in record:
+                    task.repeat, task.completed = Task.recurrence_from_dict(record)
+            tasks.append(task)
+        self.tasks = tasks
+
+    def _rollback(self, undo_mark):
+        restored = False
+        while len(self._undo) > undo_mark:
+            entry = self._undo.pop()
+            kind, task = entry[0], entry[1]
+            if kind == "add":
+                self._discard(task)
+            elif kind == "remove":
+                self._add(task)
+                restored = True
+            else:
+                self._set_fields(task, *entry[2:5])
+                self._set_recurrence(task, *entry[5:])
+        if restored and self._order_before is not None:
+            position = {task_id: pos for pos, task_id in enumerate(self._order_before)}
+            last = len(position)
+            ordered = sorted(self._by_id, key=lambda task_id: position.get(task_id, last))
+            self._by_id = {task_id: self._by_id[task_id] for task_id in ordered}
+            self._task_list = None
+            # Restored tasks were re-added with new sequence numbers; ties
+            # in ordered_tasks follow insertion order again
+            self._rebuild_order()
+
+# Tasks per page in the menu
+PAGE_SIZE = 20
+
+def page_tasks(manager, prompt=None):
+    # Shows the tasks PAGE_SIZE at a time and returns the answer to prompt
+    # ("" without one); an empty answer shows the next page, if any
+    offset = 0
+    while True:
+        page = manager.show_tasks(offset, PAGE_SIZE)
+        if not page.has_more:
+            return input(f"{prompt}: ") if prompt else ""
+        if prompt:
+            answer = input(f"{prompt} (Enter for more): ")
+        else:
+            answer = input("Press Enter for more, anything else to stop: ")
+        if answer.strip():
+            return answer if prompt else ""
+        offset += PAGE_SIZE
+
+def pick_task(manager, number):
+    # show_tasks numbers tasks in due date order, starting at 1
+    idx = int(number) - 1
+    ordered = manager.ordered_tasks
+    return ordered[idx] if 0 <= idx < len(ordered) else None
+
 def main():
-    manager = TaskManager("tasks.txt")
+    # Other instances may use the same file at the same time
+    manager = TaskManager("tasks.txt", storage=SharedStorage(JsonStorage("tasks.txt")))
 
     while True:
         print("\n[1] Show tasks\n[2] Add task\n[3] Remove task\n[4] Mark complete\n[5] Exit")
         choice = input("Choose an option: ")
+        manager.reload_if_changed()
 
         if choice == "1":
-            manager.show_tasks()
+            page_tasks(manager)
         elif choice == "2":
             name = input("Enter task: ")
             due = input("Enter due date (YYYY-MM-DD): ")
             manager.add_task(name, due)
         elif choice == "3":
-            manager.show_tasks()
             try:
-                idx = int(input("Enter task number to remove: ")) - 1
-                removed_task = manager.remove_task(idx)
+                task = pick_task(manager, page_tasks(manager, "Enter task number to remove"))
+                removed_task = manager.remove_task_by_id(task.id) if task else None
                 if removed_task:
                     print(f"Removed: {removed_task.name}")
                 else:
@@ -147,10 +890,9 @@ def main():
             except ValueError:
                 print("Please enter a valid number.")
         elif choice == "4":
-            manager.show_tasks()
             try:
-                idx = int(input("Enter task number to mark complete: ")) - 1
-                if manager.mark_complete(idx):
+                task = pick_task(manager, page_tasks(manager, "Enter task number to mark complete"))
+                if task and manager.mark_complete_by_id(task.id):
                     pass
                 else:
                     print("Invalid number.")
@@ -0,0 +1,136 @@
+import os
+import select
+import struct
+import sys
+import threading
+from task_storage import file_version
+
+# Notifies about changes to the task files made by other programs, so a
+# window can reload without re-reading the file on a timer.
+#
+# On Linux the kernel tells us through inotify (called with ctypes, so no
+# extra package is needed). Anywhere else, or if inotify is not available,
+# the files are stat()ed every `interval` seconds instead, which is cheap
+# but can notice a change up to `interval` late.
+
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    # ctypes.util pulls in subprocess; only pay for it where it is used
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    # callback() is called from the watcher's own thread, once per burst of
+    # changes (writes within `debounce` seconds are reported together).
+    # Files may be missing, replaced with os.replace or appended to.
+
+    def __init__(self, paths, callback, interval=1.0, debounce=0.05, use_inotify=True):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self._libc = _load_inotify() if use_inotify else None
+        self.mode = None
+        self._stop = threading.Event()
+        self._names = {}
+        self._wake = None
+        self._thread = None
+
+    def start(self):
+        # Watches are set up before returning, so no change made after
+        # start() is missed
+        fd = self._open_inotify() if self._libc is not None else None
+        if fd is not None:
+            self.mode = "inotify"
+            self._wake = os.pipe()
+            target, args = self._run_inotify, (fd,)
+        else:
+            self.mode = "poll"
+            target, args = self._run_poll, ({path: file_version(path) for path in self.paths},)
+        self._thread = threading.Thread(target=target, args=args, name="task-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._wake is not None:
+            os.write(self._wake[1], b"x")
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._wake is not None:
+            for fd in self._wake:
+                os.close(fd)
+            self._wake = None
+
+    def _open_inotify(self):
+        # Directories are watched rather than the files themselves: an atomic
+        # save replaces the file, and a watch on the old inode would go quiet
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        self._names = {}
+        for directory in sorted({os.path.dirname(path) for path in self.paths}):
+            wd = self._libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                os.close(fd)
+                return None
+            self._names[wd] = {os.fsencode(os.path.basename(path)) for path in self.paths
+                               if os.path.dirname(path) == directory}
+        return fd
+
+    def _run_inotify(self, fd):
+        wake = self._wake[0]
+        try:
+            while not self._stop.is_set():
+                ready = select.select([fd, wake], [], [])[0]
+                if fd not in ready or not self._read_events(fd):
+                    continue
+                # Let the rest of the burst arrive, then report it once
+                if self._stop.wait(self.debounce):
+                    break
+                self._read_events(fd)
+                self.callback()
+        finally:
+            os.close(fd)
+
+    def _read_events(self, fd):
+        # True if any pending event is about one of our files
+        matched = False
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return matched
+            pos = 0
+            while pos < len(data):
+                wd, mask, cookie, size = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + size].rstrip(b"\0")
+                pos += _EVENT.size + size
+                if name in self._names.get(wd, ()):
+                    matched = True
+
+    def _run_poll(self, versions):
+        while not self._stop.wait(self.interval):
+            current = {path: file_version(path) for path in self.paths}
+            if current != versions:
+                versions = current
+                self.callback()
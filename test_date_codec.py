@@ -0,0 +1,23 @@
+import unittest
+from datetime import date, datetime
+from date_codec import format_date, is_valid_date, parse_date
+
+class TestDateCodec(unittest.TestCase):
+    def test_matches_strptime(self):
+        samples = ["2025-05-20", "2025-5-2", "2024-02-29", "2025-02-29", "05-20-2025",
+                   "20250520", "2025-W01-1", " 2025-05-20", "+202-05-01", "invalid"]
+        for text in samples:
+            try:
+                expected = datetime.strptime(text, "%Y-%m-%d").date()
+            except ValueError:
+                expected = None
+            self.assertEqual(is_valid_date(text), expected is not None, text)
+            if expected is not None:
+                self.assertEqual(parse_date(text), expected)
+
+    def test_format_date(self):
+        self.assertEqual(format_date(date(2025, 5, 2)), "2025-05-02")
+        self.assertEqual(format_date(parse_date("2025-5-2")), "2025-05-02")
+
+if __name__ == "__main__":
+    unittest.main()
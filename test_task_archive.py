@@ -0,0 +1,78 @@
+import unittest
+import gzip
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+from task_archive import TaskArchive
+from task_tracker_oop import TaskManager
+
+class TestTaskArchive(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.archive = TaskArchive(os.path.join(self.test_dir, "tasks.json.archive"), durable=False)
+        self.archive.segment_size = 4
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def records(self, count):
+        return [{"name": f"Report {idx}" if idx % 2 else f"Call {idx}", "due": f"2024-01-{idx + 1:02d}",
+                 "done": True, "id": f"t{idx}"} for idx in range(count)]
+
+    def test_segments_and_lazy_reads(self):
+        self.assertEqual(list(self.archive.iter_records()), [])
+        records = self.records(10)
+        self.assertEqual(self.archive.add(reversed(records)), 10)
+        self.assertEqual(self.archive.add(self.records(0)), 0)
+        # Already archived (a crash before the tasks left the task file);
+        # found in the ID lists, without decompressing segments
+        with mock.patch("task_archive.gzip.open", wraps=gzip.open) as opened:
+            self.assertEqual(self.archive.add(records[2:5] + records[2:3]), 0)
+        self.assertEqual(opened.call_count, 0)
+        self.assertEqual([segment["count"] for segment in self.archive.segments()], [4, 4, 2])
+        self.assertEqual(len(self.archive), 10)
+        self.assertEqual(list(self.archive.iter_records()), records)
+
+        # Only the segment covering the window is opened
+        with mock.patch("task_archive.gzip.open", wraps=gzip.open) as opened:
+            window = list(self.archive.iter_records(due_after="2024-01-05", due_before="2024-01-08"))
+        self.assertEqual([record["id"] for record in window], ["t5", "t6"])
+        self.assertEqual(opened.call_count, 1)
+
+        self.assertEqual([record["id"] for record in self.archive.search("rep 3")], ["t3"])
+
+    def test_segments_without_id_lists(self):
+        records = self.records(6)
+        self.archive.add(records[:4])
+        for name in os.listdir(self.archive.directory):
+            if name.endswith(".ids"):
+                os.remove(os.path.join(self.archive.directory, name))
+        self.assertEqual(self.archive.add(records), 2)
+        self.assertEqual(list(self.archive.iter_records()), records)
+
+    def test_manager_archives_old_completed_tasks(self):
+        filename = os.path.join(self.test_dir, "tasks.json")
+        manager = TaskManager(filename)
+        old = manager.add_task("Old report", "2024-01-01")
+        recent = manager.add_task("Recent", "2024-03-01")
+        manager.add_task("Open", "2023-01-01")
+        manager.complete_tasks([old.id, recent.id])
+        # A previous run got as far as the archive
+        manager.archive.add([old.to_dict()])
+
+        moved = manager.archive_completed(older_than=30, today=date(2024, 3, 10))
+        self.assertEqual(moved, [old])
+        self.assertEqual([t.name for t in TaskManager(filename).tasks], ["Recent", "Open"])
+        self.assertEqual(len(manager.archive), 1)
+        self.assertEqual([t.id for t in manager.iter_archived()], [old.id])
+        self.assertEqual([t.name for t in manager.iter_archived(name_contains="rep")], ["Old report"])
+        self.assertEqual(list(manager.iter_archived(due_after="2024-01-01")), [])
+
+        # Left in both places by a crash: the hot copy wins
+        manager.archive.add([recent.to_dict()])
+        self.assertEqual([t.id for t in manager.iter_archived()], [old.id])
+
+if __name__ == "__main__":
+    unittest.main()
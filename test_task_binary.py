@@ -0,0 +1,78 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from datetime import date
+from task_binary import BinaryStorage, main
+from task_tracker_oop import TaskManager
+
+class TestBinaryStorage(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.binary_file = os.path.join(self.test_dir, "tasks.tdb")
+        self.json_file = os.path.join(self.test_dir, "tasks.json")
+        self.records = [{"name": "Größe ✓ task", "due": "2025-05-20", "done": True, "id": "a"},
+                        {"name": "", "due": "1999-12-31", "done": False, "id": "b"},
+                        {"name": "Third", "due": "2025-05-20", "done": False, "id": "c"}]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_round_trip(self):
+        storage = BinaryStorage(self.binary_file)
+        self.assertEqual(storage.load(), [])
+        storage.write(self.records)
+        self.assertEqual(BinaryStorage(self.binary_file).load(), self.records)
+
+    def test_manager(self):
+        manager = TaskManager(self.binary_file, storage=BinaryStorage(self.binary_file))
+        task = manager.add_task("Task 1", "2025-05-20")
+        manager.add_task("Task 2", "2025-05-19")
+        manager.mark_complete_by_id(task.id)
+
+        reopened = TaskManager(self.binary_file, storage=BinaryStorage(self.binary_file))
+        self.assertEqual([t.name for t in reopened.ordered_tasks], ["Task 2", "Task 1"])
+        self.assertEqual(reopened.get_task(task.id).due, date(2025, 5, 20))
+        self.assertTrue(reopened.get_task(task.id).done)
+
+    def test_recurring_tasks(self):
+        manager = TaskManager(self.binary_file, storage=BinaryStorage(self.binary_file))
+        manager.add_task("Plain", "2025-05-20")
+        task = manager.add_task("Standup", "2025-05-19", repeat="daily")
+        manager.complete_occurrence(task.id, "2025-05-21")
+
+        reopened = TaskManager(self.binary_file, storage=BinaryStorage(self.binary_file))
+        copy = reopened.get_task(task.id)
+        self.assertEqual(str(copy.repeat), "daily")
+        self.assertEqual(copy.completed, frozenset([date(2025, 5, 21)]))
+        self.assertEqual(BinaryStorage(self.binary_file).load()[1]["repeat"]["unit"], "day")
+
+    def test_damage_is_detected(self):
+        BinaryStorage(self.binary_file).write(self.records)
+        with open(self.binary_file, "r+b") as file:
+            file.seek(-3, 2)
+            file.write(b"xyz")
+        with self.assertRaisesRegex(ValueError, "checksum"):
+            BinaryStorage(self.binary_file).load()
+
+        with open(self.binary_file, "wb") as file:
+            file.write(b"[]")
+        with self.assertRaises(ValueError):
+            BinaryStorage(self.binary_file).load()
+
+    def test_records_without_ids(self):
+        BinaryStorage(self.binary_file).write([{"name": "Old", "due": "2025-05-20", "done": False}])
+        self.assertEqual(BinaryStorage(self.binary_file).load()[0]["id"], "legacy-0")
+
+    def test_converter(self):
+        with open(self.json_file, "w") as file:
+            json.dump(self.records, file)
+        self.assertEqual(main(["to-binary", self.json_file, self.binary_file]), 0)
+        os.remove(self.json_file)
+        self.assertEqual(main(["to-json", self.binary_file, self.json_file]), 0)
+        with open(self.json_file) as file:
+            self.assertEqual(json.load(file), self.records)
+
+if __name__ == "__main__":
+    unittest.main()
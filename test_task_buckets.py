@@ -0,0 +1,61 @@
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import date
+from task_buckets import COMPLETED, DUE_TODAY, OVERDUE, UPCOMING, TaskBuckets
+from task_tracker_oop import Task, TaskManager
+
+class TestTaskBuckets(unittest.TestCase):
+    def setUp(self):
+        self.tasks = [
+            Task("Late", "2025-05-01", task_id="a"),
+            Task("Today", "2025-05-10", task_id="b"),
+            Task("Soon", "2025-05-12", task_id="c"),
+            Task("Done", "2025-05-02", done=True, task_id="d"),
+            Task("Later", "2025-05-11", task_id="e"),
+        ]
+        self.buckets = TaskBuckets(self.tasks, today=date(2025, 5, 10))
+
+    def test_info_and_counts(self):
+        self.assertEqual(self.buckets.info(self.tasks[0]), (-9, OVERDUE, "2025-05-01", "Overdue!"))
+        self.assertEqual(self.buckets.info(self.tasks[2]).status, "2 days")
+        self.assertEqual(self.buckets.info(self.tasks[3]).status, "Completed")
+        self.assertEqual(self.buckets.counts(),
+                         {OVERDUE: 1, DUE_TODAY: 1, UPCOMING: 2, COMPLETED: 1})
+        self.assertEqual([t.name for t in self.buckets.tasks(UPCOMING)], ["Later", "Soon"])
+
+    def test_update_and_remove(self):
+        self.tasks[0].done = True
+        self.buckets.update(self.tasks[0])
+        self.buckets.remove("c")
+        self.assertEqual(self.buckets.count(OVERDUE), 0)
+        self.assertEqual([t.name for t in self.buckets.tasks(COMPLETED)], ["Late", "Done"])
+        self.assertEqual([t.name for t in self.buckets.tasks(UPCOMING)], ["Later"])
+
+    def test_roll_over(self):
+        self.assertFalse(self.buckets.roll_over(date(2025, 5, 10)))
+        self.assertTrue(self.buckets.roll_over(date(2025, 5, 11)))
+        self.assertEqual(self.buckets.counts(),
+                         {OVERDUE: 2, DUE_TODAY: 1, UPCOMING: 1, COMPLETED: 1})
+        self.assertEqual(self.buckets.info(self.tasks[2]).days_left, 1)
+
+    def test_manager_keeps_buckets_current(self):
+        test_dir = tempfile.mkdtemp()
+        try:
+            manager = TaskManager(os.path.join(test_dir, "tasks.json"))
+            task = manager.add_task("Task 1", date.today())
+            self.assertEqual(manager.buckets().count(DUE_TODAY), 1)
+
+            manager.add_task("Task 2", "2000-01-01")
+            manager.mark_complete_by_id(task.id)
+            counts = manager.buckets().counts()
+            self.assertEqual((counts[DUE_TODAY], counts[OVERDUE], counts[COMPLETED]), (0, 1, 1))
+
+            manager.remove_task(1)
+            self.assertEqual(manager.buckets().count(OVERDUE), 0)
+        finally:
+            shutil.rmtree(test_dir)
+
+if __name__ == "__main__":
+    unittest.main()
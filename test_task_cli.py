@@ -0,0 +1,136 @@
+import unittest
+import io
+import os
+import json
+import shutil
+import tempfile
+from contextlib import redirect_stderr
+from unittest import mock
+from task_cli import main
+from task_storage import JournalStorage
+from task_tracker_oop import TaskManager
+
+class TestTaskCli(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "tasks.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_cli(self, *argv, stdin=""):
+        out = io.StringIO()
+        with mock.patch("sys.stdin", io.StringIO(stdin)), redirect_stderr(io.StringIO()) as err:
+            status = main(["--file", self.test_file] + list(argv), out=out)
+        return status, out.getvalue(), err.getvalue()
+
+    def listed(self, *argv):
+        return [line.split("\t") for line in self.run_cli("list", *argv)[1].splitlines()]
+
+    def test_add_and_list(self):
+        status, out, err = self.run_cli("add", "Pay rent", "2000-01-01")
+        self.assertEqual(status, 0)
+        task_id = out.strip()
+        self.run_cli("add", "Later", "2999-01-01")
+        self.assertEqual(self.run_cli("add", "Bad", "tomorrow")[0], 1)
+
+        self.assertEqual(self.listed(), [[task_id, "2000-01-01", "open", "Pay rent"],
+                                         [mock.ANY, "2999-01-01", "open", "Later"]])
+        self.assertEqual([row[3] for row in self.listed("--overdue")], ["Pay rent"])
+        self.assertEqual([row[3] for row in self.listed("--limit", "1")], ["Pay rent"])
+
+    def test_import_ndjson_reports_bad_rows(self):
+        lines = [json.dumps({"name": f"Task {idx}", "due": "2025-05-20", "done": idx == 0})
+                 for idx in range(3)]
+        lines[1] = '{"name": "Broken", "due": "2025-13-01"}'
+        lines.append("not json")
+        status, out, err = self.run_cli("import", stdin="\n".join(lines) + "\n")
+        self.assertEqual(status, 1)
+        self.assertIn("line 2", err)
+        self.assertIn("line 4", err)
+        self.assertEqual(self.listed(), [[mock.ANY, "2025-05-20", "done", "Task 0"],
+                                         [mock.ANY, "2025-05-20", "open", "Task 2"]])
+
+        # Whole import is one write
+        with open(self.test_file) as file:
+            self.assertEqual(len(json.load(file)), 2)
+
+    def test_csv_round_trip(self):
+        csv_text = "name,due,done\nFirst,2025-05-21,no\n\"Second, with comma\",2025-05-20,yes\n"
+        self.assertEqual(self.run_cli("import", "--format", "csv", stdin=csv_text)[0], 0)
+        status, out, err = self.run_cli("export", "--format", "csv")
+        self.assertEqual(out.splitlines()[0], "name,due,done,id,repeat,completed")
+
+        os.remove(self.test_file)
+        self.run_cli("import", "--format", "csv", stdin=out)
+        self.assertEqual([(row[2], row[3]) for row in self.listed()],
+                         [("done", "Second, with comma"), ("open", "First")])
+
+    def test_recurring(self):
+        status, out, err = self.run_cli("add", "Standup", "2000-01-03", "--repeat", "weekly")
+        task_id = out.strip()
+        self.assertEqual(self.run_cli("add", "Bad", "2000-01-03", "--repeat", "often")[0], 1)
+        self.run_cli("complete", task_id)
+        self.assertEqual(self.listed(), [[task_id, "2000-01-10", "open", "Standup"]])
+
+        lines = self.run_cli("agenda", "--days", "14")[1].splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(all(line.startswith(task_id + "\t") for line in lines))
+
+        record = json.loads(self.run_cli("export")[1])
+        self.assertEqual(record["repeat"], {"unit": "week", "every": 1, "start": "2000-01-03"})
+        os.remove(self.test_file)
+        self.assertEqual(self.run_cli("import", stdin=json.dumps(record) + "\n")[0], 0)
+        self.assertEqual(json.loads(self.run_cli("export")[1]), record)
+
+    def test_csv_keeps_recurrence(self):
+        # Anchored on the 31st, with a later occurrence completed ahead
+        task_id = self.run_cli("add", "Rent", "2025-01-31", "--repeat", "monthly")[1].strip()
+        self.run_cli("complete", task_id)
+        record = json.loads(self.run_cli("export")[1])
+        self.assertEqual(record["due"], "2025-02-28")
+        manager = TaskManager(self.test_file)
+        manager.complete_occurrence(task_id, "2025-04-30")
+        manager.close()
+        record = json.loads(self.run_cli("export")[1])
+
+        out = self.run_cli("export", "--format", "csv")[1]
+        os.remove(self.test_file)
+        self.assertEqual(self.run_cli("import", "--format", "csv", stdin=out)[0], 0)
+        self.assertEqual(json.loads(self.run_cli("export")[1]), record)
+        self.assertEqual(record["completed"], ["2025-04-30"])
+
+    def test_archive(self):
+        task_id = self.run_cli("add", "Old report", "2000-01-01")[1].strip()
+        self.run_cli("add", "Open", "2000-01-02")
+        self.run_cli("complete", task_id)
+        self.assertEqual(self.run_cli("archive", "--older-than", "30")[0], 0)
+        self.assertEqual([row[3] for row in self.listed()], ["Open"])
+        archived = self.run_cli("archived", "--search", "rep")[1].splitlines()
+        self.assertEqual(archived, [f"{task_id}\t2000-01-01\tdone\tOld report"])
+
+    def test_complete_and_remove_ids_from_stdin(self):
+        ids = [self.run_cli("add", f"Task {day}", f"2025-05-{day}")[1].strip() for day in (20, 21, 22)]
+        status, out, err = self.run_cli("complete", "-", stdin="\n".join(ids[:2]) + "\n")
+        self.assertEqual((status, err.strip()), (0, "Completed 2 of 2 tasks"))
+        self.assertEqual(self.run_cli("remove", ids[0], "missing")[0], 1)
+
+        status, out, err = self.run_cli("export", "--format", "json")
+        self.assertEqual([(t["name"], t["done"]) for t in json.loads(out)],
+                         [("Task 21", True), ("Task 22", False)])
+
+    def test_follows_a_journaled_file(self):
+        # As the GUI writes its file
+        gui = TaskManager(self.test_file, storage=JournalStorage(self.test_file))
+        gui.add_task("From GUI", "2025-05-20")
+        journal = self.test_file + ".journal"
+        size = os.path.getsize(journal)
+
+        self.run_cli("add", "From cli", "2025-05-21")
+        self.assertGreater(os.path.getsize(journal), size)
+        self.assertEqual([row[3] for row in self.listed()], ["From GUI", "From cli"])
+        self.assertTrue(gui.reload_if_changed())
+        self.assertEqual(len(gui.tasks), 2)
+
+if __name__ == "__main__":
+    unittest.main()
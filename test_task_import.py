@@ -0,0 +1,69 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from task_import import import_file, import_rows, read_rows, validate_rows
+from task_tracker_oop import TaskManager
+
+class TestTaskImport(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.manager = TaskManager(os.path.join(self.test_dir, "tasks.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_validate_rows(self):
+        valid, errors = validate_rows([
+            ("line 1", '{"name": "A", "due": "2025-5-1", "done": "yes", "repeat": "weekly"}'),
+            ("line 2", "not json"),
+            ("line 3", {"name": "", "due": "2025-05-01"}),
+            ("line 4", {"name": "B", "due": "2025-02-30"}),
+            ("line 5", {"name": "C", "due": "2025-05-01", "done": "maybe"}),
+            ("line 6", {"name": "D", "due": "2025-05-01", "repeat": "now and then"}),
+        ])
+        self.assertEqual(valid, [{"name": "A", "due": "2025-05-01", "done": True, "id": None,
+                                  "repeat": "weekly"}])
+        self.assertEqual([where for where, message in errors], ["line 2", "line 3", "line 4", "line 5", "line 6"])
+
+    def test_parallel_import(self):
+        self.manager.add_task("Existing", "2025-05-01")
+        lines = [json.dumps({"name": f"Task {idx % 40}", "due": "2025-05-02"}) for idx in range(50)]
+        lines[7] = '{"name": "Bad", "due": "never"}'
+        lines.append(json.dumps({"name": "Existing", "due": "2025-05-01"}))
+        path = os.path.join(self.test_dir, "input.ndjson")
+        with open(path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+
+        saves = []
+        log_batch = self.manager.storage.log_batch
+        self.manager.storage.log_batch = (lambda tasks, records:
+                                          saves.append(1) or log_batch(tasks, records))
+        reported = []
+        result = import_file(self.manager, path, workers=2, chunk_size=8,
+                             on_error=lambda where, message: reported.append(where))
+
+        self.assertEqual(reported, ["line 8"])
+        self.assertEqual(result.errors[0][0], "line 8")
+        # Task 0..39 once each, in input order (Task 7 first comes in the
+        # second round, after the bad row); the rest are duplicates
+        self.assertEqual([t.name for t in result.added],
+                         [f"Task {idx}" for idx in range(40) if idx != 7] + ["Task 7"])
+        self.assertEqual(result.duplicates, 10)
+        self.assertEqual(saves, [1])
+        self.assertEqual(len(TaskManager(self.manager.filename).tasks), 41)
+
+    def test_csv_and_json_in_process(self):
+        csv_rows = read_rows(io.StringIO("name,due,done\nFirst,2025-05-21,no\n"), "csv")
+        json_rows = read_rows(io.StringIO('[{"name": "Second", "due": "2025-05-20", "done": true}]'), "json")
+        self.assertEqual(len(import_rows(self.manager, csv_rows, workers=1).added), 1)
+        result = import_rows(self.manager, json_rows)
+        self.assertEqual((result.added[0].name, result.added[0].due, result.added[0].done),
+                         ("Second", date(2025, 5, 20), True))
+        self.assertEqual([t.name for t in self.manager.ordered_tasks], ["Second", "First"])
+
+if __name__ == "__main__":
+    unittest.main()
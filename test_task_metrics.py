@@ -0,0 +1,97 @@
+import unittest
+import json
+import os
+import pstats
+import shutil
+import subprocess
+import sys
+import tempfile
+from task_metrics import Metrics, metrics
+from task_tracker_oop import TaskManager
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.metrics = Metrics()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_disabled_records_nothing(self):
+        @self.metrics.timed("work")
+        def work(value):
+            return value * 2
+
+        self.assertEqual(work(21), 42)
+        with self.metrics.timer("block"):
+            pass
+        self.metrics.count("things")
+        self.assertEqual(self.metrics.snapshot()["timings"], {})
+        self.assertEqual(self.metrics.snapshot()["counters"], {})
+
+    def test_timings_counters_and_export(self):
+        path = os.path.join(self.test_dir, "metrics.jsonl")
+        self.metrics.enable(path)
+
+        @self.metrics.timed("work")
+        def work():
+            raise ValueError("still timed")
+
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                work()
+        with self.metrics.timer("block"):
+            pass
+        self.metrics.count("rows", 5)
+        self.metrics.count("rows")
+        self.metrics.export()
+        self.metrics.export()
+
+        with open(path) as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]["timings"]["work"]["count"], 3)
+        self.assertEqual(lines[0]["timings"]["block"]["count"], 1)
+        self.assertEqual(lines[0]["counters"], {"rows": 6})
+        self.assertIn("work", self.metrics.summary([("work", "work"), ("missing", "nope")]))
+
+    def test_profile(self):
+        path = os.path.join(self.test_dir, "run.prof")
+        self.assertIsNone(self.metrics.stop_profile(path))
+        self.metrics.start_profile()
+        self.assertTrue(self.metrics.profiling)
+        sorted(range(1000), reverse=True)
+        self.assertEqual(self.metrics.stop_profile(path), path)
+        self.assertFalse(self.metrics.profiling)
+        self.assertTrue(pstats.Stats(path).total_calls > 0)
+
+    def test_manager_hot_paths(self):
+        metrics.reset()
+        metrics.enable()
+        try:
+            manager = TaskManager(os.path.join(self.test_dir, "tasks.json"))
+            task = manager.add_task("Task 1", "2025-05-20")
+            manager.mark_complete_by_id(task.id)
+            manager.sort_tasks()
+            timings = metrics.snapshot()["timings"]
+        finally:
+            metrics.disable()
+            metrics.reset()
+        for name in ("manager.load", "manager.add_task", "manager.mark_complete",
+                     "manager.sort_tasks", "storage.log"):
+            self.assertIn(name, timings)
+        self.assertEqual(timings["storage.log"]["count"], 2)
+
+    def test_env_var_exports_at_exit(self):
+        path = os.path.join(self.test_dir, "metrics.jsonl")
+        env = dict(os.environ, TASK_TRACKER_METRICS=path)
+        subprocess.run([sys.executable, "task_cli.py", "--file", os.path.join(self.test_dir, "tasks.txt"),
+                        "add", "Task 1", "2025-05-20"], env=env, check=True, stdout=subprocess.DEVNULL,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        with open(path) as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual(len(lines), 1)
+        self.assertIn("manager.add_task", lines[0]["timings"])
+
+if __name__ == "__main__":
+    unittest.main()
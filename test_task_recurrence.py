@@ -0,0 +1,105 @@
+import unittest
+import itertools
+import os
+import tempfile
+from datetime import date
+from task_recurrence import Recurrence
+from task_storage import JournalStorage
+from task_tracker_oop import TaskManager
+
+class TestRecurrence(unittest.TestCase):
+    def test_parse_and_format(self):
+        for text in ["daily", "weekly", "monthly", "yearly", "every 3 days", "every 2 weeks",
+                     "weekly until 2025-12-31"]:
+            self.assertEqual(str(Recurrence.parse(text, start=date(2025, 1, 1))), text)
+        with self.assertRaises(ValueError):
+            Recurrence.parse("sometimes")
+
+    def test_occurrences(self):
+        rule = Recurrence.parse("every 2 weeks", start=date(2025, 5, 5))
+        self.assertEqual(list(rule.occurrences(date(2025, 5, 10), date(2025, 6, 3))),
+                         [date(2025, 5, 19), date(2025, 6, 2)])
+        # Months keep the day, clamped to short months
+        rule = Recurrence.parse("monthly until 2025-05-31", start=date(2025, 1, 31))
+        self.assertEqual(list(rule.occurrences()),
+                         [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31),
+                          date(2025, 4, 30), date(2025, 5, 31)])
+        self.assertEqual(next(rule.occurrences(date(2025, 3, 1))), date(2025, 3, 31))
+        self.assertTrue(rule.is_occurrence(date(2025, 2, 28)))
+        self.assertFalse(rule.is_occurrence(date(2025, 2, 27)))
+        self.assertIsNone(rule.next_after(date(2025, 5, 31)))
+
+    def test_far_window_is_not_walked(self):
+        rule = Recurrence.parse("daily", start=date(2000, 1, 1))
+        self.assertEqual(rule.first_index(date(2999, 1, 1)), (date(2999, 1, 1) - date(2000, 1, 1)).days)
+
+
+class TestRecurringTasks(unittest.TestCase):
+    def setUp(self):
+        fd, self.test_file = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        os.remove(self.test_file)
+        self.manager = TaskManager(self.test_file)
+
+    def tearDown(self):
+        for name in (self.test_file, self.test_file + ".journal"):
+            if os.path.exists(name):
+                os.remove(name)
+
+    def test_agenda_merges_occurrences(self):
+        self.manager.add_task("Report", "2025-05-07")
+        self.manager.add_task("Standup", "2025-05-05", repeat="daily")
+        self.manager.add_task("Review", "2025-05-02", repeat="weekly")
+        agenda = [(entry.task.name, entry.due.day)
+                  for entry in self.manager.agenda(date(2025, 5, 5), date(2025, 5, 10))]
+        self.assertEqual(agenda, [("Standup", 5), ("Standup", 6), ("Report", 7), ("Standup", 7),
+                                  ("Standup", 8), ("Standup", 9), ("Review", 9)])
+        # No end: an endless series, taken lazily
+        endless = self.manager.agenda(date(2025, 5, 5))
+        self.assertEqual(len(list(itertools.islice(endless, 1000))), 1000)
+        # The task list itself holds each series once
+        self.assertEqual(len(self.manager.tasks), 3)
+
+    def test_complete_occurrences(self):
+        task = self.manager.add_task("Water plants", "2025-05-01", repeat="every 2 days until 2025-05-09")
+        self.assertTrue(self.manager.complete_occurrence(task.id, "2025-05-05"))
+        self.assertFalse(self.manager.complete_occurrence(task.id, "2025-05-04"))
+        self.assertTrue(self.manager.mark_complete_by_id(task.id))
+        self.assertEqual(task.due, date(2025, 5, 3))
+        self.assertTrue(self.manager.mark_complete_by_id(task.id))
+        # 5th was already done, so due skips ahead
+        self.assertEqual(task.due, date(2025, 5, 7))
+        self.assertFalse(task.done)
+        done = {entry.due.day: entry.done for entry in self.manager.agenda()}
+        self.assertEqual(done, {1: True, 3: True, 5: True, 7: False, 9: False})
+
+        reloaded = TaskManager(self.test_file).get_task(task.id)
+        self.assertEqual((reloaded.due, str(reloaded.repeat), reloaded.completed),
+                         (date(2025, 5, 7), "every 2 days until 2025-05-09", None))
+
+        self.manager.complete_tasks([task.id, task.id])
+        self.assertTrue(task.done)
+        self.assertEqual(task.due, date(2025, 5, 9))
+
+    def test_rollback_and_journal(self):
+        manager = TaskManager(self.test_file, storage=JournalStorage(self.test_file))
+        task = manager.add_task("Rent", "2025-01-31", repeat="monthly")
+        with self.assertRaises(RuntimeError):
+            with manager.batch():
+                manager.complete_occurrence(task.id)
+                manager.complete_occurrence(task.id, "2025-04-30")
+                manager.update_task(task.id, repeat=False)
+                raise RuntimeError("boom")
+        self.assertEqual((task.due, task.completed, str(task.repeat)), (date(2025, 1, 31), None, "monthly"))
+
+        manager.complete_occurrence(task.id, "2025-03-31")
+        other = TaskManager(self.test_file, storage=JournalStorage(self.test_file))
+        self.assertEqual(other.get_task(task.id).completed, frozenset([date(2025, 3, 31)]))
+        manager.complete_occurrence(task.id)
+        manager.complete_occurrence(task.id)
+        self.assertTrue(other.reload_if_changed())
+        copy = other.get_task(task.id)
+        self.assertEqual((copy.due, copy.completed), (date(2025, 4, 30), None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from task_search import SearchIndex, tokenize
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add("a", "Write quarterly report")
+        self.index.add("b", "Report bug in parser")
+        self.index.add("c", "Call the plumber")
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Fix bug #12, ASAP!"), ["fix", "bug", "12", "asap"])
+
+    def test_prefix_search(self):
+        self.assertEqual(self.index.search("rep"), {"a", "b"})
+        self.assertEqual(self.index.search("REPORT pars"), {"b"})
+        self.assertEqual(self.index.search("p"), {"b", "c"})
+        self.assertEqual(self.index.search("missing"), set())
+        self.assertEqual(self.index.search("  "), set())
+
+    def test_incremental_updates(self):
+        self.index.remove("b")
+        self.assertEqual(self.index.search("report"), {"a"})
+        self.assertEqual(self.index.search("pars"), set())
+        self.index.add("a", "Write summary")
+        self.assertEqual(self.index.search("report"), set())
+        self.assertEqual(self.index.search("sum"), {"a"})
+        self.assertEqual(len(self.index), 2)
+
+    def test_verify_path_matches_merge_path(self):
+        self.index.verify_limit = 0
+        merged = self.index.search("report p")
+        self.index.verify_limit = 1000
+        self.assertEqual(self.index.search("report p"), merged)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from task_server import Request, TaskServer
+from task_tracker_oop import TaskManager
+
+class TestTaskServer(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "tasks.json")
+        self.manager = TaskManager(self.test_file)
+        self.loop = asyncio.new_event_loop()
+        self.server = TaskServer(self.manager, port=0, max_queue=4)
+        self.loop.run_until_complete(self.server.start())
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=10)
+
+    def tearDown(self):
+        self.conn.close()
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        shutil.rmtree(self.test_dir)
+
+    def call(self, method, path, body=None):
+        self.conn.request(method, path, body=None if body is None else json.dumps(body))
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_endpoints_on_one_connection(self):
+        status, task = self.call("POST", "/tasks", {"name": "Write report", "due": "2025-05-20"})
+        self.assertEqual(status, 201)
+        self.call("POST", "/tasks", {"name": "Standup", "due": "2025-05-19", "repeat": "daily"})
+        self.assertEqual(self.call("POST", "/tasks", {"name": "Bad", "due": "soon"})[0], 400)
+
+        status, page = self.call("GET", "/tasks?limit=1")
+        self.assertEqual((status, [t["name"] for t in page["tasks"]], page["has_more"]),
+                         (200, ["Standup"], True))
+        self.assertEqual(self.call("GET", "/search?q=rep")[1]["tasks"][0]["id"], task["id"])
+        agenda = self.call("GET", "/agenda?start=2025-05-19&end=2025-05-22")[1]["agenda"]
+        self.assertEqual([entry["due"][-2:] for entry in agenda], ["19", "20", "20", "21"])
+
+        self.assertTrue(self.call("PATCH", f"/tasks/{task['id']}", {"done": True})[1]["done"])
+        self.assertEqual(self.call("DELETE", f"/tasks/{task['id']}")[0], 200)
+        self.assertEqual(self.call("GET", f"/tasks/{task['id']}")[0], 404)
+        self.assertEqual(self.call("PUT", "/tasks")[0], 405)
+
+        # Writes reached the file
+        self.manager.flush()
+        self.assertEqual([t.name for t in TaskManager(self.test_file).tasks], ["Standup"])
+
+    def test_writes_in_queue_share_one_batch(self):
+        batches = []
+        log_batch = self.manager.storage.log_batch
+        self.manager.storage.log_batch = (lambda tasks, records:
+                                          batches.append(len(records)) or log_batch(tasks, records))
+
+        def group():
+            requests = []
+            for idx in range(3):
+                body = json.dumps({"name": f"Task {idx}", "due": "2025-05-20"}).encode()
+                requests.append(Request("POST", "/tasks", {}, body, self.loop.create_future()))
+            requests.append(Request("GET", "/summary", {}, b"", self.loop.create_future()))
+            self.server.run_group(requests)
+            return [request.future.result() for request in requests]
+
+        results = asyncio.run_coroutine_threadsafe(self._wrap(group), self.loop).result()
+        self.assertEqual([status for status, body in results], [201, 201, 201, 200])
+        self.assertEqual(results[3][1]["total"], 3)
+        self.assertEqual(batches, [3])
+
+    @staticmethod
+    async def _wrap(func):
+        return func()
+
+    def test_full_queue_is_refused(self):
+        # Stop the dispatcher from taking requests so the queue fills up
+        asyncio.run_coroutine_threadsafe(self._pause(), self.loop).result()
+        conns = [http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=10) for _ in range(5)]
+        statuses = []
+        try:
+            for conn in conns[:4]:
+                conn.request("GET", "/summary")
+            while self.server.requests.qsize() < 4:
+                time.sleep(0.01)
+            conns[4].request("GET", "/summary")
+            statuses.append(conns[4].getresponse().status)
+        finally:
+            asyncio.run_coroutine_threadsafe(self._resume(), self.loop).result()
+        statuses.extend(conn.getresponse().status for conn in conns[:4])
+        for conn in conns:
+            conn.close()
+        self.assertEqual(statuses, [503, 200, 200, 200, 200])
+
+    async def _pause(self):
+        self.server._dispatcher.cancel()
+
+    async def _resume(self):
+        self.server._dispatcher = asyncio.ensure_future(self.server.dispatch())
+
+if __name__ == "__main__":
+    unittest.main()
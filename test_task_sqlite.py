@@ -0,0 +1,166 @@
+import unittest
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+from datetime import date
+from task_sqlite import SQLiteTaskManager
+from task_tracker_oop import Task
+
+class TestSQLiteTaskManager(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.test_dir, "tasks.db")
+        self.manager = SQLiteTaskManager(self.db_file)
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_add_remove_complete(self):
+        self.manager.add_task("Task 1", "2025-05-20")
+        self.manager.add_task("Task 2", "2025-05-21")
+        self.assertTrue(self.manager.mark_complete(1))
+        removed_task = self.manager.remove_task(0)
+
+        self.assertEqual(removed_task.name, "Task 1")
+        self.assertIsNone(self.manager.remove_task(5))
+        self.manager.close()
+
+        self.manager = SQLiteTaskManager(self.db_file)
+        tasks = self.manager.tasks
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0].name, "Task 2")
+        self.assertTrue(tasks[0].done)
+
+    def test_count(self):
+        self.assertEqual(self.manager.count(), 0)
+        task = self.manager.add_task("Task 1", "2025-05-20")
+        self.manager.add_task("Task 2", "2025-05-21")
+        self.manager.remove_task_by_id(task.id)
+        self.assertEqual(self.manager.count(), 1)
+
+    def test_date_queries(self):
+        self.manager.add_task("Later", "2025-05-30")
+        self.manager.add_task("Overdue", "2025-05-01")
+        self.manager.add_task("Done", "2025-05-02")
+        self.manager.add_task("Soon", "2025-05-12")
+        self.manager.mark_complete(2)
+        today = date(2025, 5, 10)
+
+        self.assertEqual([t.name for t in self.manager.sort_tasks()], ["Overdue", "Done", "Soon", "Later"])
+        self.assertEqual([t.name for t in self.manager.overdue(today)], ["Overdue"])
+        self.assertEqual([t.name for t in self.manager.due_this_week(today)], ["Soon"])
+        self.assertEqual([t.name for t in self.manager.open_tasks()], ["Overdue", "Soon", "Later"])
+
+    def test_query(self):
+        for name, due in [("Write report", "2025-05-20"), ("Read book", "2025-05-10"),
+                          ("Report bug", "2025-05-15")]:
+            self.manager.add_task(name, due)
+        page = self.manager.query(name_contains="report", limit=1)
+        self.assertEqual([t.name for t in page.tasks], ["Report bug"])
+        self.assertTrue(page.has_more)
+        page = self.manager.query(due_before="2025-05-20", order="added")
+        self.assertEqual([t.name for t in page.tasks], ["Read book", "Report bug"])
+
+    def test_search(self):
+        for name, due in [("Write report", "2025-05-20"), ("Prepare slides", "2025-05-10"),
+                          ("Report bug", "2025-05-15")]:
+            self.manager.add_task(name, due)
+        self.assertEqual([t.name for t in self.manager.search("rep")], ["Report bug", "Write report"])
+        self.assertEqual([t.name for t in self.manager.search("rep", limit=1)], ["Report bug"])
+        self.assertEqual([t.name for t in self.manager.search("bug rep")], ["Report bug"])
+        self.assertEqual(self.manager.search(""), [])
+
+        # Non-ASCII names fold like they do in TaskManager
+        self.manager.add_task("Émile report", "2025-05-30")
+        self.assertEqual([t.name for t in self.manager.search("émile")], ["Émile report"])
+        self.assertEqual([t.name for t in self.manager.query(name_contains="ÉMILE").tasks], ["Émile report"])
+
+    def test_iter_load_tasks(self):
+        self.manager.add_tasks([("Task 1", "2025-05-20"), ("Task 2", "2025-05-10")])
+        tasks = self.manager.iter_load_tasks()
+        self.assertEqual(next(tasks).name, "Task 1")
+        self.assertEqual([t.name for t in tasks], ["Task 2"])
+
+    def test_load_store(self):
+        self.manager.add_task("Task 1", "2025-05-20")
+        self.manager.add_task("Daily", "2025-05-10", repeat="daily")
+        store = self.manager.load_store()
+        self.assertEqual(list(store.to_records()), [t.to_dict() for t in self.manager.tasks])
+
+    def test_flush_and_reload(self):
+        self.manager.add_task("Task 1", "2025-05-20")
+        self.manager.flush()
+        self.assertFalse(self.manager.reload_if_changed())
+
+    def test_batch(self):
+        tasks = self.manager.add_tasks([("Task 1", "2025-05-20"), ("Task 2", "2025-05-21")])
+        self.assertEqual(self.manager.complete_tasks([task.id for task in tasks]), 2)
+        with self.assertRaises(RuntimeError):
+            with self.manager.batch():
+                self.manager.remove_tasks([tasks[0].id])
+                raise RuntimeError("boom")
+        self.assertEqual(len(self.manager.tasks), 2)
+        self.assertTrue(all(task.done for task in self.manager.tasks))
+
+    def test_task_ids(self):
+        task = self.manager.add_task("Task 1", "2025-05-20")
+        self.assertEqual(self.manager.get_task(task.id).name, "Task 1")
+        self.assertTrue(self.manager.mark_complete_by_id(task.id))
+        self.manager.update_task(task.id, due="2025-06-01")
+        self.assertEqual(self.manager.get_task(task.id).due, date(2025, 6, 1))
+        self.assertEqual(self.manager.remove_task_by_id(task.id).name, "Task 1")
+        self.assertEqual(self.manager.tasks, [])
+
+    def test_import_json(self):
+        json_file = os.path.join(self.test_dir, "tasks.json")
+        with open(json_file, "w") as file:
+            json.dump([{"name": "Imported", "due": "2025-05-20", "done": True}], file)
+        self.manager.close()
+
+        self.manager = SQLiteTaskManager(self.db_file, import_from=json_file)
+        self.assertEqual(len(self.manager.tasks), 1)
+        self.assertTrue(self.manager.tasks[0].done)
+
+    def test_old_schema_gets_recurrence_columns(self):
+        self.manager.close()
+        os.remove(self.db_file)
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("CREATE TABLE tasks (name TEXT NOT NULL, due TEXT NOT NULL, done INTEGER NOT NULL DEFAULT 0)")
+        conn.execute("INSERT INTO tasks VALUES ('Old', '2025-05-20', 0)")
+        conn.commit()
+        conn.close()
+        self.manager = SQLiteTaskManager(self.db_file)
+        task = self.manager.add_task("New", "2025-05-21", repeat="daily")
+        self.assertEqual([(t.name, t.repeat) for t in self.manager.tasks], [("Old", None), ("New", task.repeat)])
+
+    def test_recurring_tasks(self):
+        json_file = os.path.join(self.test_dir, "tasks.json")
+        weekly = Task("Standup", "2025-05-05", task_id="w", repeat="weekly", completed=[date(2025, 5, 19)])
+        with open(json_file, "w") as file:
+            json.dump([weekly.to_dict()], file)
+        self.manager.close()
+        self.manager = SQLiteTaskManager(self.db_file, import_from=json_file)
+        self.assertEqual(self.manager.get_task("w").to_dict(), weekly.to_dict())
+
+        # Completes one occurrence, not the series
+        self.assertTrue(self.manager.complete_occurrence("w"))
+        self.assertTrue(self.manager.mark_complete_by_id("w"))
+        task = self.manager.get_task("w")
+        self.assertEqual((task.due, task.done, task.completed), (date(2025, 5, 26), False, None))
+
+        monthly = self.manager.add_task("Rent", "2025-01-31", repeat="monthly")
+        self.manager.add_task("Plain", "2025-05-21")
+        self.assertEqual([(o.task.name, o.due.isoformat(), o.done)
+                          for o in self.manager.agenda("2025-05-20", "2025-06-03")],
+                         [("Plain", "2025-05-21", False), ("Standup", "2025-05-26", False),
+                          ("Rent", "2025-05-31", False), ("Standup", "2025-06-02", False)])
+        self.manager.update_task(monthly.id, repeat=False)
+        self.assertIsNone(self.manager.get_task(monthly.id).repeat)
+        self.manager.update_task(monthly.id, repeat="every 2 days")
+        self.assertEqual(str(self.manager.get_task(monthly.id).repeat), "every 2 days")
+
+if __name__ == "__main__":
+    unittest.main()
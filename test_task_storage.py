@@ -0,0 +1,320 @@
+import unittest
+import io
+import os
+import json
+import shutil
+import tempfile
+import threading
+from datetime import date
+from unittest import mock
+from task_storage import (JsonStorage, JournalStorage, SharedStorage, WriteBehindStorage,
+                          iter_json_array, iter_json_chunks, merge_records)
+from task_tracker_oop import Task, TaskManager
+
+class TestStreamingJson(unittest.TestCase):
+    def setUp(self):
+        self.records = [{"name": f"Task \"{idx}\"\n", "due": "2025-05-20", "done": idx % 2 == 0, "id": str(idx)}
+                        for idx in range(50)]
+
+    def test_writer_matches_json_dump(self):
+        for records in ([], self.records[:1], self.records):
+            self.assertEqual("".join(iter_json_chunks(iter(records))), json.dumps(records, indent=2))
+
+    def test_reader_with_small_chunks(self):
+        text = json.dumps(self.records, indent=2)
+        for chunk_size in (1, 7, 100, 1 << 16):
+            self.assertEqual(list(iter_json_array(io.StringIO(text), chunk_size)), self.records)
+        self.assertEqual(list(iter_json_array(io.StringIO(" [ ] "))), [])
+
+    def test_reader_rejects_truncated_file(self):
+        text = json.dumps(self.records, indent=2)[:-40]
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO(text), 64))
+
+    def test_manager_streams_tasks(self):
+        test_dir = tempfile.mkdtemp()
+        try:
+            test_file = os.path.join(test_dir, "tasks.json")
+            manager = TaskManager(test_file)
+            manager.add_task("Task 1", "2025-05-20")
+            manager.add_task("Task 2", "2025-05-21")
+            streamed = manager.iter_load_tasks()
+            self.assertEqual(next(streamed).name, "Task 1")
+            self.assertEqual([t.id for t in streamed], [manager.tasks[1].id])
+        finally:
+            shutil.rmtree(test_dir)
+
+class TestJournalStorage(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "tasks.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def open_manager(self, **kwargs):
+        return TaskManager(self.test_file, storage=JournalStorage(self.test_file, **kwargs))
+
+    def test_mutations_are_replayed(self):
+        manager = self.open_manager()
+        manager.add_task("Task 1", "2025-05-20")
+        manager.add_task("Task 2", "2025-05-21")
+        manager.add_task("Task 3", "2025-05-22")
+        manager.mark_complete(1)
+        manager.remove_task(0)
+        manager.update_task(manager.tasks[1].id, name="Task 3 renamed")
+
+        # Snapshot was never rewritten, everything lives in the journal
+        self.assertFalse(os.path.exists(self.test_file))
+
+        reopened = self.open_manager()
+        self.assertEqual([t.name for t in reopened.tasks], ["Task 2", "Task 3 renamed"])
+        self.assertTrue(reopened.tasks[0].done)
+        self.assertEqual(reopened.tasks[1].due, date(2025, 5, 22))
+
+    def test_compaction_writes_snapshot(self):
+        manager = self.open_manager(compact_every=2)
+        for day in range(10, 15):
+            manager.add_task(f"Task {day}", f"2025-05-{day}")
+
+        with open(self.test_file) as file:
+            self.assertGreaterEqual(len(json.load(file)), 3)
+        with open(self.test_file + ".journal") as file:
+            self.assertLessEqual(len(file.readlines()), 3)
+
+        reopened = self.open_manager()
+        self.assertEqual(len(reopened.tasks), 5)
+
+    def test_torn_write_is_discarded(self):
+        manager = self.open_manager()
+        manager.add_task("Task 1", "2025-05-20")
+        with open(self.test_file + ".journal", "a") as file:
+            file.write('{"op": "add", "task": {"name": "Half')
+
+        reopened = self.open_manager()
+        self.assertEqual([t.name for t in reopened.tasks], ["Task 1"])
+
+        # The torn tail is cut off so new records are not stuck behind it
+        reopened.add_task("Task 2", "2025-05-21")
+        self.assertEqual(len(self.open_manager().tasks), 2)
+
+    def test_snapshot_without_ids(self):
+        with open(self.test_file, "w") as file:
+            json.dump([{"name": "Old 1", "due": "2025-05-20", "done": False},
+                       {"name": "Old 2", "due": "2025-05-21", "done": False}], file)
+        manager = self.open_manager()
+        manager.mark_complete(1)
+
+        # Derived IDs match between runs, so the journal still applies
+        reopened = self.open_manager()
+        self.assertTrue(reopened.tasks[1].done)
+        self.assertEqual(reopened.tasks[0].id, manager.tasks[0].id)
+
+    def test_stale_journal_after_compaction_crash(self):
+        manager = self.open_manager()
+        manager.add_task("Task 1", "2025-05-20")
+        journal = self.test_file + ".journal"
+        with open(journal) as file:
+            old_journal = file.read()
+
+        # Simulate a crash right after the snapshot was replaced
+        manager.save_tasks()
+        with open(journal, "w") as file:
+            file.write(old_journal)
+
+        reopened = self.open_manager()
+        self.assertEqual(len(reopened.tasks), 1)
+
+class TestWriteBehindStorage(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "tasks.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_burst_is_coalesced(self):
+        writes = []
+        backend = JsonStorage(self.test_file)
+        storage = WriteBehindStorage(backend, delay=0.5, listener=writes.append)
+        manager = TaskManager(self.test_file, storage=storage)
+        for day in range(10, 20):
+            manager.add_task(f"Task {day}", f"2025-05-{day}")
+        manager.mark_complete(0)
+        manager.remove_task(1)
+        manager.flush()
+
+        self.assertEqual(writes, [None])
+        with open(self.test_file) as file:
+            saved = json.load(file)
+        self.assertEqual(len(saved), 9)
+        self.assertTrue(saved[0]["done"])
+        manager.close()
+
+    def test_close_flushes_journal(self):
+        storage = WriteBehindStorage(JournalStorage(self.test_file), delay=10)
+        manager = TaskManager(self.test_file, storage=storage)
+        task = manager.add_task("Task 1", "2025-05-20")
+        manager.update_task(task.id, name="Renamed")
+        manager.close()
+
+        reopened = TaskManager(self.test_file, storage=JournalStorage(self.test_file))
+        self.assertEqual([t.name for t in reopened.tasks], ["Renamed"])
+
+    def test_write_errors_are_reported(self):
+        errors = []
+        missing_dir = os.path.join(self.test_dir, "missing", "tasks.json")
+        storage = WriteBehindStorage(JsonStorage(missing_dir), delay=0, listener=errors.append)
+        manager = TaskManager(missing_dir, storage=storage)
+        manager.add_task("Task 1", "2025-05-20")
+        manager.close()
+        self.assertIsInstance(errors[0], OSError)
+
+    def test_queueing_does_not_wait_for_a_slow_load(self):
+        backend = JsonStorage(self.test_file)
+        reading = threading.Event()
+        release = threading.Event()
+        load_changes = backend.load_changes
+
+        def slow_load_changes(full=False):
+            reading.set()
+            release.wait(5)
+            return load_changes(full)
+        backend.load_changes = slow_load_changes
+        storage = WriteBehindStorage(backend, delay=0)
+        loader = threading.Thread(target=storage.load)
+        loader.start()
+        self.assertTrue(reading.wait(5))
+        queued = threading.Event()
+        task = Task("Task 1", "2025-05-20", task_id="a")
+        threading.Thread(target=lambda: (storage.save([task]), queued.set())).start()
+        self.assertTrue(queued.wait(5))
+        release.set()
+        loader.join()
+        storage.close()
+        with open(self.test_file) as file:
+            self.assertEqual([record["id"] for record in json.load(file)], ["a"])
+
+class TestSharedStorage(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "tasks.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def open_manager(self, backend=JsonStorage):
+        return TaskManager(self.test_file, storage=SharedStorage(backend(self.test_file)))
+
+    def test_merge_records(self):
+        base = {"1": {"id": "1", "name": "A", "done": False},
+                "2": {"id": "2", "name": "B", "done": False},
+                "3": {"id": "3", "name": "C", "done": False}}
+        ours = [{"id": "1", "name": "A renamed", "done": False},
+                {"id": "2", "name": "B", "done": False},
+                {"id": "4", "name": "Ours", "done": False}]
+        theirs = [{"id": "1", "name": "A", "done": True},
+                  {"id": "3", "name": "C edited", "done": False},
+                  {"id": "5", "name": "Theirs", "done": False}]
+        merged = merge_records(base, ours, theirs)
+        self.assertEqual(merged, [
+            {"id": "1", "name": "A renamed", "done": True},  # both edited, different fields
+            {"id": "3", "name": "C edited", "done": False},  # we deleted, they edited
+            {"id": "5", "name": "Theirs", "done": False},
+            {"id": "4", "name": "Ours", "done": False},
+        ])                                                  # "2" deleted by them
+
+    def test_concurrent_managers_merge(self):
+        first = self.open_manager()
+        second = self.open_manager()
+        self.assertEqual(second.tasks, [])
+        task = first.add_task("Shared", "2025-05-20")
+
+        # second never saw "Shared"; its write merges instead of clobbering
+        second.add_task("Second", "2025-05-21")
+        self.assertEqual([t.name for t in second.tasks], ["Shared", "Second"])
+        self.assertEqual(second.storage.conflicts, 1)
+
+        second.update_task(task.id, name="Renamed")
+        first.mark_complete_by_id(task.id)
+        self.assertEqual(first.get_task(task.id).name, "Renamed")
+        self.assertTrue(first.get_task(task.id).done)
+        self.assertEqual(len(first.tasks), 2)
+
+    def test_reload_if_changed(self):
+        first = self.open_manager(JournalStorage)
+        second = self.open_manager(JournalStorage)
+        first.add_task("Task 1", "2025-05-20")
+        second.tasks  # load
+        self.assertFalse(second.reload_if_changed())
+
+        first.add_task("Task 2", "2025-05-21")
+        self.assertTrue(second.reload_if_changed())
+        self.assertEqual([t.name for t in second.ordered_tasks], ["Task 1", "Task 2"])
+        self.assertFalse(second.reload_if_changed())
+
+    def test_load_changes_reads_only_new_journal_lines(self):
+        first = self.open_manager(JournalStorage)
+        second = self.open_manager(JournalStorage)
+        task = first.add_task("Task 1", "2025-05-20")
+        second.tasks  # load
+        first.add_task("Task 2", "2025-05-21")
+        first.mark_complete_by_id(task.id)
+
+        kind, records = second.storage.load_changes()
+        self.assertEqual((kind, [r["op"] for r in records]), ("delta", ["add", "complete"]))
+        second.apply_changes(kind, records)
+        self.assertEqual([(t.name, t.done) for t in second.ordered_tasks],
+                         [("Task 1", True), ("Task 2", False)])
+
+        # A compaction replaces the snapshot, so the journal alone won't do
+        first.save_tasks()
+        self.assertEqual(second.storage.load_changes()[0], "full")
+
+    def test_iter_load_streams(self):
+        self.open_manager().add_tasks([("Task 1", "2025-05-20"), ("Task 2", "2025-05-21")])
+        storage = SharedStorage(JsonStorage(self.test_file))
+        with mock.patch.object(JsonStorage, "load", side_effect=AssertionError("not streamed")):
+            records = storage.iter_load()
+            self.assertEqual(next(records)["name"], "Task 1")
+            self.assertEqual([record["name"] for record in records], ["Task 2"])
+
+    def test_json_and_journal_share_a_file(self):
+        # The server's stack and the CLI's default one on the same file
+        storage = WriteBehindStorage(SharedStorage(JournalStorage(self.test_file)), delay=0)
+        server = TaskManager(self.test_file, storage=storage, lazy=False)
+        server.add_task("From server", "2025-05-20")
+        server.flush()
+
+        cli = self.open_manager()
+        self.assertEqual([t.name for t in cli.tasks], ["From server"])
+        cli.add_task("From cli", "2025-05-21")
+        self.assertTrue(server.reload_if_changed())
+        self.assertEqual([t.name for t in server.ordered_tasks], ["From server", "From cli"])
+
+        # A journal append is a change for the JSON side too
+        server.add_task("Later", "2025-05-22")
+        server.flush()
+        self.assertTrue(cli.reload_if_changed())
+        self.assertEqual(len(cli.tasks), 3)
+        self.assertEqual(len(self.open_manager().tasks), 3)
+        server.close()
+
+    def test_write_behind_picks_up_merge(self):
+        storage = WriteBehindStorage(SharedStorage(JsonStorage(self.test_file)), delay=0)
+        first = TaskManager(self.test_file, storage=storage)
+        other = self.open_manager()
+        first.tasks  # load
+        other.add_task("Theirs", "2025-05-20")
+        first.add_task("Ours", "2025-05-21")
+        first.flush()
+
+        # The merged write reached the disk; the manager still has to see it
+        self.assertTrue(storage.changed())
+        self.assertTrue(first.reload_if_changed())
+        self.assertEqual([t.name for t in first.ordered_tasks], ["Theirs", "Ours"])
+        self.assertFalse(storage.changed())
+        first.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import os
+from datetime import date
+from task_store import TaskStore
+from task_tracker_oop import Task, TaskManager
+
+class TestTaskStore(unittest.TestCase):
+    def setUp(self):
+        self.store = TaskStore.from_tasks([
+            Task("Later", "2025-05-30", task_id="a"),
+            Task("Overdue", "2025-05-01", task_id="b"),
+            Task("Done", "2025-05-02", True, task_id="c"),
+            Task("Soon", "2025-05-12", task_id="d"),
+        ])
+
+    def test_columns(self):
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.due(1), date(2025, 5, 1))
+        self.assertTrue(self.store.is_done(2))
+        self.store.set_done(2, False)
+        self.store.set_done(3)
+        self.assertEqual([self.store.is_done(idx) for idx in range(4)], [False, False, False, True])
+
+        task = self.store.task(0)
+        self.assertEqual((task.name, task.due, task.done, task.id), ("Later", date(2025, 5, 30), False, "a"))
+
+    def test_filter_and_sort(self):
+        open_rows = self.store.filter(done=False, due_before=date(2025, 5, 13))
+        self.assertEqual(open_rows, [1, 3])
+        self.assertEqual(self.store.sorted_indices(), [1, 2, 3, 0])
+        self.assertEqual([t.name for t in self.store.tasks(self.store.sorted_indices(open_rows))],
+                         ["Overdue", "Soon"])
+
+    def test_manager_round_trip(self):
+        test_file = "test_tasks_store.json"
+        try:
+            manager = TaskManager(test_file)
+            manager.tasks = list(self.store.tasks())
+            manager.save_tasks()
+            store = manager.load_store()
+            self.assertEqual(list(store.to_records()), list(self.store.to_records()))
+        finally:
+            if os.path.exists(test_file):
+                os.remove(test_file)
+
+    def test_recurring_fields_survive(self):
+        weekly = Task("Standup", "2025-05-05", task_id="w", repeat="weekly",
+                      completed=[date(2025, 5, 19)])
+        records = [weekly.to_dict(), {"name": "Plain", "due": "2025-05-06", "done": False, "id": "p"}]
+        store = TaskStore.from_records(records)
+        self.assertEqual(list(store.to_records()), records)
+        self.assertEqual(store.task(0).to_dict(), weekly.to_dict())
+        self.assertIsNone(store.task(1).repeat)
+        self.assertEqual(list(TaskStore.from_tasks([weekly]).to_records()), records[:1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,11 @@
 import unittest
 import os
 import json
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
 from datetime import datetime, date
-from task_tracker_oop import Task, TaskManager
+from task_tracker_oop import PAGE_SIZE, Task, TaskManager, page_tasks, pick_task
 
 class TestTaskManager(unittest.TestCase):
     def setUp(self):
@@ -49,6 +52,27 @@ class TestTaskManager(unittest.TestCase):
         self.assertEqual(self.manager.tasks[0].name, "Task 2")
         self.assertEqual(removed_task.name, "Task 1")
 
+    def test_count(self):
+        self.assertEqual(self.manager.count(), 0)
+        tasks = self.manager.add_tasks([("Task 1", "2025-05-20"), ("Task 2", "2025-05-21")])
+        self.manager.remove_task_by_id(tasks[0].id)
+        self.assertEqual(self.manager.count(), 1)
+        # Direct changes to self.tasks count too
+        self.manager.tasks.append(Task("Task 3", "2025-05-22"))
+        self.assertEqual(self.manager.count(), 2)
+
+    def test_replace_task_in_place(self):
+        self.manager.tasks = [Task("Task 1", "2025-05-20"), Task("Task 2", "2025-05-21")]
+        self.manager.save_tasks()
+
+        # Same length, so only the changed entry tells the manager to reindex
+        self.manager.tasks[0] = Task("Replaced", "2025-05-22")
+        self.manager.save_tasks()
+
+        names = [t.name for t in TaskManager(self.test_file).tasks]
+        self.assertEqual(names, ["Replaced", "Task 2"])
+        self.assertEqual([t.name for t in self.manager.ordered_tasks], ["Task 2", "Replaced"])
+
     def test_serialization_to_dict(self):
         task = Task("Serialize Test", "2025-05-22", True)
         task_dict = task.to_dict()
@@ -72,11 +96,172 @@ class TestTaskManager(unittest.TestCase):
         self.assertEqual(sorted_tasks[0].name, "Earlier Task")
         self.assertEqual(sorted_tasks[1].name, "Later Task")
 
+    def test_ordered_tasks_follow_mutations(self):
+        self.manager.add_task("Middle", "2025-05-20")
+        self.manager.add_task("Last", "2025-05-25")
+        self.manager.add_task("First", "2025-05-10")
+        self.manager.add_task("Middle tie", "2025-05-20")
+        view = self.manager.ordered_tasks
+        self.assertEqual([t.name for t in view], ["First", "Middle", "Middle tie", "Last"])
+
+        self.manager.remove_task(0)  # "Middle", by insertion position
+        self.assertEqual([t.name for t in view], ["First", "Middle tie", "Last"])
+
+        # Direct list changes are picked up on the next access
+        self.manager.tasks.append(Task("Earliest", "2025-05-01"))
+        self.assertEqual(self.manager.sort_tasks()[0].name, "Earliest")
+        self.assertEqual(view[0].name, "Earliest")
+
+    def test_task_ids(self):
+        task1 = self.manager.add_task("Task 1", "2025-05-20")
+        task2 = self.manager.add_task("Task 2", "2025-05-19")
+        self.assertNotEqual(task1.id, task2.id)
+        self.assertIs(self.manager.get_task(task2.id), task2)
+
+        self.assertTrue(self.manager.mark_complete_by_id(task1.id))
+        self.assertEqual(self.manager.remove_task_by_id(task2.id), task2)
+        self.assertIsNone(self.manager.remove_task_by_id(task2.id))
+        self.assertFalse(self.manager.mark_complete_by_id("missing"))
+
+        # IDs survive a save/load round trip
+        reloaded = TaskManager(self.test_file)
+        self.assertTrue(reloaded.get_task(task1.id).done)
+        self.assertIsNone(reloaded.get_task(task2.id))
+
+    def test_update_task(self):
+        task1 = self.manager.add_task("Task 1", "2025-05-20")
+        self.manager.add_task("Task 2", "2025-05-21")
+        self.manager.update_task(task1.id, name="Renamed", due="2025-05-30")
+
+        self.assertEqual([t.name for t in self.manager.ordered_tasks], ["Task 2", "Renamed"])
+        self.assertEqual(TaskManager(self.test_file).get_task(task1.id).due, date(2025, 5, 30))
+
+    def test_lazy_loading(self):
+        self.manager.add_task("Task 1", "2025-05-20")
+        lazy = TaskManager(self.test_file)
+        self.assertFalse(lazy._loaded)
+        self.assertEqual(lazy.query(order="added", limit=1).tasks[0].name, "Task 1")
+        self.assertFalse(lazy._loaded)
+        self.assertEqual(len(lazy.tasks), 1)
+        self.assertTrue(lazy._loaded)
+
+    def test_query(self):
+        for name, due in [("Write report", "2025-05-20"), ("Read book", "2025-05-10"),
+                          ("Report bug", "2025-05-15"), ("Call mom", "2025-05-25")]:
+            self.manager.add_task(name, due)
+        self.manager.mark_complete(3)
+
+        def names(**kwargs):
+            return [t.name for t in self.manager.query(**kwargs).tasks]
+
+        self.assertEqual(names(), ["Read book", "Report bug", "Write report", "Call mom"])
+        self.assertEqual(names(due_after="2025-05-10", due_before="2025-05-25"), ["Report bug", "Write report"])
+        self.assertEqual(names(name_contains="REPORT", order="added"), ["Write report", "Report bug"])
+        self.assertEqual(names(done=False, due_after="2025-05-12"), ["Report bug", "Write report"])
+
+        page = self.manager.query(offset=1, limit=2)
+        self.assertEqual([t.name for t in page.tasks], ["Report bug", "Write report"])
+        self.assertTrue(page.has_more)
+        self.assertFalse(self.manager.query(offset=2, limit=2).has_more)
+
+    def test_query_added_order_sees_direct_changes(self):
+        self.manager.add_task("Task 1", "2025-05-20")
+        self.manager.tasks.append(Task("Appended", "2025-05-01"))
+        self.assertEqual([t.name for t in self.manager.query(order="added").tasks], ["Task 1", "Appended"])
+
+    def test_search(self):
+        report = self.manager.add_task("Write report", "2025-05-20")
+        self.manager.add_task("Report bug", "2025-05-15")
+        self.manager.add_task("Call mom", "2025-05-25")
+
+        self.assertEqual([t.name for t in self.manager.search("rep")], ["Report bug", "Write report"])
+        self.assertEqual([t.name for t in self.manager.search("rep", limit=1)], ["Report bug"])
+        hits, total = self.manager.search_window("rep", 1)
+        self.assertEqual(([t.name for t in hits], total), (["Report bug"], 2))
+
+        self.manager.add_task("Report taxes", "2025-05-01")
+        self.manager.update_task(report.id, name="Write summary")
+        self.manager.remove_task(1)
+        self.assertEqual([t.name for t in self.manager.search("rep")], ["Report taxes"])
+
+    def test_batch_writes_once(self):
+        saves = []
+        save = self.manager.storage.save
+        self.manager.storage.save = lambda tasks: saves.append(1) or save(tasks)
+
+        added = self.manager.add_tasks([("Task 1", "2025-05-20"), ("Task 2", "2025-05-21"),
+                                        Task("Task 3", "2025-05-22")])
+        self.assertEqual(self.manager.complete_tasks([added[0].id, added[2].id, "missing"]), 2)
+        self.assertEqual(self.manager.remove_tasks([added[1].id]), [added[1]])
+        with self.manager.batch():
+            self.manager.add_task("Task 4", "2025-05-23")
+            self.manager.update_task(added[0].id, name="Renamed")
+        self.assertEqual(len(saves), 4)
+
+        reloaded = TaskManager(self.test_file)
+        self.assertEqual([t.name for t in reloaded.tasks], ["Renamed", "Task 3", "Task 4"])
+        self.assertEqual([t.done for t in reloaded.tasks], [True, True, False])
+
+    def test_batch_rollback(self):
+        tasks = self.manager.add_tasks([("Task 1", "2025-05-20"), ("Task 2", "2025-05-21"),
+                                        ("Task 3", "2025-05-22")])
+        with self.assertRaises(RuntimeError):
+            with self.manager.batch():
+                self.manager.remove_task_by_id(tasks[0].id)
+                self.manager.mark_complete_by_id(tasks[1].id)
+                self.manager.update_task(tasks[2].id, name="Renamed", due="2025-05-01")
+                self.manager.add_task("Task 4", "2025-05-23")
+                raise RuntimeError("boom")
+
+        self.assertEqual([t.name for t in self.manager.tasks], ["Task 1", "Task 2", "Task 3"])
+        self.assertEqual([t.name for t in self.manager.ordered_tasks], ["Task 1", "Task 2", "Task 3"])
+        self.assertFalse(tasks[1].done)
+        self.assertEqual(self.manager.search("renamed"), [])
+        self.assertEqual(len(TaskManager(self.test_file).tasks), 3)
+
+    def test_rollback_keeps_order_of_ties(self):
+        tasks = self.manager.add_tasks([("x", "2025-05-20"), ("y", "2025-05-20"), ("z", "2025-05-20")])
+        with self.assertRaises(RuntimeError):
+            with self.manager.batch():
+                self.manager.remove_task_by_id(tasks[0].id)
+                raise RuntimeError("boom")
+        self.assertEqual([t.name for t in self.manager.ordered_tasks], ["x", "y", "z"])
+        self.manager.add_task("w", "2025-05-20")
+        self.assertEqual([t.name for t in self.manager.ordered_tasks], ["x", "y", "z", "w"])
+
+    def test_bulk_add_keeps_order(self):
+        self.manager.add_task("First", "2025-05-15")
+        items = [(f"Task {idx}", f"2025-05-{10 + idx % 10}") for idx in range(200)]
+        self.manager.add_tasks(items)
+        expected = sorted(self.manager.tasks, key=lambda task: task.due)  # stable
+        self.assertEqual(list(self.manager.ordered_tasks), expected)
+
+        def failing_items():
+            yield from items
+            raise ValueError("bad row")
+
+        with self.assertRaises(ValueError):
+            self.manager.add_tasks(failing_items())
+        self.assertEqual(list(self.manager.ordered_tasks), expected)
+
+    def test_task_uses_slots(self):
+        self.assertFalse(hasattr(Task("Slots", "2025-05-20"), "__dict__"))
+
     def test_invalid_date_format(self):
         # Test the static method for date validation
         self.assertTrue(Task.is_valid_date_format("2025-05-20"))
         self.assertFalse(Task.is_valid_date_format("05-20-2025"))
         self.assertFalse(Task.is_valid_date_format("invalid"))
 
+    def test_menu_pages_tasks(self):
+        self.manager.add_tasks([(f"Task {idx}", f"2025-05-{idx % 28 + 1:02d}") for idx in range(PAGE_SIZE + 5)])
+        output = StringIO()
+        # Enter for the second page, then the number of a task on it
+        with mock.patch("builtins.input", side_effect=["", str(PAGE_SIZE + 2)]), redirect_stdout(output):
+            number = page_tasks(self.manager, "Enter task number to remove")
+        self.assertEqual(pick_task(self.manager, number), self.manager.ordered_tasks[PAGE_SIZE + 1])
+        self.assertIn(f"{PAGE_SIZE + 5}. ", output.getvalue())
+        self.assertIn(f"showing 1-{PAGE_SIZE}", output.getvalue())
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,52 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from task_storage import JsonStorage, JournalStorage
+from task_watch import FileWatcher
+
+class TestFileWatcher(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "tasks.json")
+        self.changed = threading.Event()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def watch(self, **kwargs):
+        watcher = FileWatcher([self.test_file, self.test_file + ".journal"], self.changed.set,
+                              interval=0.05, **kwargs)
+        self.addCleanup(watcher.stop)
+        return watcher.start()
+
+    def check_watcher(self, watcher):
+        # Atomic replace of the snapshot
+        JsonStorage(self.test_file).write([{"name": "Task 1", "due": "2025-05-20", "done": False, "id": "1"}])
+        self.assertTrue(self.changed.wait(5))
+        self.changed.clear()
+
+        # Append to the journal
+        storage = JournalStorage(self.test_file, durable=False)
+        storage.load()
+        storage.log_batch([], [{"op": "complete", "id": "1"}])
+        self.assertTrue(self.changed.wait(5))
+        self.changed.clear()
+
+        # Other files in the directory are ignored
+        with open(os.path.join(self.test_dir, "notes.txt"), "w") as file:
+            file.write("hello")
+        self.assertFalse(self.changed.wait(0.3))
+
+    def test_inotify(self):
+        watcher = self.watch()
+        if watcher.mode != "inotify":
+            self.skipTest("inotify not available")
+        self.check_watcher(watcher)
+
+    def test_polling(self):
+        self.check_watcher(self.watch(use_inotify=False))
+
+if __name__ == "__main__":
+    unittest.main()